@@ -0,0 +1,94 @@
+"""
+Сравнение результата бенчмарков с базовым
+
+Для каждого замера вычисляется изменение относительно базового результата с учетом направления
+(операции в секунду - больше лучше, время - меньше лучше). Ухудшение больше порога отмечается как регрессия,
+при наличии регрессий команда завершается с кодом 1.
+
+Запуск:
+    python benchmarks/compare.py benchmarks/results/current.json
+    python benchmarks/compare.py current.json --baseline benchmarks/baseline.json --threshold 0.1
+"""
+
+__author__: str = "Старков Е.П."
+
+import sys
+import json
+import argparse
+from typing import Any, Dict, List
+from pathlib import Path
+
+BASELINE_PATH: Path = Path(__file__).parent / "baseline.json"
+
+
+def load(path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Чтение результатов замеров
+
+    :param path: файл результата
+    :return: замеры по именам
+    """
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]], threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Сравнение замеров
+
+    :param baseline: базовые замеры
+    :param current: текущие замеры
+    :param threshold: допустимое ухудшение (0.1 - 10%)
+    :return: строки сравнения
+    """
+    rows: List[Dict[str, Any]] = []
+
+    for name, value in current.items():
+        base_value: Dict[str, Any] | None = baseline.get(name)
+
+        if base_value is None or not base_value["value"]:
+            rows.append({"name": name, "current": value, "baseline": None, "change": None, "status": "new"})
+            continue
+
+        # Положительное изменение - улучшение независимо от единиц
+        change: float = (value["value"] - base_value["value"]) / base_value["value"]
+
+        if not value.get("higher_is_better", False):
+            change = -change
+
+        status: str = "regression" if change < -threshold else "improvement" if change > threshold else "ok"
+        rows.append({"name": name, "current": value, "baseline": base_value, "change": change, "status": status})
+
+    for name in sorted(baseline.keys() - current.keys()):
+        rows.append({"name": name, "current": None, "baseline": baseline[name], "change": None, "status": "missing"})
+
+    return rows
+
+
+def main() -> None:
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Сравнение результата бенчмарков с базовым")
+    parser.add_argument("current", type=Path, help="файл текущего результата")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="файл базового результата")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое ухудшение (0.1 - 10%%)")
+    args = parser.parse_args()
+
+    rows: List[Dict[str, Any]] = compare(load(args.baseline), load(args.current), args.threshold)
+
+    for row in rows:
+        base_value: str = f"{row['baseline']['value']:.2f}" if row["baseline"] else "-"
+        current_value: str = f"{row['current']['value']:.2f}" if row["current"] else "-"
+        unit: str = (row["current"] or row["baseline"])["unit"]
+        change: str = f"{row['change']:+.1%}" if row["change"] is not None else ""
+        print(f"{row['name']:32} {base_value:>12} -> {current_value:>12} {unit:6} {change:>8} {row['status']}")
+
+    regressions: int = sum(1 for row in rows if row["status"] == "regression")
+
+    if regressions:
+        print(f"Регрессий: {regressions} (порог {args.threshold:.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Бенчмарк времени импорта пакета
+
+Каждый замер выполняется в отдельном процессе: импорт модулей пакета, затем создание ресурсов
+(движки БД, клиент HAWK) через реестр. Показывает, что импорт не создает подключений, а их стоимость
+переносится на первый вызов или startup().
+
+Запуск (переменные окружения .env должны быть заданы):
+    python benchmarks/import_time.py --runs 10
+"""
+
+__author__: str = "Старков Е.П."
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+_MEASURE_SCRIPT: str = """
+import json, time
+start = time.perf_counter()
+import dh_base.helpers, dh_base.middlewares, dh_base.repositories
+imported = time.perf_counter()
+from dh_base.resources import registry
+initialized_on_import = len(registry._instances)
+import asyncio
+asyncio.run(registry.startup("db.engine", "db.sync_engine", "hawk"))
+print(json.dumps({
+    "import": imported - start,
+    "startup": time.perf_counter() - imported,
+    "initialized_on_import": initialized_on_import,
+}))
+"""
+
+
+def measure(runs: int) -> Dict[str, float]:
+    """
+    Замер времени импорта и создания ресурсов
+
+    :param runs: количество запусков
+    :return: медианы времени в секундах и количество ресурсов, созданных при импорте
+    """
+    samples: List[Dict[str, float]] = []
+
+    for _ in range(runs):
+        output: str = subprocess.run(
+            [sys.executable, "-c", _MEASURE_SCRIPT], check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        "import_median": statistics.median(sample["import"] for sample in samples),
+        "startup_median": statistics.median(sample["startup"] for sample in samples),
+        "initialized_on_import": max(sample["initialized_on_import"] for sample in samples),
+    }
+
+
+def main() -> None:
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Время импорта dh_base")
+    parser.add_argument("--runs", type=int, default=5, help="количество запусков")
+    args = parser.parse_args()
+
+    result: Dict[str, float] = measure(args.runs)
+    print(f"Импорт пакета (медиана): {result['import_median'] * 1000:.1f} мс")
+    print(f"Создание ресурсов (медиана): {result['startup_median'] * 1000:.1f} мс")
+    print(f"Ресурсов создано при импорте: {int(result['initialized_on_import'])}")
+
+
+if __name__ == "__main__":
+    main()
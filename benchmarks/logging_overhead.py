@@ -0,0 +1,97 @@
+"""
+Бенчмарк накладных расходов логирования
+
+Измеряет время вызова logger.info в потоке вызова для трех вариантов:
+синхронный StreamHandler с CustomJsonFormatter (прежняя схема), синхронный StreamHandler с FastJsonFormatter
+и DroppingQueueHandler с записью в фоновом потоке. Вывод направляется в /dev/null.
+
+Запуск (переменные окружения .env должны быть заданы):
+    python benchmarks/logging_overhead.py --calls 100000 --repeat 5
+"""
+
+__author__: str = "Старков Е.П."
+
+import os
+import queue
+import logging
+import argparse
+import statistics
+from typing import List, Tuple, Callable
+from timeit import default_timer
+from logging.handlers import QueueListener
+
+from dh_base.logger import CustomJsonFormatter, FastJsonFormatter, DroppingQueueHandler, LogQueueStats
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    """
+    Отдельный логгер бенчмарка без распространения в корневой
+
+    :param name: имя логгера
+    :param handler: обработчик
+    :return: логгер
+    """
+    bench_logger: logging.Logger = logging.getLogger(f"bench.{name}")
+    bench_logger.handlers = [handler]
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.INFO)
+
+    return bench_logger
+
+
+def run(bench_logger: logging.Logger, calls: int) -> float:
+    """
+    Время одного вызова логирования в микросекундах
+
+    :param bench_logger: логгер
+    :param calls: количество вызовов
+    :return: среднее время вызова
+    """
+    start: float = default_timer()
+
+    for index in range(calls):
+        bench_logger.info("Время выполнения", extra={"process_time": 0.01, "index": index})
+
+    return (default_timer() - start) / calls * 1_000_000
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100_000, help="количество вызовов логирования")
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов")
+    parser.add_argument("--queue-size", type=int, default=10_000, help="размер очереди")
+    args: argparse.Namespace = parser.parse_args()
+
+    devnull = open(os.devnull, "w", encoding="utf-8")
+
+    legacy_handler: logging.StreamHandler = logging.StreamHandler(devnull)
+    legacy_handler.setFormatter(CustomJsonFormatter("%(timestamp)s %(level)s %(message)s %(module)s %(funcName)s"))
+    fast_handler: logging.StreamHandler = logging.StreamHandler(devnull)
+    fast_handler.setFormatter(FastJsonFormatter())
+
+    stats: LogQueueStats = LogQueueStats()
+    queue_handler: DroppingQueueHandler = DroppingQueueHandler(queue.Queue(args.queue_size), stats=stats)
+    listener_handler: logging.StreamHandler = logging.StreamHandler(devnull)
+    listener_handler.setFormatter(FastJsonFormatter())
+    listener: QueueListener = QueueListener(queue_handler.queue, listener_handler)
+    listener.start()
+
+    cases: List[Tuple[str, Callable[[], float]]] = [
+        ("StreamHandler + CustomJsonFormatter", lambda: run(make_logger("legacy", legacy_handler), args.calls)),
+        ("StreamHandler + FastJsonFormatter", lambda: run(make_logger("fast", fast_handler), args.calls)),
+        ("DroppingQueueHandler", lambda: run(make_logger("queue", queue_handler), args.calls)),
+    ]
+
+    print(f"Вызовов: {args.calls}, повторов: {args.repeat}")
+
+    for title, case in cases:
+        timings: List[float] = [case() for _ in range(args.repeat)]
+        print(f"{title:40} медиана {statistics.median(timings):8.2f} мкс/вызов, минимум {min(timings):8.2f}")
+
+    listener.stop()
+    devnull.close()
+    print(f"Очередь: поставлено {stats.enqueued}, отброшено {stats.dropped}")
+
+
+if __name__ == "__main__":
+    main()
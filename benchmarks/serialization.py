@@ -0,0 +1,114 @@
+"""
+Бенчмарк сериализации списков записей
+
+Сравнивает ConvertToDictMixin.to_dict с валидацией и сериализацией через Pydantic и ModelSerializer.dumps
+на списке записей (по умолчанию 10 000).
+
+Запуск (переменные окружения .env должны быть заданы):
+    python benchmarks/serialization.py --rows 10000 --repeat 5
+"""
+
+__author__: str = "Старков Е.П."
+
+import uuid
+import argparse
+import statistics
+from typing import Any, List, Callable
+from datetime import datetime, timezone
+from timeit import default_timer
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import String, Boolean
+from sqlalchemy.orm import Mapped, mapped_column
+
+from dh_base.columns import IdColumns, DateEditColumns
+from dh_base.mixins import ConvertToDictMixin
+from dh_base.database import Base
+
+
+class BenchItem(Base, IdColumns, DateEditColumns, ConvertToDictMixin):
+    """Модель для бенчмарка"""
+
+    __tablename__ = "bench_serialization_item"
+
+    name: Mapped[str] = mapped_column(String)
+    description: Mapped[str] = mapped_column(String)
+    is_active: Mapped[bool] = mapped_column(Boolean)
+
+
+class BenchItemSchema(BaseModel):
+    """Схема ответа для бенчмарка"""
+
+    id: int
+    uuid: uuid.UUID
+    name: str
+    description: str
+    is_active: bool
+    date_create: datetime
+    date_update: datetime | None
+    date_delete: datetime | None
+
+
+def make_items(rows: int) -> List[BenchItem]:
+    """
+    Создание записей
+
+    :param rows: количество записей
+    :return: записи
+    """
+    now: datetime = datetime.now(timezone.utc)
+
+    return [
+        BenchItem(
+            id=index,
+            uuid=uuid.uuid4(),
+            name=f"item {index}",
+            description="description " * 4,
+            is_active=True,
+            date_create=now,
+            date_update=now,
+            date_delete=None,
+        )
+        for index in range(rows)
+    ]
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """
+    Медиана времени выполнения
+
+    :param function: замеряемая функция
+    :param repeat: количество повторов
+    :return: время в секундах
+    """
+    samples: List[float] = []
+
+    for _ in range(repeat):
+        start: float = default_timer()
+        function()
+        samples.append(default_timer() - start)
+
+    return statistics.median(samples)
+
+
+def main() -> None:
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Сериализация списков записей")
+    parser.add_argument("--rows", type=int, default=10_000, help="количество записей")
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов")
+    args = parser.parse_args()
+
+    items: List[BenchItem] = make_items(args.rows)
+    adapter: TypeAdapter = TypeAdapter(List[BenchItemSchema])
+    serializer = BenchItem.serializer()
+
+    baseline: float = measure(lambda: adapter.dump_json(adapter.validate_python([i.to_dict() for i in items])), args.repeat)
+    compiled: float = measure(lambda: serializer.dumps(items), args.repeat)
+
+    print(f"to_dict + Pydantic: {baseline * 1000:.1f} мс")
+    print(f"ModelSerializer.dumps: {compiled * 1000:.1f} мс")
+    print(f"Ускорение: x{baseline / compiled:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Набор бенчмарков горячих путей: репозиторий, сериализация, middleware, рассылка событий сокетов
+
+Замеры:
+    * repository.create/get/list/update/delete - операций в секунду для BaseRepository
+    * list.deep_offset/list.deep_cursor - время страницы списка в глубине выборки (offset и курсор)
+    * serialization.to_dict/serialization.dumps - время сериализации большого списка записей
+    * middleware.overhead - накладные расходы middleware на запрос через ASGI клиент
+    * web_socket.fan_out - время доставки события всем подключениям
+
+Результат сохраняется в JSON, сравнение с базовым результатом - benchmarks/compare.py.
+По - умолчанию используется БД из настроек .env (PostgreSQL), --database-url позволяет подставить
+другую БД, например sqlite+aiosqlite:///bench.db (нужен aiosqlite).
+
+Запуск (переменные окружения .env должны быть заданы):
+    python benchmarks/suite.py --rows 2000 --output benchmarks/results/current.json
+    python benchmarks/suite.py --only repository list --save-baseline
+"""
+
+__author__: str = "Старков Е.П."
+
+import sys
+import json
+import uuid
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+from typing import Any, Dict, List, Callable, Awaitable
+from pathlib import Path
+from datetime import datetime, timezone
+from timeit import default_timer
+
+from sqlalchemy import String, Boolean
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from dh_base.columns import IdColumns, DateEditColumns
+from dh_base.mixins import ConvertToDictMixin
+from dh_base.database import Base, get_engine
+from dh_base.resources import registry
+from dh_base.repositories import BaseRepository
+from dh_base.schemas.list import NavigationSchema
+
+# Путь базового результата по - умолчанию
+BASELINE_PATH: Path = Path(__file__).parent / "baseline.json"
+
+
+class SuiteItem(Base, IdColumns, DateEditColumns, ConvertToDictMixin):
+    """Модель для бенчмарков"""
+
+    __tablename__ = "bench_suite_item"
+
+    name: Mapped[str] = mapped_column(String)
+    description: Mapped[str] = mapped_column(String)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+class SuiteRepository(BaseRepository):
+    """Репозиторий для бенчмарков"""
+
+    model = SuiteItem
+    ordering_field_name = "id"
+
+
+class FakeSocket:
+    """Сокет, считающий полученные сообщения"""
+
+    def __init__(self, done: Callable[[], None]) -> None:
+        self._done: Callable[[], None] = done
+
+    async def accept(self) -> None:
+        """Принятие подключения"""
+
+    async def send_text(self, _: str) -> None:
+        """Получение сообщения"""
+        self._done()
+
+    async def close(self, code: int = 1000) -> None:
+        """Закрытие подключения"""
+
+
+def result(value: float, unit: str, higher_is_better: bool) -> Dict[str, Any]:
+    """
+    Результат замера
+
+    :param value: значение
+    :param unit: единица измерения
+    :param higher_is_better: большее значение лучше (операции в секунду)
+    :return: результат для JSON
+    """
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+async def measure(function: Callable[[], Awaitable[Any]], repeat: int) -> float:
+    """
+    Медиана времени выполнения асинхронной функции
+
+    :param function: замеряемая функция
+    :param repeat: количество повторов
+    :return: время в секундах
+    """
+    samples: List[float] = []
+
+    for _ in range(repeat):
+        start: float = default_timer()
+        await function()
+        samples.append(default_timer() - start)
+
+    return statistics.median(samples)
+
+
+async def prepare_database(database_url: str | None) -> None:
+    """
+    Подмена подключения к БД и создание таблицы бенчмарка
+
+    :param database_url: адрес БД или None для БД из настроек
+    """
+    if database_url:
+        engine = create_async_engine(database_url)
+        registry.override("db.engine", engine)
+        registry.override("db.async_session_maker", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+
+    async with get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all, tables=[SuiteItem.__table__])
+        await connection.run_sync(Base.metadata.create_all, tables=[SuiteItem.__table__])
+
+
+async def drop_database() -> None:
+    """Удаление таблицы бенчмарка"""
+    async with get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all, tables=[SuiteItem.__table__])
+
+
+def payload(index: int) -> Dict[str, Any]:
+    """Данные записи"""
+    return {"name": f"item {index}", "description": "description " * 4}
+
+
+async def bench_repository(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Пропускная способность CRUD методов репозитория"""
+    repository: SuiteRepository = SuiteRepository()
+    rows: int = args.rows
+    results: Dict[str, Dict[str, Any]] = {}
+
+    start: float = default_timer()
+    ids: List[int] = [(await repository.create(payload(index))).id for index in range(rows)]
+    results["repository.create"] = result(rows / (default_timer() - start), "ops/s", True)
+
+    start = default_timer()
+
+    for entity_id in ids:
+        await repository.get(entity_id)
+
+    results["repository.get"] = result(rows / (default_timer() - start), "ops/s", True)
+
+    pages: int = max(1, rows // 50)
+    start = default_timer()
+
+    for page in range(pages):
+        await repository.list({}, NavigationSchema(page=page, size=50))
+
+    results["repository.list"] = result(pages / (default_timer() - start), "ops/s", True)
+
+    start = default_timer()
+
+    for entity_id in ids:
+        await repository.update(entity_id, {"name": f"updated {entity_id}"})
+
+    results["repository.update"] = result(rows / (default_timer() - start), "ops/s", True)
+
+    start = default_timer()
+
+    for entity_id in ids:
+        await repository.delete(entity_id)
+
+    results["repository.delete"] = result(rows / (default_timer() - start), "ops/s", True)
+
+    return results
+
+
+async def bench_list(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Время страницы списка в глубине выборки"""
+    repository: SuiteRepository = SuiteRepository()
+    rows: int = args.deep_rows
+    await repository.bulk_create([payload(index) for index in range(rows)])
+
+    size: int = 50
+    page: int = rows // size - 1
+    offset_time: float = await measure(
+        lambda: repository.list({}, NavigationSchema(page=page, size=size)), args.repeat
+    )
+
+    # Курсор на ту же глубину: берется последняя запись предыдущей страницы
+    previous: List[Any] = await repository.list({}, NavigationSchema(page=page - 1, size=size))
+    cursor: str = repository._entity_cursor(previous[-1], "next")
+    cursor_time: float = await measure(
+        lambda: repository.list({}, NavigationSchema(size=size, mode="cursor", cursor=cursor)), args.repeat
+    )
+
+    return {
+        "list.deep_offset": result(offset_time * 1000, "ms", False),
+        "list.deep_cursor": result(cursor_time * 1000, "ms", False),
+    }
+
+
+async def bench_serialization(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Сериализация большого списка записей"""
+    now: datetime = datetime.now(timezone.utc)
+    items: List[SuiteItem] = [
+        SuiteItem(
+            id=index, uuid=uuid.uuid4(), name=f"item {index}", description="description " * 4, is_active=True,
+            date_create=now, date_update=now, date_delete=None,
+        )
+        for index in range(args.serialize_rows)
+    ]
+    serializer = SuiteItem.serializer()
+
+    async def to_dict() -> None:
+        [item.to_dict() for item in items]
+
+    async def dumps() -> None:
+        serializer.dumps(items)
+
+    return {
+        "serialization.to_dict": result(await measure(to_dict, args.repeat) * 1000, "ms", False),
+        "serialization.dumps": result(await measure(dumps, args.repeat) * 1000, "ms", False),
+    }
+
+
+async def bench_middleware(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Накладные расходы middleware на запрос: разница времени запроса с middleware и без"""
+    from fastapi import FastAPI
+    from httpx import AsyncClient, ASGITransport
+
+    from dh_base.middlewares import collect_metrics, count_db_queries, exceptions_handler, add_process_time_header
+
+    def make_app(middlewares: List[Callable]) -> FastAPI:
+        app: FastAPI = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: int) -> Dict[str, int]:
+            return {"id": item_id}
+
+        for middleware in middlewares:
+            app.middleware("http")(middleware)
+
+        return app
+
+    async def per_request(app: FastAPI) -> float:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            async def run() -> None:
+                for index in range(args.requests):
+                    await client.get(f"/items/{index}")
+
+            return await measure(run, args.repeat) / args.requests
+
+    bare: float = await per_request(make_app([]))
+    full: float = await per_request(
+        make_app([exceptions_handler, count_db_queries, collect_metrics, add_process_time_header])
+    )
+
+    return {
+        "middleware.bare_request": result(bare * 1_000_000, "us", False),
+        "middleware.overhead": result(max(full - bare, 0) * 1_000_000, "us", False),
+    }
+
+
+async def bench_web_socket(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Время доставки события всем подключениям"""
+    from dh_base.helpers.web_socket_event import WebSocketConnectionManager
+
+    manager: WebSocketConnectionManager = WebSocketConnectionManager(max_queue_size=1000)
+    connections: int = args.connections
+    received: List[int] = [0]
+    all_received: asyncio.Event = asyncio.Event()
+
+    def done() -> None:
+        received[0] += 1
+
+        if received[0] >= connections:
+            all_received.set()
+
+    for index in range(connections):
+        await manager.connect(FakeSocket(done), user_id=index)
+
+    async def fan_out() -> None:
+        received[0] = 0
+        all_received.clear()
+        await manager.publish("bench.event", {"value": 1})
+        await all_received.wait()
+
+    fan_out_time: float = await measure(fan_out, args.repeat)
+    await manager.stop()
+
+    return {"web_socket.fan_out": result(fan_out_time * 1000, "ms", False)}
+
+
+# Группы замеров и признак использования БД
+BENCHMARKS: Dict[str, tuple] = {
+    "repository": (bench_repository, True),
+    "list": (bench_list, True),
+    "serialization": (bench_serialization, False),
+    "middleware": (bench_middleware, False),
+    "web_socket": (bench_web_socket, False),
+}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Выполнение выбранных групп замеров
+
+    :param args: аргументы командной строки
+    :return: результат для JSON
+    """
+    selected: List[str] = args.only or list(BENCHMARKS)
+    uses_database: bool = any(BENCHMARKS[name][1] for name in selected)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    if uses_database:
+        await prepare_database(args.database_url)
+
+    try:
+        for name in selected:
+            function, needs_database = BENCHMARKS[name]
+            print(f"Замер {name}...", file=sys.stderr)
+            results.update(await function(args))
+
+            if needs_database:
+                await prepare_database(None)
+    finally:
+        if uses_database:
+            await drop_database()
+            await registry.shutdown()
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": args.database_url or "settings",
+            "rows": args.rows,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Набор бенчмарков горячих путей")
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), help="группы замеров")
+    parser.add_argument("--database-url", help="адрес БД вместо настроек .env (асинхронный драйвер)")
+    parser.add_argument("--rows", type=int, default=1000, help="записей для замеров CRUD")
+    parser.add_argument("--deep-rows", type=int, default=20_000, help="записей для замера глубокой страницы")
+    parser.add_argument("--serialize-rows", type=int, default=10_000, help="записей для сериализации")
+    parser.add_argument("--requests", type=int, default=500, help="HTTP запросов в замере middleware")
+    parser.add_argument("--connections", type=int, default=1000, help="подключений сокетов")
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов")
+    parser.add_argument("--output", type=Path, help="файл результата JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"сохранить результат как базовый ({BASELINE_PATH})")
+    parser.add_argument("--log-level", default="WARNING", help="уровень логирования во время замеров")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level)
+    report: Dict[str, Any] = asyncio.run(run(args))
+    output: str = json.dumps(report, ensure_ascii=False, indent=2)
+
+    for path in filter(None, [args.output, BASELINE_PATH if args.save_baseline else None]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(output, encoding="utf-8")
+        print(f"Результат сохранен: {path}", file=sys.stderr)
+
+    for name, value in report["results"].items():
+        print(f"{name:32} {value['value']:12.2f} {value['unit']}")
+
+
+if __name__ == "__main__":
+    main()
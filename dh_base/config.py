@@ -1,6 +1,6 @@
 """Модуль конфигов приложения"""
 
-from typing import Type, Literal
+from typing import Any, Dict, List, Literal
 
 from pydantic import Extra
 from sqlalchemy import NullPool
@@ -9,28 +9,71 @@ from pydantic_settings import BaseSettings
 __author__: str = "Старков Е.П."
 
 T_MODE_TYPE = Literal["DEV", "TEST", "PROD"]
+T_REPLICA_STRATEGY = Literal["round_robin", "least_connections"]
 
 
 class DBSettings:
-    """Класс конфигов подключения к БД"""
+    """
+    Класс конфигов подключения к БД.
+    Параметры пула задаются для каждого режима: <MODE>_DB_USE_NULL_POOL - не держать пул соединений,
+    <MODE>_DB_POOL_SIZE, <MODE>_DB_MAX_OVERFLOW, <MODE>_DB_POOL_TIMEOUT (сек), <MODE>_DB_POOL_RECYCLE (сек, -1 - без
+    пересоздания), <MODE>_DB_POOL_PRE_PING - проверка соединения перед выдачей, <MODE>_DB_STATEMENT_CACHE_SIZE -
+    размер кэша подготовленных запросов asyncpg, <MODE>_DB_STATEMENT_TIMEOUT и <MODE>_DB_IDLE_IN_TRANSACTION_TIMEOUT -
+    таймауты сервера в миллисекундах, <MODE>_DB_REPLICA_URLS - реплики для чтения в виде
+    ["<логин>:<пароль>@<хост>:<порт>/<БД>"], <MODE>_DB_REPLICA_STRATEGY - выбор реплики: round_robin или
+    least_connections
+    """
 
     DEV_DB_HOST: str
     DEV_DB_NAME: str
     DEV_DB_LOGIN: str
     DEV_DB_PASSWORD: str
     DEV_DB_PORT: int
+    DEV_DB_USE_NULL_POOL: bool = False
+    DEV_DB_POOL_SIZE: int = 5
+    DEV_DB_MAX_OVERFLOW: int = 10
+    DEV_DB_POOL_TIMEOUT: float = 30
+    DEV_DB_POOL_RECYCLE: int = -1
+    DEV_DB_POOL_PRE_PING: bool = False
+    DEV_DB_STATEMENT_CACHE_SIZE: int = 100
+    DEV_DB_STATEMENT_TIMEOUT: int | None = None
+    DEV_DB_IDLE_IN_TRANSACTION_TIMEOUT: int | None = None
+    DEV_DB_REPLICA_URLS: List[str] = []
+    DEV_DB_REPLICA_STRATEGY: T_REPLICA_STRATEGY = "round_robin"
 
     TEST_DB_HOST: str
     TEST_DB_NAME: str
     TEST_DB_LOGIN: str
     TEST_DB_PASSWORD: str
     TEST_DB_PORT: int
+    TEST_DB_USE_NULL_POOL: bool = True
+    TEST_DB_POOL_SIZE: int = 5
+    TEST_DB_MAX_OVERFLOW: int = 10
+    TEST_DB_POOL_TIMEOUT: float = 30
+    TEST_DB_POOL_RECYCLE: int = -1
+    TEST_DB_POOL_PRE_PING: bool = False
+    TEST_DB_STATEMENT_CACHE_SIZE: int = 100
+    TEST_DB_STATEMENT_TIMEOUT: int | None = None
+    TEST_DB_IDLE_IN_TRANSACTION_TIMEOUT: int | None = None
+    TEST_DB_REPLICA_URLS: List[str] = []
+    TEST_DB_REPLICA_STRATEGY: T_REPLICA_STRATEGY = "round_robin"
 
     PROD_DB_HOST: str
     PROD_DB_NAME: str
     PROD_DB_LOGIN: str
     PROD_DB_PASSWORD: str
     PROD_DB_PORT: int
+    PROD_DB_USE_NULL_POOL: bool = False
+    PROD_DB_POOL_SIZE: int = 5
+    PROD_DB_MAX_OVERFLOW: int = 10
+    PROD_DB_POOL_TIMEOUT: float = 30
+    PROD_DB_POOL_RECYCLE: int = -1
+    PROD_DB_POOL_PRE_PING: bool = False
+    PROD_DB_STATEMENT_CACHE_SIZE: int = 100
+    PROD_DB_STATEMENT_TIMEOUT: int | None = None
+    PROD_DB_IDLE_IN_TRANSACTION_TIMEOUT: int | None = None
+    PROD_DB_REPLICA_URLS: List[str] = []
+    PROD_DB_REPLICA_STRATEGY: T_REPLICA_STRATEGY = "round_robin"
 
     def get_db_connection_url(self, mode: T_MODE_TYPE) -> str:
         """
@@ -46,6 +89,52 @@ class DBSettings:
             f':{getattr(self, f"{mode}_DB_PORT")}/{getattr(self, f"{mode}_DB_NAME")}'
         )
 
+    def get_db_replica_urls(self, mode: T_MODE_TYPE) -> List[str]:
+        """
+        Получить строки подключения к репликам БД
+
+        :param mode: режим запуска приложения
+        :return: строки подключения с драйвером и СУБД
+        """
+        return [f"postgresql+asyncpg://{url}" for url in getattr(self, f"{mode}_DB_REPLICA_URLS")]
+
+    def get_db_pool_params(self, mode: T_MODE_TYPE) -> Dict[str, Any]:
+        """
+        Получить параметры пула соединений
+
+        :param mode: режим запуска приложения
+        :return: параметры пула для create_engine
+        """
+        if getattr(self, f"{mode}_DB_USE_NULL_POOL"):
+            return {"poolclass": NullPool}
+
+        return {
+            "pool_size": getattr(self, f"{mode}_DB_POOL_SIZE"),
+            "max_overflow": getattr(self, f"{mode}_DB_MAX_OVERFLOW"),
+            "pool_timeout": getattr(self, f"{mode}_DB_POOL_TIMEOUT"),
+            "pool_recycle": getattr(self, f"{mode}_DB_POOL_RECYCLE"),
+            "pool_pre_ping": getattr(self, f"{mode}_DB_POOL_PRE_PING"),
+        }
+
+    def get_db_server_settings(self, mode: T_MODE_TYPE) -> Dict[str, str]:
+        """
+        Получить параметры сессии сервера БД
+
+        :param mode: режим запуска приложения
+        :return: параметры сервера вида {имя параметра: значение}
+        """
+        server_settings: Dict[str, str] = {}
+        statement_timeout: int | None = getattr(self, f"{mode}_DB_STATEMENT_TIMEOUT")
+        idle_timeout: int | None = getattr(self, f"{mode}_DB_IDLE_IN_TRANSACTION_TIMEOUT")
+
+        if statement_timeout is not None:
+            server_settings["statement_timeout"] = str(statement_timeout)
+
+        if idle_timeout is not None:
+            server_settings["idle_in_transaction_session_timeout"] = str(idle_timeout)
+
+        return server_settings
+
 
 class Settings(DBSettings, BaseSettings):
     """Класс конфигов"""
@@ -67,10 +156,40 @@ class Settings(DBSettings, BaseSettings):
     APP_NAME: str
     # Токен доступа к HAWK
     HAWK_TOKEN: str
+    # Окно в секундах, в котором одинаковые ошибки отправляются в HAWK один раз
+    ERROR_REPORT_DEDUPE_WINDOW: float = 60
+    # Максимум отправок ошибок одного вида (класс и место) за период ERROR_REPORT_RATE_PERIOD секунд
+    ERROR_REPORT_RATE_LIMIT: int = 10
+    ERROR_REPORT_RATE_PERIOD: float = 60
+    # Размер очереди ошибок на отправку
+    ERROR_REPORT_QUEUE_SIZE: int = 1000
     # Уровень логирования
     LOG_LEVEL: Literal['DEBUG', 'INFO', 'WARNING', 'ERROR']
+    # Размер очереди записей лога для фоновой записи. 0 - запись в потоке вызова
+    LOG_QUEUE_SIZE: int = 10000
+    # Поведение при заполненной очереди лога: drop_new - отбросить новую запись, drop_oldest - самую старую
+    LOG_QUEUE_FULL_POLICY: Literal["drop_new", "drop_oldest"] = "drop_new"
+    # Доля сохраняемых записей уровня INFO и ниже для каждого сообщения (1 - все записи)
+    LOG_INFO_SAMPLE_RATE: float = 1.0
     # Доступ к хостингу RABBIT MQ
     RABBIT_MQ_HOST: str
+    # Создание синхронного движка psycopg2 (get_sync_engine). Синхронный код может работать через
+    # dh_base.sync и SyncRepository на общем асинхронном движке без второго пула соединений
+    DB_SYNC_ENGINE_ENABLED: bool = True
+    # Через сколько дней после пометки на удаление (date_delete) запись удаляется окончательно
+    DELETE_ITEM_AFTER_DAYS: int = 30
+    # Размер пачки удаления, пауза между пачками и интервал запуска удаления помеченных записей в секундах
+    REAPER_BATCH_SIZE: int = 1000
+    REAPER_BATCH_PAUSE: float = 0.5
+    REAPER_INTERVAL: float = 3600
+    # Время в секундах после записи, в течение которого чтения идут в основную БД (чтение своих записей)
+    DB_READ_YOUR_WRITES_WINDOW: float = 2
+    # Интервал проверки доступности реплик в секундах
+    DB_REPLICA_HEALTH_CHECK_INTERVAL: float = 10
+    # Порог времени запроса к БД в секундах, после которого запрос пишется в лог медленных запросов
+    DB_SLOW_QUERY_THRESHOLD: float = 0.5
+    # Количество запросов к БД за один HTTP запрос, после которого пишется предупреждение (признак N+1)
+    DB_QUERY_COUNT_WARNING: int = 50
 
     @property
     def is_dev(self) -> bool:
@@ -98,12 +217,38 @@ class Settings(DBSettings, BaseSettings):
         return f"postgresql+psycopg2://{self.get_db_connection_url(self.MODE)}"
 
     @property
-    def database_connection_extra_params(self) -> dict[str, Type[NullPool]]:
-        """Дополнительные параметры подключения к БД"""
-        if self.is_test:
-            return {"pool": NullPool}
+    def db_replica_urls(self) -> List[str]:
+        """Строки подключения к репликам БД"""
+        return self.get_db_replica_urls(self.MODE)
+
+    @property
+    def db_replica_strategy(self) -> T_REPLICA_STRATEGY:
+        """Стратегия выбора реплики"""
+        return getattr(self, f"{self.MODE}_DB_REPLICA_STRATEGY")
+
+    @property
+    def database_connection_extra_params(self) -> Dict[str, Any]:
+        """Дополнительные параметры подключения к БД (параметры пула)"""
+        return self.get_db_pool_params(self.MODE)
+
+    @property
+    def database_async_connect_args(self) -> Dict[str, Any]:
+        """Параметры подключения драйвера asyncpg"""
+        return {
+            "statement_cache_size": getattr(self, f"{self.MODE}_DB_STATEMENT_CACHE_SIZE"),
+            "server_settings": {"application_name": self.APP_NAME, **self.get_db_server_settings(self.MODE)},
+        }
+
+    @property
+    def database_sync_connect_args(self) -> Dict[str, Any]:
+        """Параметры подключения драйвера psycopg2"""
+        server_settings: Dict[str, str] = self.get_db_server_settings(self.MODE)
+        connect_args: Dict[str, Any] = {"application_name": self.APP_NAME}
+
+        if server_settings:
+            connect_args["options"] = " ".join(f"-c {name}={value}" for name, value in server_settings.items())
 
-        return {}
+        return connect_args
 
 
 base_config: Settings = Settings()
@@ -2,19 +2,370 @@
 
 __author__: str = "Старков Е.П."
 
-from sqlalchemy import Engine, create_engine
+import time
+import asyncio
+import itertools
+from typing import Any, Dict, List, Type, Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, Pool, QueuePool, text, create_engine
 from sqlalchemy.orm import Session, DeclarativeMeta, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from .config import base_config
+from .config import T_REPLICA_STRATEGY, base_config
+from .logger import logger
+from .resources import registry
+from .metrics import T_LABEL_VALUES, metrics_registry
+from .instrumentation import instrument_engine
+
+
+@dataclass
+class PoolWaitStats:
+    """Накопительная статистика ожидания соединения из пула"""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, wait_time: float) -> None:
+        """
+        Учет ожидания соединения
+
+        :param wait_time: время ожидания в секундах
+        """
+        self.count += 1
+        self.total += wait_time
+        self.max = max(self.max, wait_time)
+
+
+@dataclass
+class PoolStats:
+    """Снимок состояния пула соединений"""
+
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    wait_count: int
+    wait_time_total: float
+    wait_time_max: float
+
+
+# Статистика ожидания по именам пулов
+_POOL_WAIT_STATS: Dict[str, PoolWaitStats] = {}
+# Движки по именам пулов
+_ENGINES: Dict[str, Engine] = {}
+
+
+def _instrumented_pool_class(base_class: Type[QueuePool], name: str) -> Type[QueuePool]:
+    """
+    Класс пула, учитывающий время выдачи соединения. Статистика хранится в атрибуте класса,
+    поэтому сохраняется при пересоздании пула
+
+    :param base_class: базовый класс пула
+    :param name: имя пула
+    :return: класс пула
+    """
+    wait_stats: PoolWaitStats = _POOL_WAIT_STATS.setdefault(name, PoolWaitStats())
+
+    def connect(self):
+        start_time: float = time.perf_counter()
+
+        try:
+            return base_class.connect(self)
+        finally:
+            wait_stats.add(time.perf_counter() - start_time)
+
+    return type(f"Instrumented{base_class.__name__}", (base_class,), {"connect": connect})
+
+
+def _engine_params(name: str, pool_class: Type[QueuePool], connect_args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Параметры создания движка с учетом настроек пула
+
+    :param name: имя пула
+    :param pool_class: класс пула по умолчанию для драйвера
+    :param connect_args: параметры подключения драйвера
+    :return: параметры для create_engine
+    """
+    params: Dict[str, Any] = {**base_config.database_connection_extra_params, "connect_args": connect_args}
+
+    if "poolclass" not in params:
+        params["poolclass"] = _instrumented_pool_class(pool_class, name)
+
+    return params
+
+
+def get_pool_stats() -> Dict[str, PoolStats]:
+    """
+    Статистика созданных пулов соединений: размер, выданные и свободные соединения, переполнение и время
+    ожидания выдачи
+
+    :return: статистика по именам пулов
+    """
+    result: Dict[str, PoolStats] = {}
+
+    for name, current_engine in _ENGINES.items():
+        pool: Pool = current_engine.pool
+        wait_stats: PoolWaitStats = _POOL_WAIT_STATS.get(name, PoolWaitStats())
+        is_queue_pool: bool = isinstance(pool, QueuePool)
+        result[name] = PoolStats(
+            size=pool.size() if is_queue_pool else 0,
+            checked_in=pool.checkedin() if is_queue_pool else 0,
+            checked_out=pool.checkedout() if is_queue_pool else 0,
+            overflow=pool.overflow() if is_queue_pool else 0,
+            wait_count=wait_stats.count,
+            wait_time_total=wait_stats.total,
+            wait_time_max=wait_stats.max,
+        )
+
+    return result
+
+
+def _pool_values(attribute: str) -> Callable[[], Dict[T_LABEL_VALUES, float]]:
+    """
+    Функция значений показателя пула для метрик
+
+    :param attribute: поле PoolStats
+    :return: функция значений по имени пула
+    """
+    return lambda: {(name,): getattr(stats, attribute) for name, stats in get_pool_stats().items()}
+
+
+metrics_registry.gauge("db_pool_size", "Размер пула соединений", ("pool",), _pool_values("size"))
+metrics_registry.gauge("db_pool_checked_in", "Свободные соединения пула", ("pool",), _pool_values("checked_in"))
+metrics_registry.gauge("db_pool_checked_out", "Выданные соединения пула", ("pool",), _pool_values("checked_out"))
+metrics_registry.gauge("db_pool_overflow", "Соединения сверх размера пула", ("pool",), _pool_values("overflow"))
+metrics_registry.counter(
+    "db_pool_wait_seconds_total",
+    "Суммарное время ожидания соединения из пула",
+    ("pool",),
+    _pool_values("wait_time_total"),
+)
+
+
+def _create_async_engine() -> AsyncEngine:
+    """Создание асинхронного движка БД"""
+    async_engine: AsyncEngine = create_async_engine(
+        base_config.db_connection_url,
+        **_engine_params("async", AsyncAdaptedQueuePool, base_config.database_async_connect_args),
+    )
+    _ENGINES["async"] = instrument_engine(async_engine.sync_engine)
+
+    return async_engine
+
+
+def _create_sync_engine() -> Engine:
+    """Создание синхронного движка БД"""
+    if not base_config.DB_SYNC_ENGINE_ENABLED:
+        raise RuntimeError("Синхронный движок БД отключен (DB_SYNC_ENGINE_ENABLED), используйте dh_base.sync")
+
+    new_sync_engine: Engine = create_engine(
+        base_config.db_connection_url_sync,
+        **_engine_params("sync", QueuePool, base_config.database_sync_connect_args),
+    )
+    _ENGINES["sync"] = instrument_engine(new_sync_engine)
+
+    return new_sync_engine
+
+
+def _dispose_engine(name: str) -> Callable[[Any], Any]:
+    """
+    Функция освобождения движка
+
+    :param name: имя пула
+    :return: функция для реестра ресурсов
+    """
+
+    def dispose(current_engine: Any) -> Any:
+        _ENGINES.pop(name, None)
+        return current_engine.dispose()
+
+    return dispose
+
+
+registry.register("db.engine", _create_async_engine, _dispose_engine("async"), eager=True)
+registry.register(
+    "db.async_session_maker",
+    lambda: async_sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False),
+    eager=True,
+)
+registry.register("db.sync_engine", _create_sync_engine, _dispose_engine("sync"))
+registry.register("db.sync_session_maker", lambda: sessionmaker(get_sync_engine()))
+
+
+def get_engine() -> AsyncEngine:
+    """Асинхронное подключение к БД. Создается при первом обращении"""
+    return registry.get("db.engine")
+
+
+def get_async_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Фабрика асинхронных сессий"""
+    return registry.get("db.async_session_maker")
+
+
+def get_sync_engine() -> Engine:
+    """Синхронное подключение к БД. Создается при первом обращении"""
+    return registry.get("db.sync_engine")
+
+
+def get_sync_session_maker() -> sessionmaker[Session]:
+    """Фабрика синхронных сессий"""
+    return registry.get("db.sync_session_maker")
+
+
+@dataclass
+class Replica:
+    """Реплика БД для чтения"""
+
+    name: str
+    engine: AsyncEngine
+    session_maker: async_sessionmaker[AsyncSession]
+    healthy: bool = True
+    in_use: int = 0
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики для чтения: по кругу (round_robin) или с наименьшим числом открытых сессий
+    (least_connections). Недоступные реплики исключаются до следующей успешной проверки, которая выполняется
+    фоновой задачей раз в health_check_interval секунд. Без доступных реплик чтение идет в основную БД
+    """
+
+    def __init__(
+        self, urls: List[str], strategy: T_REPLICA_STRATEGY = "round_robin", health_check_interval: float = 10
+    ) -> None:
+        """
+        Инициализация
+
+        :param urls: строки подключения к репликам
+        :param strategy: стратегия выбора реплики
+        :param health_check_interval: интервал проверки доступности в секундах
+        """
+        self.strategy: T_REPLICA_STRATEGY = strategy
+        self.health_check_interval: float = health_check_interval
+        self.replicas: List[Replica] = [self._create_replica(index, url) for index, url in enumerate(urls)]
+        self._counter: itertools.count = itertools.count()
+        self._health_task: asyncio.Task | None = None
+
+    @staticmethod
+    def _create_replica(index: int, url: str) -> Replica:
+        """
+        Создание движка реплики
+
+        :param index: номер реплики
+        :param url: строка подключения
+        :return: реплика
+        """
+        name: str = f"replica{index}"
+        replica_engine: AsyncEngine = create_async_engine(
+            url, **_engine_params(name, AsyncAdaptedQueuePool, base_config.database_async_connect_args)
+        )
+        _ENGINES[name] = instrument_engine(replica_engine.sync_engine)
+
+        return Replica(
+            name, replica_engine, async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+        )
+
+    def choose(self) -> Replica | None:
+        """
+        Выбор доступной реплики
+
+        :return: реплика или None, если доступных реплик нет
+        """
+        self._ensure_health_checks()
+        healthy: List[Replica] = [replica for replica in self.replicas if replica.healthy]
+
+        if not healthy:
+            return None
+
+        if self.strategy == "least_connections":
+            return min(healthy, key=lambda replica: replica.in_use)
+
+        return healthy[next(self._counter) % len(healthy)]
+
+    def mark_unhealthy(self, replica: Replica) -> None:
+        """
+        Исключение реплики до следующей успешной проверки
+
+        :param replica: реплика
+        """
+        if replica.healthy:
+            logger.warning("Реплика БД недоступна", extra={"replica": replica.name})
+
+        replica.healthy = False
+
+    async def check_health(self) -> None:
+        """Проверка доступности реплик запросом SELECT 1"""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as connection:
+                    await asyncio.wait_for(connection.execute(text("SELECT 1")), self.health_check_interval)
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.mark_unhealthy(replica)
+            else:
+                replica.healthy = True
+
+    async def close(self) -> None:
+        """Остановка проверок и освобождение движков реплик"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+        for replica in self.replicas:
+            _ENGINES.pop(replica.name, None)
+            await replica.engine.dispose()
+
+    def _ensure_health_checks(self) -> None:
+        """Запуск фоновой проверки доступности при первом выборе реплики в работающем цикле событий"""
+        if self._health_task is not None and not self._health_task.done():
+            return
+
+        try:
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._health_task = loop.create_task(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        """Цикл проверки доступности реплик"""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+
+
+registry.register(
+    "db.replica_router",
+    lambda: ReplicaRouter(
+        base_config.db_replica_urls, base_config.db_replica_strategy, base_config.DB_REPLICA_HEALTH_CHECK_INTERVAL
+    ),
+    lambda router: router.close(),
+)
+
+
+def get_replica_router() -> ReplicaRouter:
+    """Маршрутизатор чтений по репликам. Создается при первом обращении"""
+    return registry.get("db.replica_router")
+
+
+# Имена модуля, которые раньше создавались при импорте, и функции их ленивого получения
+_LAZY_ATTRIBUTES: Dict[str, Callable[[], Any]] = {
+    "engine": get_engine,
+    "async_session_maker": get_async_session_maker,
+    "sync_engine": get_sync_engine,
+    "sync_session_maker": get_sync_session_maker,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Ленивое получение подключений по старым именам модуля (engine, async_session_maker и т.д.)"""
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
 
-# Асинхронное подключение к БД
-engine: AsyncEngine = create_async_engine(base_config.db_connection_url, **base_config.database_connection_extra_params)
-async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Синхронное подключение к БД
-sync_engine: Engine = create_engine(base_config.db_connection_url_sync, **base_config.database_connection_extra_params)
-sync_session_maker: sessionmaker[Session] = sessionmaker(sync_engine)
 
 # Базовая модель
 Base: DeclarativeMeta = declarative_base()
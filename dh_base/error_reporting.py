@@ -0,0 +1,303 @@
+"""Фоновая отправка ошибок в HAWK с дедупликацией и ограничением частоты"""
+
+__author__: str = "Старков Е.П."
+
+import sys
+import time
+import queue
+import threading
+from types import FrameType, TracebackType
+from typing import Any, Dict, List, Tuple, Callable, Protocol, cast
+from dataclasses import dataclass, field
+
+from .config import base_config
+from .logger import logger, get_hawk
+from .resources import registry
+
+
+class ErrorSink(Protocol):
+    """Получатель ошибок с интерфейсом обработчика Hawk"""
+
+    def handler(
+        self, exc_cls: type, exc: BaseException, tb: TracebackType | None, context: Any = None, user: Any = None
+    ) -> None:
+        """Отправка ошибки"""
+
+
+@dataclass
+class ErrorEvent:
+    """Ошибка в очереди на отправку"""
+
+    exc_cls: type
+    exc: BaseException
+    tb: TracebackType | None
+    context: Any
+    user: Any
+
+
+@dataclass
+class FakeHawkSink:
+    """Локальный получатель ошибок для тестов: сохраняет события вместо отправки в HAWK"""
+
+    events: List[ErrorEvent] = field(default_factory=list)
+
+    def handler(
+        self, exc_cls: type, exc: BaseException, tb: TracebackType | None, context: Any = None, user: Any = None
+    ) -> None:
+        self.events.append(ErrorEvent(exc_cls, exc, tb, context, user))
+
+
+@dataclass
+class ErrorReportStats:
+    """Счетчики отправки ошибок"""
+
+    reported: int = 0
+    sent: int = 0
+    failed: int = 0
+    deduplicated: int = 0
+    rate_limited: int = 0
+    dropped: int = 0
+    opted_out: int = 0
+
+
+class ErrorReporter:
+    """
+    Отправка ошибок в фоновом потоке. Вызов report только ставит ошибку в ограниченную очередь.
+    Одинаковые ошибки (класс, место и текст) в окне dedupe_window отправляются один раз, ошибки одного вида
+    (класс и место) ограничиваются rate_limit отправками за rate_period. Количество пропущенных ошибок
+    передается в контексте следующей отправленной ошибки. Классы с атрибутом REPORT = False не отправляются
+    """
+
+    def __init__(
+        self,
+        sink_factory: Callable[[], ErrorSink],
+        max_queue_size: int = 1000,
+        dedupe_window: float = 60,
+        rate_limit: int = 10,
+        rate_period: float = 60,
+    ) -> None:
+        """
+        Инициализация
+
+        :param sink_factory: функция получения получателя ошибок (вызывается в фоновом потоке)
+        :param max_queue_size: размер очереди
+        :param dedupe_window: окно дедупликации в секундах
+        :param rate_limit: максимум отправок одного вида за период
+        :param rate_period: период ограничения частоты в секундах
+        """
+        self._sink_factory: Callable[[], ErrorSink] = sink_factory
+        self._queue: queue.Queue = queue.Queue(max_queue_size)
+        self._dedupe_window: float = dedupe_window
+        self._rate_limit: int = rate_limit
+        self._rate_period: float = rate_period
+        self._seen: Dict[Tuple[str, str], float] = {}
+        self._rates: Dict[str, Tuple[float, int]] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self.stats: ErrorReportStats = ErrorReportStats()
+
+    def report(
+        self,
+        exc: BaseException | None = None,
+        context: Any = None,
+        user: Any = None,
+        fingerprint: str | None = None,
+    ) -> bool:
+        """
+        Постановка ошибки в очередь отправки
+
+        :param exc: исключение, по - умолчанию обрабатываемое сейчас (sys.exc_info)
+        :param context: дополнительный контекст
+        :param user: данные пользователя
+        :param fingerprint: вид ошибки для группировки, по - умолчанию класс и место возникновения
+        :return: ошибка поставлена в очередь
+        """
+        _, current_exc, tb = sys.exc_info()
+
+        if exc is not None and exc is not current_exc:
+            tb = exc.__traceback__
+        else:
+            exc = current_exc
+
+        if exc is None:
+            return False
+
+        exc_cls: type = type(exc)
+
+        if not getattr(exc_cls, "REPORT", True):
+            self.stats.opted_out += 1
+            return False
+
+        group: str = fingerprint or self._fingerprint(exc_cls, tb)
+        now: float = time.monotonic()
+
+        with self._lock:
+            if not self._allow(group, str(exc), now):
+                return False
+
+            suppressed: int = self._suppressed.pop(group, 0)
+
+        if suppressed:
+            context = {**context, "suppressed": suppressed} if isinstance(context, dict) else {
+                "value": context,
+                "suppressed": suppressed,
+            }
+
+        try:
+            self._queue.put_nowait(ErrorEvent(exc_cls, exc, tb, context, user))
+        except queue.Full:
+            self.stats.dropped += 1
+            return False
+
+        self.stats.reported += 1
+        self._ensure_worker()
+
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Ожидание отправки ошибок из очереди
+
+        :param timeout: таймаут в секундах
+        :return: очередь обработана
+        """
+        deadline: float | None = None if timeout is None else time.monotonic() + timeout
+
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+            time.sleep(0.01)
+
+        return True
+
+    def _allow(self, group: str, message: str, now: float) -> bool:
+        """
+        Проверка дедупликации и ограничения частоты. Вызывается под блокировкой
+
+        :param group: вид ошибки
+        :param message: текст ошибки
+        :param now: текущее время
+        :return: ошибку нужно отправить
+        """
+        dedupe_key: Tuple[str, str] = (group, message)
+        last_sent: float | None = self._seen.get(dedupe_key)
+
+        if last_sent is not None and now - last_sent < self._dedupe_window:
+            self.stats.deduplicated += 1
+            self._suppressed[group] = self._suppressed.get(group, 0) + 1
+            return False
+
+        period_start, count = self._rates.get(group, (now, 0))
+
+        if now - period_start >= self._rate_period:
+            period_start, count = now, 0
+
+        if count >= self._rate_limit:
+            self.stats.rate_limited += 1
+            self._suppressed[group] = self._suppressed.get(group, 0) + 1
+            return False
+
+        self._rates[group] = (period_start, count + 1)
+        self._seen[dedupe_key] = now
+
+        if len(self._seen) > 10 * self._queue.maxsize:
+            self._seen = {key: value for key, value in self._seen.items() if now - value < self._dedupe_window}
+
+        return True
+
+    @staticmethod
+    def _fingerprint(exc_cls: type, tb: TracebackType | None) -> str:
+        """
+        Вид ошибки: класс и место возникновения (последний кадр трассировки)
+
+        :param exc_cls: класс исключения
+        :param tb: трассировка
+        :return: отпечаток
+        """
+        if tb is None:
+            return exc_cls.__qualname__
+
+        while tb.tb_next is not None:
+            tb = tb.tb_next
+
+        return f"{exc_cls.__qualname__}:{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}"
+
+    def _ensure_worker(self) -> None:
+        """Запуск фонового потока отправки при первой ошибке"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="error-reporter", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        """Цикл отправки ошибок"""
+        sink: ErrorSink | None = None
+
+        while True:
+            event: ErrorEvent = self._queue.get()
+
+            try:
+                if sink is None:
+                    sink = self._sink_factory()
+
+                sink.handler(event.exc_cls, event.exc, event.tb, event.context, event.user)
+                self.stats.sent += 1
+            except Exception as ex:
+                self.stats.failed += 1
+                logger.warning("Ошибка отправки ошибки в HAWK", extra={"exc": ex})
+            finally:
+                self._queue.task_done()
+
+
+registry.register(
+    "error_reporter",
+    lambda: ErrorReporter(
+        lambda: cast(ErrorSink, get_hawk()),
+        base_config.ERROR_REPORT_QUEUE_SIZE,
+        base_config.ERROR_REPORT_DEDUPE_WINDOW,
+        base_config.ERROR_REPORT_RATE_LIMIT,
+        base_config.ERROR_REPORT_RATE_PERIOD,
+    ),
+    lambda reporter: reporter.flush(timeout=5),
+)
+
+
+def stack_traceback(skip: int = 0) -> TracebackType:
+    """
+    Трассировка текущего стека вызовов. Нужна ошибкам, которые отправляются без возбуждения исключения:
+    у них нет собственной трассировки, и HAWK не получает место возникновения
+
+    :param skip: количество пропускаемых кадров над вызывающей функцией
+    :return: трассировка от внешнего кадра до места вызова
+    """
+    frame: FrameType | None = sys._getframe(skip + 1)  # pylint: disable=protected-access
+    tb: TracebackType | None = None
+
+    while frame is not None:
+        tb = TracebackType(tb, frame, frame.f_lasti, frame.f_lineno)
+        frame = frame.f_back
+
+    assert tb is not None
+
+    return tb
+
+
+def get_error_reporter() -> ErrorReporter:
+    """Отправщик ошибок приложения"""
+    return registry.get("error_reporter")
+
+
+def report_error(
+    exc: BaseException | None = None, context: Any = None, user: Any = None, fingerprint: str | None = None
+) -> bool:
+    """
+    Постановка ошибки в очередь отправки в HAWK. Параметры как у ErrorReporter.report
+
+    :return: ошибка поставлена в очередь
+    """
+    return get_error_reporter().report(exc, context, user, fingerprint)
@@ -4,18 +4,23 @@ __author__: str = "Старков Е.П."
 
 
 from fastapi import HTTPException, status
-from dh_base.logger import hawk
+from dh_base.error_reporting import report_error, stack_traceback
 
 
 class BaseAppException(HTTPException):
-    """Базовое исключение"""
+    """Базовое исключение. Отправляется в HAWK при создании, если REPORT = True"""
 
     STATUS_CODE: int = status.HTTP_500_INTERNAL_SERVER_ERROR
     DETAIL: str | None
+    # Отправлять исключение в HAWK. Ожидаемые ошибки клиента (например, отсутствие записи) отключают отправку
+    REPORT: bool = True
 
     def __init__(self):
-        try:
-            raise RuntimeError()
-        except RuntimeError:
-            hawk.send(RuntimeError('Http Exception'), {'code': self.STATUS_CODE, 'detail': self.DETAIL})
+        if self.REPORT:
+            # Исключение еще не возбуждено: место создания передается трассировкой текущего стека
+            report_error(
+                RuntimeError('Http Exception').with_traceback(stack_traceback(skip=1)),
+                {'code': self.STATUS_CODE, 'detail': self.DETAIL},
+                fingerprint=type(self).__qualname__,
+            )
         super().__init__(status_code=self.STATUS_CODE, detail=self.DETAIL)
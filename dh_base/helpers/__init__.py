@@ -1,2 +1,14 @@
 from .rabbit_events import RabbitEventHelper
+from .rabbit_transport import (
+    BrokerMessage,
+    BrokerConsumer,
+    BrokerDelivery,
+    BrokerTransport,
+    InMemoryBroker,
+    AioPikaTransport,
+)
+from .rabbit_consumer import RabbitConsumerRunner
+from .async_rabbit_events import AsyncRabbitEventHelper
+from .streaming import stream_response
+from .web_socket_backplane import WebSocketBackplane, InMemoryBackplane, RedisBackplane, RabbitBackplane
 from .web_socket_event import WebSocketConnectionManager, manager as web_socket_connection_manager
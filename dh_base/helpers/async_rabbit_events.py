@@ -0,0 +1,176 @@
+"""Модуль асинхронной публикации событий в RabbitMQ"""
+
+__author__: str = "Старков Е.П."
+
+import json
+import asyncio
+from typing import Any, Dict, List, Tuple, Iterable
+
+from dh_base.logger import logger
+from dh_base.resources import registry
+
+from .rabbit_transport import BrokerMessage, BrokerTransport, AioPikaTransport
+
+registry.register("rabbit.async_transport", AioPikaTransport, lambda transport: transport.close())
+
+# Сообщение в очереди на отправку и будущий результат подтверждения брокера
+_PendingMessage = Tuple[BrokerMessage, asyncio.Future | None]
+
+
+class AsyncRabbitEventHelper:
+    """
+    Асинхронный хелпер публикации событий в RabbitMQ. Не блокирует цикл событий.
+    Сообщения копятся в ограниченной очереди и отправляются пачками: пачка уходит при наборе batch_size
+    сообщений или по истечении linger секунд. При заполненной очереди publish ждет освобождения места
+    (обратное давление на вызывающий код при медленном брокере)
+    """
+
+    def __init__(
+        self,
+        queue_name: str = "main",
+        transport: BrokerTransport | None = None,
+        batch_size: int = 100,
+        linger: float = 0.005,
+        max_pending: int = 10_000,
+        publisher_confirms: bool = False,
+    ) -> None:
+        """
+        Асинхронный хелпер публикации событий
+
+        :param queue_name: название очереди. По - умолчанию: main
+        :param transport: транспорт брокера. По - умолчанию: общий AioPikaTransport из реестра ресурсов
+        :param batch_size: максимальный размер пачки
+        :param linger: время ожидания добора пачки в секундах
+        :param max_pending: максимальное количество неотправленных сообщений
+        :param publisher_confirms: ждать подтверждения брокера. При включении publish завершается только
+        после подтверждения пачки и пробрасывает ошибку публикации
+        """
+        self._queue_name: str = queue_name
+        self._transport: BrokerTransport | None = transport
+        self._batch_size: int = batch_size
+        self._linger: float = linger
+        self._publisher_confirms: bool = publisher_confirms
+        self._pending: asyncio.Queue[_PendingMessage] = asyncio.Queue(maxsize=max_pending)
+        self._sender: asyncio.Task | None = None
+
+    @property
+    def transport(self) -> BrokerTransport:
+        """Транспорт брокера"""
+        if self._transport is None:
+            transport: BrokerTransport = registry.get("rabbit.async_transport")
+            self._transport = transport
+
+        return self._transport
+
+    async def publish(self, params: Dict[str, Any] | None = None) -> None:
+        """
+        Публикация события в брокер
+
+        :param params: параметры события
+        """
+        await self.publish_many([params])
+
+    async def publish_many(self, params_list: Iterable[Dict[str, Any] | None]) -> None:
+        """
+        Публикация нескольких событий в брокер
+
+        :param params_list: параметры событий
+        """
+        await self._ensure_started()
+        futures: List[asyncio.Future] = []
+
+        for params in params_list:
+            future: asyncio.Future | None = None
+
+            if self._publisher_confirms:
+                future = asyncio.get_running_loop().create_future()
+                futures.append(future)
+
+            await self._pending.put((self._make_message(params), future))
+
+        if futures:
+            await asyncio.gather(*futures)
+
+    async def flush(self) -> None:
+        """Ожидание отправки всех накопленных сообщений"""
+        if self._sender is not None:
+            await self._pending.join()
+
+    async def close(self) -> None:
+        """Отправка накопленных сообщений и остановка фоновой отправки"""
+        await self.flush()
+
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+            self._sender = None
+
+    async def _ensure_started(self) -> None:
+        """Объявление очереди и запуск фоновой отправки при первой публикации"""
+        if self._sender is not None:
+            return
+
+        await self.transport.declare_queue(self._queue_name)
+
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self) -> None:
+        """Фоновая отправка пачек"""
+        while True:
+            batch: List[_PendingMessage] = [await self._pending.get()]
+            self._fill_batch(batch)
+
+            if len(batch) < self._batch_size and self._linger > 0:
+                await asyncio.sleep(self._linger)
+                self._fill_batch(batch)
+
+            await self._send_batch(batch)
+
+    def _fill_batch(self, batch: List[_PendingMessage]) -> None:
+        """
+        Добор пачки уже накопленными сообщениями без ожидания
+
+        :param batch: пачка
+        """
+        while len(batch) < self._batch_size and not self._pending.empty():
+            batch.append(self._pending.get_nowait())
+
+    async def _send_batch(self, batch: List[_PendingMessage]) -> None:
+        """
+        Отправка пачки и передача результата ожидающим публикациям
+
+        :param batch: пачка
+        """
+        error: BaseException | None = None
+
+        try:
+            await self.transport.publish(
+                self._queue_name, [message for message, _ in batch], confirm=self._publisher_confirms
+            )
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            error = ex
+
+            if not self._publisher_confirms:
+                logger.error(
+                    "Ошибка публикации в брокер", extra={"queue": self._queue_name, "count": len(batch), "exc": str(ex)}
+                )
+
+        for _, future in batch:
+            if future is not None and not future.done():
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+            self._pending.task_done()
+
+    @staticmethod
+    def _make_message(params: Dict[str, Any] | None) -> BrokerMessage:
+        """
+        Сообщение брокера по параметрам события
+
+        :param params: параметры события
+        :return: сообщение
+        """
+        return BrokerMessage(json.dumps(params).encode() if params else b"")
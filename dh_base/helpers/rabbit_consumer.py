@@ -0,0 +1,228 @@
+"""Модуль конкурентной обработки событий RabbitMQ"""
+
+__author__: str = "Старков Е.П."
+
+import json
+import asyncio
+import inspect
+from typing import Any, Dict, List, Callable, Awaitable
+from concurrent.futures import ThreadPoolExecutor
+
+from dh_base.logger import logger
+from dh_base.resources import registry
+
+from .rabbit_transport import BrokerMessage, BrokerConsumer, BrokerDelivery, BrokerTransport
+
+# Заголовок с количеством выполненных повторов обработки
+RETRY_COUNT_HEADER: str = "x-retry-count"
+# Заголовок с текстом последней ошибки обработки
+ERROR_HEADER: str = "x-error"
+
+
+class RabbitConsumerRunner:
+    """
+    Обработчик очереди RabbitMQ. Сообщения получаются с ограничением prefetch_count и обрабатываются
+    concurrency асинхронными задачами (или потоками для синхронного обработчика). Подтверждение - после
+    успешной обработки. Сообщение с ошибкой отправляется в очередь повторов <очередь>.retry, откуда по истечении
+    retry_delay возвращается в основную очередь, а после max_retries повторов - в очередь <очередь>.dead
+
+    Пример:
+        runner = RabbitConsumerRunner("main", handle_event, prefetch_count=50, concurrency=10)
+        await runner.run()  # до вызова runner.stop()
+    """
+
+    def __init__(
+        self,
+        queue_name: str,
+        handler: Callable[[Dict[str, Any] | None], Any],
+        transport: BrokerTransport | None = None,
+        prefetch_count: int = 10,
+        concurrency: int = 10,
+        max_retries: int = 3,
+        retry_delay: float = 5.0,
+    ) -> None:
+        """
+        Обработчик очереди RabbitMQ
+
+        :param queue_name: название очереди
+        :param handler: обработчик параметров события. Асинхронный выполняется задачами цикла событий,
+        синхронный - в пуле потоков
+        :param transport: транспорт брокера. По - умолчанию: общий AioPikaTransport из реестра ресурсов
+        :param prefetch_count: максимальное количество неподтвержденных сообщений
+        :param concurrency: количество одновременно обрабатываемых сообщений
+        :param max_retries: количество повторов обработки до отправки в очередь <очередь>.dead
+        :param retry_delay: задержка повтора в секундах
+        """
+        self._queue_name: str = queue_name
+        self._handler: Callable[[Dict[str, Any] | None], Any] = handler
+        self._transport: BrokerTransport | None = transport
+        self._prefetch_count: int = prefetch_count
+        self._concurrency: int = concurrency
+        self._max_retries: int = max_retries
+        self._retry_delay: float = retry_delay
+        self._is_async_handler: bool = inspect.iscoroutinefunction(handler)
+        self._executor: ThreadPoolExecutor | None = None
+        # Очередь не ограничена: количество полученных сообщений ограничивает prefetch_count брокера
+        self._deliveries: asyncio.Queue[BrokerDelivery | None] = asyncio.Queue()
+        self._consumer: BrokerConsumer | None = None
+        self._workers: List[asyncio.Task] = []
+        self._stopped: asyncio.Event = asyncio.Event()
+
+    @property
+    def transport(self) -> BrokerTransport:
+        """Транспорт брокера"""
+        if self._transport is None:
+            transport: BrokerTransport = registry.get("rabbit.async_transport")
+            self._transport = transport
+
+        return self._transport
+
+    @property
+    def retry_queue_name(self) -> str:
+        """Название очереди повторов"""
+        return f"{self._queue_name}.retry"
+
+    @property
+    def dead_letter_queue_name(self) -> str:
+        """Название очереди необработанных сообщений"""
+        return f"{self._queue_name}.dead"
+
+    async def run(self) -> None:
+        """Запуск обработки. Завершается после остановки через stop"""
+        await self.start()
+        await self._stopped.wait()
+
+    async def start(self) -> None:
+        """Объявление очередей и запуск задач получения и обработки сообщений"""
+        await self.transport.declare_queue(self._queue_name)
+        await self.transport.declare_queue(
+            self.retry_queue_name,
+            {
+                "x-message-ttl": int(self._retry_delay * 1000),
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": self._queue_name,
+            },
+        )
+        await self.transport.declare_queue(self.dead_letter_queue_name)
+
+        if not self._is_async_handler:
+            self._executor = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix=self._queue_name)
+
+        self._stopped.clear()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self._concurrency)]
+        self._consumer = await self.transport.consume(self._queue_name, self._prefetch_count, self._on_delivery)
+
+    async def stop(self, timeout: float | None = 30.0) -> None:
+        """
+        Плавная остановка: новые сообщения не принимаются, полученные дообрабатываются.
+        Сообщения, не обработанные за timeout, возвращаются в очередь. Подписка (канал) закрывается
+        после дообработки, чтобы подтверждения дошли до брокера
+
+        :param timeout: время ожидания дообработки в секундах
+        """
+        if self._consumer is not None:
+            await self._consumer.cancel()
+
+        for _ in self._workers:
+            self._deliveries.put_nowait(None)
+
+        if self._workers:
+            _, pending = await asyncio.wait(self._workers, timeout=timeout)
+
+            for worker in pending:
+                worker.cancel()
+
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+
+        while not self._deliveries.empty():
+            delivery: BrokerDelivery | None = self._deliveries.get_nowait()
+
+            if delivery is not None:
+                await self._settle(delivery.reject(requeue=True))
+
+        if self._consumer is not None:
+            await self._consumer.close()
+            self._consumer = None
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        self._stopped.set()
+
+    async def _on_delivery(self, delivery: BrokerDelivery) -> None:
+        """
+        Передача полученного сообщения обработчикам
+
+        :param delivery: сообщение
+        """
+        self._deliveries.put_nowait(delivery)
+
+    async def _work(self) -> None:
+        """Обработка сообщений до получения признака остановки"""
+        while True:
+            delivery: BrokerDelivery | None = await self._deliveries.get()
+
+            if delivery is None:
+                return
+
+            try:
+                await self._call_handler(delivery)
+            except asyncio.CancelledError:
+                await self._settle(delivery.reject(requeue=True))
+                raise
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                await self._handle_error(delivery, ex)
+            else:
+                await self._settle(delivery.ack())
+
+    async def _settle(self, settlement: Awaitable[Any]) -> None:
+        """
+        Подтверждение или отказ от сообщения. Ошибка (например, закрытый канал) не останавливает обработчик:
+        неподтвержденное сообщение брокер вернет в очередь
+
+        :param settlement: вызов ack или reject
+        """
+        try:
+            await settlement
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.error("Ошибка подтверждения события", extra={"queue": self._queue_name, "exc": str(ex)})
+
+    async def _call_handler(self, delivery: BrokerDelivery) -> None:
+        """
+        Вызов обработчика с параметрами события
+
+        :param delivery: сообщение
+        """
+        params: Dict[str, Any] | None = json.loads(delivery.body) if delivery.body else None
+
+        if self._is_async_handler:
+            await self._handler(params)
+        else:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._handler, params)
+
+    async def _handle_error(self, delivery: BrokerDelivery, error: Exception) -> None:
+        """
+        Отправка сообщения с ошибкой в очередь повторов или необработанных сообщений
+
+        :param delivery: сообщение
+        :param error: ошибка обработки
+        """
+        retry_count: int = int(delivery.headers.get(RETRY_COUNT_HEADER, 0))
+        is_dead: bool = retry_count >= self._max_retries
+        target_queue: str = self.dead_letter_queue_name if is_dead else self.retry_queue_name
+        logger.error(
+            "Ошибка обработки события",
+            extra={"queue": self._queue_name, "retry_count": retry_count, "target": target_queue, "exc": str(error)},
+        )
+        headers: Dict[str, Any] = {**delivery.headers, RETRY_COUNT_HEADER: retry_count + 1, ERROR_HEADER: str(error)}
+
+        try:
+            await self.transport.publish(target_queue, [BrokerMessage(delivery.body, headers)], confirm=True)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Сообщение не потеряется: брокер вернет его в основную очередь
+            await self._settle(delivery.reject(requeue=True))
+            return
+
+        await self._settle(delivery.ack())
@@ -6,12 +6,23 @@ from pika import BlockingConnection, ConnectionParameters  # type: ignore[import
 from pika.adapters.blocking_connection import BlockingChannel  # type: ignore[import-untyped]
 
 from dh_base.config import base_config
+from dh_base.resources import registry
+
+registry.register(
+    "rabbit.connection",
+    lambda: BlockingConnection(ConnectionParameters(base_config.RABBIT_MQ_HOST)),
+    lambda connection: connection.close() if connection.is_open else None,
+)
+registry.register("rabbit.channel", lambda: registry.get("rabbit.connection").channel())
 
 
 class RabbitEventHelper:
-    """Хелпер для работы с RabbitMQ"""
-    _CONNECTION: BlockingConnection = BlockingConnection(ConnectionParameters(base_config.RABBIT_MQ_HOST))
-    _CHANNEL: BlockingChannel = _CONNECTION.channel()
+    """Хелпер для работы с RabbitMQ. Подключение к брокеру открывается при создании первого хелпера"""
+
+    @property
+    def _channel(self) -> BlockingChannel:
+        """Общий канал брокера"""
+        return registry.get("rabbit.channel")
 
     def __init__(self, queue_name: str = 'main') -> None:
         """
@@ -20,7 +31,7 @@ class RabbitEventHelper:
         :param queue_name: название очереди. По - умолчанию: main
         """
         self._queue_name: str = queue_name
-        self._CHANNEL.queue_declare(self._queue_name)
+        self._channel.queue_declare(self._queue_name)
 
     def publish(self, params: Dict[str, Any] | None = None) -> None:
         """
@@ -33,7 +44,7 @@ class RabbitEventHelper:
         if params:
             body = json.dumps(params)
 
-        self._CHANNEL.basic_publish(
+        self._channel.basic_publish(
             exchange='',
             routing_key=self._queue_name,
             body=body.encode()
@@ -47,7 +58,7 @@ class RabbitEventHelper:
 
         :param callback: обработчик события
         """
-        self._CHANNEL.basic_consume(
+        self._channel.basic_consume(
             queue=self._queue_name,
             on_message_callback=callback,
             auto_ack=True
@@ -0,0 +1,394 @@
+"""Транспорты брокера сообщений для асинхронных хелперов RabbitMQ"""
+
+__author__: str = "Старков Е.П."
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Callable, Sequence, Awaitable, TYPE_CHECKING
+from dataclasses import field, dataclass
+
+from dh_base.config import base_config
+
+# Для проверки типов зависимость считается установленной: без нее транспорт не создается
+if TYPE_CHECKING:
+    import aio_pika
+    from aio_pika.pool import Pool
+else:
+    try:
+        import aio_pika
+        from aio_pika.pool import Pool
+    except ImportError:  # pragma: no cover - aio-pika является необязательной зависимостью
+        aio_pika = None
+
+
+@dataclass
+class BrokerMessage:
+    """Сообщение брокера"""
+
+    body: bytes
+    headers: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BrokerDelivery:
+    """Полученное из очереди сообщение, требующее подтверждения обработки"""
+
+    body: bytes
+    headers: Dict[str, Any]
+    _ack: Callable[[], Awaitable[Any]]
+    _reject: Callable[[bool], Awaitable[Any]]
+
+    async def ack(self) -> None:
+        """Подтверждение обработки"""
+        await self._ack()
+
+    async def reject(self, requeue: bool = False) -> None:
+        """
+        Отказ от обработки
+
+        :param requeue: вернуть сообщение в очередь
+        """
+        await self._reject(requeue)
+
+
+class BrokerConsumer(ABC):
+    """Подписка на очередь"""
+
+    @abstractmethod
+    async def cancel(self) -> None:
+        """Прекращение получения новых сообщений. Полученные сообщения можно подтверждать до close"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Освобождение подписки. Неподтвержденные сообщения брокер возвращает в очередь"""
+
+
+class BrokerTransport(ABC):
+    """Транспорт брокера сообщений"""
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Подключение к брокеру"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Отключение от брокера"""
+
+    @abstractmethod
+    async def declare_queue(self, queue_name: str, arguments: Dict[str, Any] | None = None) -> None:
+        """
+        Объявление очереди
+
+        :param queue_name: название очереди
+        :param arguments: аргументы очереди
+        """
+
+    @abstractmethod
+    async def publish(self, queue_name: str, messages: Sequence[BrokerMessage], confirm: bool = False) -> None:
+        """
+        Публикация пачки сообщений в очередь
+
+        :param queue_name: название очереди
+        :param messages: сообщения
+        :param confirm: дождаться подтверждения брокера
+        """
+
+    @abstractmethod
+    async def consume(
+        self, queue_name: str, prefetch_count: int, callback: Callable[[BrokerDelivery], Awaitable[Any]]
+    ) -> BrokerConsumer:
+        """
+        Подписка на сообщения очереди с ручным подтверждением. Неподтвержденных сообщений одновременно
+        не больше prefetch_count
+
+        :param queue_name: название очереди
+        :param prefetch_count: максимальное количество неподтвержденных сообщений
+        :param callback: обработчик полученного сообщения
+        :return: подписка
+        """
+
+
+class InMemoryBroker(BrokerTransport):
+    """Брокер в памяти процесса для тестов и локального запуска"""
+
+    def __init__(self, publish_delay: float = 0.0) -> None:
+        """
+        Брокер в памяти процесса
+
+        :param publish_delay: искусственная задержка публикации пачки в секундах (медленный брокер)
+        """
+        self.queues: Dict[str, List[BrokerMessage]] = {}
+        self.publish_calls: int = 0
+        self.is_connected: bool = False
+        self._publish_delay: float = publish_delay
+        self.queue_arguments: Dict[str, Dict[str, Any]] = {}
+        self._condition: asyncio.Condition | None = None
+
+    async def connect(self) -> None:
+        self.is_connected = True
+
+    async def close(self) -> None:
+        self.is_connected = False
+
+    async def declare_queue(self, queue_name: str, arguments: Dict[str, Any] | None = None) -> None:
+        self.queues.setdefault(queue_name, [])
+        self.queue_arguments.setdefault(queue_name, arguments or {})
+
+    async def publish(self, queue_name: str, messages: Sequence[BrokerMessage], confirm: bool = False) -> None:
+        if self._publish_delay:
+            await asyncio.sleep(self._publish_delay)
+
+        self.publish_calls += 1
+        arguments: Dict[str, Any] = self.queue_arguments.get(queue_name, {})
+
+        # Очередь с TTL и dead letter: сообщения переходят в другую очередь по истечении TTL
+        if "x-message-ttl" in arguments and "x-dead-letter-routing-key" in arguments:
+            asyncio.get_running_loop().call_later(
+                arguments["x-message-ttl"] / 1000,
+                lambda: asyncio.ensure_future(self.publish(arguments["x-dead-letter-routing-key"], messages)),
+            )
+            return
+
+        self.queues.setdefault(queue_name, []).extend(messages)
+        await self.notify()
+
+    async def consume(
+        self, queue_name: str, prefetch_count: int, callback: Callable[[BrokerDelivery], Awaitable[Any]]
+    ) -> BrokerConsumer:
+        consumer: _InMemoryConsumer = _InMemoryConsumer(self, queue_name, prefetch_count, callback)
+        consumer.start()
+
+        return consumer
+
+    def get_condition(self) -> asyncio.Condition:
+        """Условие ожидания сообщений. Создается в цикле событий при первом обращении"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        return self._condition
+
+    async def notify(self) -> None:
+        """Оповещение получателей об изменении очередей"""
+        condition: asyncio.Condition = self.get_condition()
+
+        async with condition:
+            condition.notify_all()
+
+
+class _InMemoryConsumer(BrokerConsumer):
+    """Подписка на очередь брокера в памяти процесса"""
+
+    def __init__(
+        self,
+        broker: InMemoryBroker,
+        queue_name: str,
+        prefetch_count: int,
+        callback: Callable[[BrokerDelivery], Awaitable[Any]],
+    ) -> None:
+        """
+        Подписка на очередь брокера в памяти процесса
+
+        :param broker: брокер
+        :param queue_name: название очереди
+        :param prefetch_count: максимальное количество неподтвержденных сообщений
+        :param callback: обработчик полученного сообщения
+        """
+        self._broker: InMemoryBroker = broker
+        self._queue_name: str = queue_name
+        self._prefetch_count: int = prefetch_count
+        self._callback: Callable[[BrokerDelivery], Awaitable[Any]] = callback
+        self._queue: List[BrokerMessage] = broker.queues.setdefault(queue_name, [])
+        self._unacked: List[BrokerMessage] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Запуск получения сообщений"""
+        self._task = asyncio.create_task(self._deliver())
+
+    async def cancel(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def close(self) -> None:
+        await self.cancel()
+
+        # Как при закрытии канала: неподтвержденные сообщения возвращаются в очередь
+        self._queue[:0] = self._unacked
+        self._unacked.clear()
+        await self._broker.notify()
+
+    async def _deliver(self) -> None:
+        """Передача сообщений обработчику с учетом prefetch_count"""
+        condition: asyncio.Condition = self._broker.get_condition()
+
+        while True:
+            async with condition:
+                await condition.wait_for(lambda: bool(self._queue) and len(self._unacked) < self._prefetch_count)
+                message: BrokerMessage = self._queue.pop(0)
+                self._unacked.append(message)
+
+            done: Callable[[bool, bool], Awaitable[None]] = self._settle(message)
+            await self._callback(
+                BrokerDelivery(
+                    body=message.body,
+                    headers=dict(message.headers),
+                    _ack=lambda callback=done: callback(False, False),
+                    _reject=lambda requeue, callback=done: callback(requeue, True),
+                )
+            )
+
+    def _settle(self, message: BrokerMessage) -> Callable[[bool, bool], Awaitable[None]]:
+        """
+        Функция подтверждения или отказа от сообщения
+
+        :param message: сообщение
+        :return: функция (вернуть в очередь, отправить в dead letter)
+        """
+
+        async def callback(requeue: bool, dead_letter: bool) -> None:
+            if message not in self._unacked:
+                raise RuntimeError("Сообщение уже подтверждено или подписка закрыта")
+
+            self._unacked.remove(message)
+            arguments: Dict[str, Any] = self._broker.queue_arguments.get(self._queue_name, {})
+
+            if requeue:
+                self._queue.insert(0, message)
+            elif dead_letter and "x-dead-letter-routing-key" in arguments:
+                await self._broker.publish(arguments["x-dead-letter-routing-key"], [message])
+
+            await self._broker.notify()
+
+        return callback
+
+
+class AioPikaTransport(BrokerTransport):
+    """Транспорт RabbitMQ на aio-pika с пулами каналов (с подтверждением публикаций и без)"""
+
+    def __init__(self, host: str | None = None, channel_pool_size: int = 10) -> None:
+        """
+        Транспорт RabbitMQ на aio-pika
+
+        :param host: хост брокера. По - умолчанию: RABBIT_MQ_HOST
+        :param channel_pool_size: размер каждого пула каналов
+        """
+        if aio_pika is None:
+            raise RuntimeError("Для асинхронной работы с RabbitMQ необходимо установить пакет aio-pika")
+
+        self._host: str = host or base_config.RABBIT_MQ_HOST
+        self._channel_pool_size: int = channel_pool_size
+        self._connection: Any = None
+        self._channel_pools: Dict[bool, Any] = {}
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        if self._connection is not None:
+            return
+
+        async with self._lock:
+            if self._connection is None:
+                self._connection = await aio_pika.connect_robust(host=self._host)
+
+    async def close(self) -> None:
+        if self._connection is None:
+            return
+
+        for channel_pool in self._channel_pools.values():
+            await channel_pool.close()
+
+        await self._connection.close()
+        self._connection = None
+        self._channel_pools = {}
+
+    async def declare_queue(self, queue_name: str, arguments: Dict[str, Any] | None = None) -> None:
+        async with (await self._get_channel_pool(False)).acquire() as channel:
+            await channel.declare_queue(queue_name, arguments=arguments)
+
+    async def publish(self, queue_name: str, messages: Sequence[BrokerMessage], confirm: bool = False) -> None:
+        async with (await self._get_channel_pool(confirm)).acquire() as channel:
+            # Публикации пачки отправляются без ожидания друг друга, подтверждения собираются вместе
+            await asyncio.gather(
+                *(
+                    channel.default_exchange.publish(
+                        aio_pika.Message(message.body, headers=message.headers), queue_name
+                    )
+                    for message in messages
+                )
+            )
+
+    async def consume(
+        self, queue_name: str, prefetch_count: int, callback: Callable[[BrokerDelivery], Awaitable[Any]]
+    ) -> BrokerConsumer:
+        await self.connect()
+        channel: Any = await self._connection.channel()
+
+        try:
+            await channel.set_qos(prefetch_count=prefetch_count)
+            queue: Any = await channel.get_queue(queue_name, ensure=True)
+
+            async def on_message(message: Any) -> None:
+                await callback(
+                    BrokerDelivery(
+                        body=message.body,
+                        headers=dict(message.headers or {}),
+                        _ack=message.ack,
+                        _reject=lambda requeue: message.reject(requeue=requeue),
+                    )
+                )
+
+            consumer_tag: str = await queue.consume(on_message)
+        except Exception:
+            await channel.close()
+            raise
+
+        return _AioPikaConsumer(channel, queue, consumer_tag)
+
+    async def _get_channel_pool(self, publisher_confirms: bool) -> Any:
+        """
+        Пул каналов. Создается при первом обращении
+
+        :param publisher_confirms: каналы с подтверждением публикаций
+        :return: пул каналов aio-pika
+        """
+        await self.connect()
+
+        if publisher_confirms not in self._channel_pools:
+            connection: Any = self._connection
+            self._channel_pools[publisher_confirms] = Pool(
+                lambda: connection.channel(publisher_confirms=publisher_confirms), max_size=self._channel_pool_size
+            )
+
+        return self._channel_pools[publisher_confirms]
+
+
+class _AioPikaConsumer(BrokerConsumer):
+    """Подписка на очередь RabbitMQ через aio-pika. Канал закрывается только в close"""
+
+    def __init__(self, channel: Any, queue: Any, consumer_tag: str) -> None:
+        """
+        Подписка на очередь RabbitMQ
+
+        :param channel: канал подписки
+        :param queue: очередь
+        :param consumer_tag: тег подписки
+        """
+        self._channel: Any = channel
+        self._queue: Any = queue
+        self._consumer_tag: str | None = consumer_tag
+
+    async def cancel(self) -> None:
+        if self._consumer_tag is None:
+            return
+
+        consumer_tag, self._consumer_tag = self._consumer_tag, None
+        await self._queue.cancel(consumer_tag)
+
+    async def close(self) -> None:
+        try:
+            await self.cancel()
+        finally:
+            await self._channel.close()
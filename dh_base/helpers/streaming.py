@@ -0,0 +1,87 @@
+"""Модуль потоковой выдачи списков записей"""
+
+__author__: str = "Старков Е.П."
+
+import io
+import csv
+from typing import Any, List, Literal, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from dh_base.mixins.serializer import ModelSerializer, dumps_json
+
+# Формат потоковой выдачи: JSON построчно или CSV
+T_STREAM_FORMAT = Literal["ndjson", "csv"]
+
+_MEDIA_TYPES: dict[str, str] = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def stream_response(
+    entities: AsyncIterator[Any],
+    serializer: ModelSerializer,
+    stream_format: T_STREAM_FORMAT = "ndjson",
+    filename: str | None = None,
+    batch_size: int = 500,
+) -> StreamingResponse:
+    """
+    Потоковый ответ со списком записей, например из BaseRepository.stream.
+    Записи сериализуются и отправляются пачками, весь список в памяти не собирается
+
+    Пример:
+        return stream_response(repository.stream(filters), User.serializer(), "csv", "users.csv")
+
+    :param entities: асинхронный итератор записей
+    :param serializer: сериализатор записей. В CSV выводятся только колонки, без связей
+    :param stream_format: формат: ndjson - JSON-объект на строку, csv - CSV с заголовком
+    :param filename: имя файла для скачивания
+    :param batch_size: количество записей в одной отправляемой части ответа
+    :return: потоковый ответ
+    """
+    encode = _encode_ndjson if stream_format == "ndjson" else _encode_csv
+    headers: dict[str, str] = {}
+
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    async def body() -> AsyncIterator[bytes]:
+        if stream_format == "csv":
+            yield _encode_csv_row(serializer.fields)
+
+        batch: List[Any] = []
+
+        async for entity in entities:
+            batch.append(entity)
+
+            if len(batch) >= batch_size:
+                yield encode(serializer, batch)
+                batch = []
+
+        if batch:
+            yield encode(serializer, batch)
+
+    return StreamingResponse(body(), media_type=_MEDIA_TYPES[stream_format], headers=headers)
+
+
+def _encode_ndjson(serializer: ModelSerializer, batch: List[Any]) -> bytes:
+    """Пачка записей в виде JSON-объектов, по одному на строку"""
+    return b"".join(dumps_json(item) + b"\n" for item in serializer.to_list(batch))
+
+
+def _encode_csv(serializer: ModelSerializer, batch: List[Any]) -> bytes:
+    """Пачка записей в виде строк CSV"""
+    buffer: io.StringIO = io.StringIO()
+    writer = csv.writer(buffer)
+    fields = serializer.fields
+
+    for item in serializer.to_list(batch):
+        writer.writerow(["" if item[field] is None else item[field] for field in fields])
+
+    return buffer.getvalue().encode()
+
+
+def _encode_csv_row(values: Any) -> bytes:
+    """Одна строка CSV"""
+    buffer: io.StringIO = io.StringIO()
+    csv.writer(buffer).writerow(values)
+
+    return buffer.getvalue().encode()
@@ -0,0 +1,228 @@
+"""Модуль межпроцессной доставки событий сокетов"""
+
+__author__: str = "Старков Е.П."
+
+import json
+import asyncio
+import contextlib
+from abc import ABC, abstractmethod
+from typing import Any, List, Tuple, Callable, Awaitable, TYPE_CHECKING
+
+from dh_base.config import base_config
+from dh_base.logger import logger
+
+# Для проверки типов зависимости считаются установленными: без них соответствующая шина не создается
+if TYPE_CHECKING:
+    import aio_pika
+    from redis.asyncio import Redis
+else:
+    try:
+        from redis.asyncio import Redis
+    except ImportError:  # pragma: no cover - redis является необязательной зависимостью
+        Redis = None
+
+    try:
+        import aio_pika
+    except ImportError:  # pragma: no cover - aio-pika является необязательной зависимостью
+        aio_pika = None
+
+# Обработчик события из шины: имя события, сериализованное событие, идентификатор пользователя-получателя
+T_BACKPLANE_HANDLER = Callable[[str, str, Any], Awaitable[None]]
+
+
+def encode_event(event_name: str, message: str, user_id: Any = None) -> bytes:
+    """
+    Упаковка события для шины. Сериализованное событие передается как есть, без повторного кодирования.
+    Идентификатор пользователя, не поддерживаемый JSON (например, UUID), передается строкой
+
+    :param event_name: имя события
+    :param message: сериализованное событие
+    :param user_id: идентификатор пользователя-получателя
+    :return: сообщение шины
+    """
+    return f"{json.dumps([event_name, user_id], default=str)}\n{message}".encode()
+
+
+def decode_event(raw: bytes | str) -> Tuple[str, str, Any]:
+    """
+    Распаковка события из шины
+
+    :param raw: сообщение шины
+    :return: имя события, сериализованное событие, идентификатор пользователя-получателя
+    """
+    text: str = raw.decode() if isinstance(raw, bytes) else raw
+    header, message = text.split("\n", 1)
+    event_name, user_id = json.loads(header)
+
+    return event_name, message, user_id
+
+
+class WebSocketBackplane(ABC):
+    """Шина событий сокетов между процессами. Событие, опубликованное в любом процессе, получают все процессы"""
+
+    @abstractmethod
+    async def start(self, handler: T_BACKPLANE_HANDLER) -> None:
+        """
+        Подключение к шине
+
+        :param handler: обработчик событий из шины
+        """
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Отключение от шины"""
+
+    @abstractmethod
+    async def publish(self, event_name: str, message: str, user_id: Any = None) -> None:
+        """
+        Публикация события в шину
+
+        :param event_name: имя события
+        :param message: сериализованное событие
+        :param user_id: идентификатор пользователя-получателя
+        """
+
+
+class InMemoryBackplane(WebSocketBackplane):
+    """Шина в памяти процесса. Связывает менеджеры сокетов одного процесса (тесты, один воркер)"""
+
+    def __init__(self) -> None:
+        self._handlers: List[T_BACKPLANE_HANDLER] = []
+
+    async def start(self, handler: T_BACKPLANE_HANDLER) -> None:
+        self._handlers.append(handler)
+
+    async def stop(self) -> None:
+        self._handlers = []
+
+    async def publish(self, event_name: str, message: str, user_id: Any = None) -> None:
+        await asyncio.gather(*(handler(event_name, message, user_id) for handler in self._handlers))
+
+
+class _SubscriberBackplane(WebSocketBackplane, ABC):
+    """Шина с фоновой задачей чтения сообщений"""
+
+    def __init__(self) -> None:
+        self._handler: T_BACKPLANE_HANDLER | None = None
+        self._reader: asyncio.Task | None = None
+
+    async def _dispatch(self, raw: bytes | str) -> None:
+        """
+        Передача сообщения шины обработчику. Ошибка одного сообщения не останавливает чтение
+
+        :param raw: сообщение шины
+        """
+        if self._handler is None:
+            return
+
+        try:
+            await self._handler(*decode_event(raw))
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.error("Ошибка обработки события шины сокетов", extra={"exc": str(ex)})
+
+    async def _stop_reader(self) -> None:
+        """Остановка фоновой задачи чтения"""
+        if self._reader is not None:
+            self._reader.cancel()
+
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader
+
+            self._reader = None
+
+
+class RedisBackplane(_SubscriberBackplane):
+    """Шина на Redis pub/sub (REDIS_URL), канал <REDIS_PREFIX>:web_socket"""
+
+    def __init__(self, redis_url: str | None = None, channel: str | None = None) -> None:
+        """
+        Шина на Redis pub/sub
+
+        :param redis_url: адрес Redis. По - умолчанию: REDIS_URL
+        :param channel: канал. По - умолчанию: <REDIS_PREFIX>:web_socket
+        """
+        if Redis is None:
+            raise RuntimeError("Для шины сокетов в Redis необходимо установить пакет redis")
+
+        super().__init__()
+        self._redis: Any = Redis.from_url(redis_url or base_config.REDIS_URL)
+        self._channel: str = channel or f"{base_config.REDIS_PREFIX}:web_socket"
+        self._pubsub: Any = None
+
+    async def start(self, handler: T_BACKPLANE_HANDLER) -> None:
+        self._handler = handler
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self._channel)
+        self._reader = asyncio.create_task(self._read())
+
+    async def stop(self) -> None:
+        await self._stop_reader()
+
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self._channel)
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+        await self._redis.aclose()
+
+    async def publish(self, event_name: str, message: str, user_id: Any = None) -> None:
+        await self._redis.publish(self._channel, encode_event(event_name, message, user_id))
+
+    async def _read(self) -> None:
+        """Чтение сообщений канала"""
+        async for item in self._pubsub.listen():
+            if item.get("type") == "message":
+                await self._dispatch(item["data"])
+
+
+class RabbitBackplane(_SubscriberBackplane):
+    """
+    Шина на RabbitMQ (RABBIT_MQ_HOST): fanout exchange <APP_NAME>.web_socket, каждый процесс получает события
+    через собственную временную очередь
+    """
+
+    def __init__(self, host: str | None = None, exchange_name: str | None = None) -> None:
+        """
+        Шина на RabbitMQ
+
+        :param host: хост брокера. По - умолчанию: RABBIT_MQ_HOST
+        :param exchange_name: имя exchange. По - умолчанию: <APP_NAME>.web_socket
+        """
+        if aio_pika is None:
+            raise RuntimeError("Для шины сокетов в RabbitMQ необходимо установить пакет aio-pika")
+
+        super().__init__()
+        self._host: str = host or base_config.RABBIT_MQ_HOST
+        self._exchange_name: str = exchange_name or f"{base_config.APP_NAME}.web_socket"
+        self._connection: Any = None
+        self._exchange: Any = None
+
+    async def start(self, handler: T_BACKPLANE_HANDLER) -> None:
+        self._handler = handler
+        self._connection = await aio_pika.connect_robust(host=self._host)
+        channel: Any = await self._connection.channel()
+        self._exchange = await channel.declare_exchange(self._exchange_name, aio_pika.ExchangeType.FANOUT)
+        queue: Any = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(self._exchange)
+        self._reader = asyncio.create_task(self._read(queue))
+
+    async def stop(self) -> None:
+        await self._stop_reader()
+
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+            self._exchange = None
+
+    async def publish(self, event_name: str, message: str, user_id: Any = None) -> None:
+        await self._exchange.publish(aio_pika.Message(encode_event(event_name, message, user_id)), routing_key="")
+
+    async def _read(self, queue: Any) -> None:
+        """
+        Чтение сообщений временной очереди процесса
+
+        :param queue: очередь
+        """
+        async with queue.iterator(no_ack=True) as iterator:
+            async for item in iterator:
+                await self._dispatch(item.body)
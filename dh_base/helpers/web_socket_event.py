@@ -1,55 +1,299 @@
 """Модуль менеджера работы с сокетами"""
-from typing import Dict, Any
+import json
+import asyncio
+import contextlib
+from typing import Any, Set, Dict, Literal, Iterable
 
 from fastapi import WebSocket
 
+from dh_base.logger import logger
 from dh_base.exceptions import NotConnectedSocket, ErrorEventName
 
+from .web_socket_backplane import WebSocketBackplane
+
+# Действие с медленным клиентом при переполнении его очереди: отбросить событие или отключить клиента
+T_SLOW_CONSUMER_POLICY = Literal["drop", "disconnect"]
+# Код закрытия сокета для отключенного медленного клиента: "Try Again Later"
+_SLOW_CONSUMER_CLOSE_CODE: int = 1013
+
+
+class WebSocketConnection:
+    """Подключение клиента: сокет, пользователь, области событий и очередь отправки"""
+
+    def __init__(self, socket: WebSocket, user_id: Any = None, scopes: Iterable[str] | None = None,
+                 max_queue_size: int = 100) -> None:
+        """
+        Подключение клиента
+
+        :param socket: экземпляр сокета
+        :param user_id: идентификатор пользователя
+        :param scopes: области событий (<область события> из имени события). None - все области
+        :param max_queue_size: максимальное количество неотправленных событий
+        """
+        self.socket: WebSocket = socket
+        self.user_id: Any = user_id
+        self.scopes: Set[str] | None = set(scopes) if scopes is not None else None
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped: int = 0
+        self.sender: asyncio.Task | None = None
+
 
 class WebSocketConnectionManager:
-    """Менеджер работы с сокетами"""
-    def __init__(self) -> None:
-        """Менеджер работы с сокетами"""
-        self._socket: WebSocket | None = None
+    """
+    Менеджер работы с сокетами. Хранит подключения всех клиентов с индексами по пользователю и области события.
+    Событие сериализуется один раз и раскладывается по очередям подключений, отправку выполняет отдельная
+    задача каждого подключения, поэтому медленный клиент не задерживает остальных.
+    С шиной (backplane) событие, опубликованное в любом процессе, доставляется подключениям всех процессов
+    """
+    def __init__(self, max_queue_size: int = 100, slow_consumer_policy: T_SLOW_CONSUMER_POLICY = "drop",
+                 send_timeout: float = 10.0, backplane: WebSocketBackplane | None = None) -> None:
+        """
+        Менеджер работы с сокетами
+
+        :param max_queue_size: максимальное количество неотправленных событий одного подключения
+        :param slow_consumer_policy: действие при переполнении очереди: drop - отбросить событие,
+        disconnect - отключить клиента
+        :param send_timeout: максимальное время отправки одного события в секундах, после - клиент отключается
+        :param backplane: шина событий между процессами. По - умолчанию: только подключения текущего процесса
+        """
+        self._max_queue_size: int = max_queue_size
+        self._slow_consumer_policy: T_SLOW_CONSUMER_POLICY = slow_consumer_policy
+        self._send_timeout: float = send_timeout
+        self._connections: Dict[WebSocket, WebSocketConnection] = {}
+        # Подключения пользователей по строковому представлению идентификатора: после шины UUID приходит строкой
+        self._by_user: Dict[str, Set[WebSocketConnection]] = {}
+        self._by_scope: Dict[str, Set[WebSocketConnection]] = {}
+        self._all_scopes: Set[WebSocketConnection] = set()
+        self._backplane: WebSocketBackplane | None = backplane
+        self._backplane_started: bool = False
+        self._backplane_lock: asyncio.Lock = asyncio.Lock()
+        self._closing: Set[asyncio.Task] = set()
+        self.dropped: int = 0
+
+    @property
+    def connections_count(self) -> int:
+        """Количество подключений"""
+        return len(self._connections)
+
+    async def set_backplane(self, backplane: WebSocketBackplane | None) -> None:
+        """
+        Замена шины событий между процессами
+
+        :param backplane: шина или None для работы только с подключениями текущего процесса
+        """
+        await self.stop()
+        self._backplane = backplane
+
+    async def start(self) -> None:
+        """Подключение к шине событий. Выполняется автоматически при первом подключении или публикации"""
+        if self._backplane is None or self._backplane_started:
+            return
+
+        async with self._backplane_lock:
+            # Признак выставляется только после успешного подключения: при ошибке следующий вызов повторит попытку
+            if not self._backplane_started:
+                await self._backplane.start(self._deliver)
+                self._backplane_started = True
+
+    async def stop(self) -> None:
+        """Отключение от шины событий"""
+        if self._backplane is not None and self._backplane_started:
+            self._backplane_started = False
+            await self._backplane.stop()
 
-    async def connect(self, socket: WebSocket) -> None:
+    async def connect(self, socket: WebSocket, user_id: Any = None,
+                      scopes: Iterable[str] | None = None) -> WebSocketConnection:
         """
         Подключение сокета
 
         :param socket: экземпляр сокета
+        :param user_id: идентификатор пользователя для адресных событий
+        :param scopes: области событий, на которые подписан клиент. По - умолчанию: все
+        :return: подключение
         """
-        self._socket = socket
-        await self._socket.accept()
+        await self.start()
+        await socket.accept()
+        connection: WebSocketConnection = WebSocketConnection(socket, user_id, scopes, self._max_queue_size)
+        self._connections[socket] = connection
 
-    async def disconnect(self) -> None:
-        """Отключение от сокета"""
-        if self._socket is None:
+        if user_id is not None:
+            self._by_user.setdefault(str(user_id), set()).add(connection)
+
+        if connection.scopes is None:
+            self._all_scopes.add(connection)
+        else:
+            for scope in connection.scopes:
+                self._by_scope.setdefault(scope, set()).add(connection)
+
+        connection.sender = asyncio.create_task(self._send_loop(connection))
+
+        return connection
+
+    async def disconnect(self, socket: WebSocket) -> None:
+        """
+        Отключение от сокета
+
+        :param socket: экземпляр сокета
+        """
+        connection: WebSocketConnection | None = self._connections.get(socket)
+
+        if connection is None:
             raise NotConnectedSocket()
 
-        await self._socket.close()
+        await self._close(connection)
 
-    async def publish(self, event_name: str, data: Dict[str, Any]) -> None:
+    async def publish(self, event_name: str, data: Dict[str, Any], user_id: Any = None) -> None:
         """
         Публикация события
 
         :param event_name: имя события вида - <область события>.<название>
         [<дополнительные данные>:<ИД пользователя публикации>]
         :param data: данные для события
+        :param user_id: идентификатор пользователя-получателя. По - умолчанию: все подписчики области
         """
         self._validate_name(event_name)
+        message: str = json.dumps({"event": event_name, "data": data}, ensure_ascii=False)
 
-        if self._socket is None:
-            raise NotConnectedSocket()
+        if self._backplane is None:
+            await self._deliver(event_name, message, user_id)
+            return
 
-        await self._socket.send_json({
-            'event': event_name,
-            'data': data
-        }, mode='text')
+        await self.start()
+        await self._backplane.publish(event_name, message, user_id)
 
     async def handle_message(self, message) -> None:
         """Обработчик сообщения"""
         print(message)
 
+    async def _deliver(self, event_name: str, message: str, user_id: Any = None) -> None:
+        """
+        Постановка сериализованного события в очереди подходящих подключений текущего процесса
+
+        :param event_name: имя события
+        :param message: сериализованное событие
+        :param user_id: идентификатор пользователя-получателя
+        """
+        for connection in self._recipients(self._get_scope(event_name), user_id):
+            try:
+                connection.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._on_slow_consumer(connection)
+
+    def _recipients(self, scope: str, user_id: Any = None) -> Set[WebSocketConnection]:
+        """
+        Подключения, подписанные на область события
+
+        :param scope: область события
+        :param user_id: идентификатор пользователя-получателя
+        :return: подключения
+        """
+        if user_id is not None:
+            return {
+                connection for connection in self._by_user.get(str(user_id), ())
+                if connection.scopes is None or scope in connection.scopes
+            }
+
+        return self._all_scopes | self._by_scope.get(scope, set())
+
+    def _on_slow_consumer(self, connection: WebSocketConnection) -> None:
+        """
+        Обработка переполнения очереди подключения. Не блокирует рассылку: подключение сразу удаляется
+        из индексов, а сокет закрывается в отдельной задаче
+
+        :param connection: подключение
+        """
+        if self._slow_consumer_policy == "disconnect":
+            logger.warning("Отключение медленного клиента сокета", extra={"user_id": connection.user_id})
+
+            if self._unregister(connection):
+                task: asyncio.Task = asyncio.create_task(self._close_socket(connection, _SLOW_CONSUMER_CLOSE_CODE))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+
+            return
+
+        connection.dropped += 1
+        self.dropped += 1
+
+    async def _send_loop(self, connection: WebSocketConnection) -> None:
+        """
+        Отправка событий из очереди подключения
+
+        :param connection: подключение
+        """
+        while True:
+            message: str = await connection.queue.get()
+
+            try:
+                await asyncio.wait_for(connection.socket.send_text(message), self._send_timeout)
+            except Exception:  # pylint: disable=broad-exception-caught
+                await self._close(connection, _SLOW_CONSUMER_CLOSE_CODE)
+                return
+
+    async def _close(self, connection: WebSocketConnection, code: int = 1000) -> None:
+        """
+        Удаление подключения из индексов и закрытие сокета
+
+        :param connection: подключение
+        :param code: код закрытия сокета
+        """
+        if self._unregister(connection):
+            await self._close_socket(connection, code)
+
+    def _unregister(self, connection: WebSocketConnection) -> bool:
+        """
+        Удаление подключения из индексов и остановка задачи отправки
+
+        :param connection: подключение
+        :return: True, если подключение было зарегистрировано
+        """
+        if self._connections.pop(connection.socket, None) is None:
+            return False
+
+        self._all_scopes.discard(connection)
+
+        for scope in connection.scopes or ():
+            self._discard(self._by_scope, scope, connection)
+
+        if connection.user_id is not None:
+            self._discard(self._by_user, str(connection.user_id), connection)
+
+        if connection.sender is not None and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+
+        return True
+
+    async def _close_socket(self, connection: WebSocketConnection, code: int) -> None:
+        """
+        Закрытие сокета с ограничением по времени
+
+        :param connection: подключение
+        :param code: код закрытия сокета
+        """
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(connection.socket.close(code), self._send_timeout)
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[WebSocketConnection]], key: Any, connection: WebSocketConnection) -> None:
+        """Удаление подключения из индекса"""
+        connections: Set[WebSocketConnection] | None = index.get(key)
+
+        if connections is not None:
+            connections.discard(connection)
+
+            if not connections:
+                del index[key]
+
+    @staticmethod
+    def _get_scope(name: str) -> str:
+        """
+        Область события
+
+        :param name: имя события
+        :return: часть имени до первой точки
+        """
+        return name.split(".", 1)[0]
+
     @staticmethod
     def _validate_name(name: str) -> None:
         """
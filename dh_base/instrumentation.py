@@ -0,0 +1,276 @@
+"""Инструментирование запросов к БД: время и количество строк по запросам, счетчик запросов HTTP запроса,
+лог медленных запросов"""
+
+__author__: str = "Старков Е.П."
+
+import re
+import time
+import inspect
+import functools
+from typing import Any, Dict, List, Tuple, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+
+from .config import base_config
+from .logger import logger
+from .metrics import Counter, Histogram, metrics_registry
+
+# Репозиторий и метод, из которого отправляются запросы
+_REPOSITORY_CALL: ContextVar[Tuple[str, str] | None] = ContextVar("repository_call", default=None)
+
+query_duration: Histogram = metrics_registry.histogram(
+    "db_query_duration_seconds",
+    "Время выполнения запросов к БД",
+    ("repository", "method", "operation"),
+)
+query_rows: Histogram = metrics_registry.histogram(
+    "db_query_rows",
+    "Количество строк, затронутых запросом к БД",
+    ("repository", "method", "operation"),
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000),
+)
+compiled_cache: Counter = metrics_registry.counter(
+    "db_compiled_cache_total",
+    "Обращения к кэшу компиляции запросов SQLAlchemy (hit, miss, caching_disabled, no_cache_key)",
+    ("repository", "result"),
+)
+slow_queries: Counter = metrics_registry.counter(
+    "db_slow_queries_total",
+    "Количество медленных запросов к БД",
+    ("repository", "method", "operation"),
+)
+
+_WHITESPACE_RE: re.Pattern = re.compile(r"\s+")
+_STRING_RE: re.Pattern = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE: re.Pattern = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_PARAMETER_RE: re.Pattern = re.compile(r"\$\d+|%\([^)]+\)s|%s|(?<!:):\w+|\?")
+_LIST_RE: re.Pattern = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_RE: re.Pattern = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+
+
+@dataclass
+class RequestQueryStats:
+    """Статистика запросов к БД в рамках одного HTTP запроса"""
+
+    count: int = 0
+    total_time: float = 0.0
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, statement: str, duration: float) -> None:
+        """
+        Учет запроса
+
+        :param statement: нормализованный текст запроса
+        :param duration: время выполнения в секундах
+        """
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def most_repeated(self) -> Tuple[str | None, int]:
+        """
+        Запрос, выполненный наибольшее количество раз (признак N+1)
+
+        :return: нормализованный текст и количество выполнений
+        """
+        if not self.statements:
+            return None, 0
+
+        statement: str = max(self.statements, key=self.statements.__getitem__)
+
+        return statement, self.statements[statement]
+
+
+# Статистика запросов текущего HTTP запроса
+_REQUEST_QUERY_STATS: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Нормализация текста запроса: значения и параметры заменяются на ?, списки параметров сворачиваются,
+    пробельные символы схлопываются. Одинаковые по форме запросы дают одинаковый текст
+
+    :param statement: текст запроса
+    :return: нормализованный текст
+    """
+    statement = _STRING_RE.sub("?", statement)
+    statement = _PARAMETER_RE.sub("?", statement)
+    statement = _NUMBER_RE.sub("?", statement)
+    statement = _WHITESPACE_RE.sub(" ", statement).strip()
+    statement = _LIST_RE.sub("(?)", statement)
+
+    return _VALUES_RE.sub(r"\1", statement)
+
+
+def current_repository_call() -> Tuple[str, str]:
+    """Репозиторий и метод текущего вызова или пустые строки вне репозитория"""
+    return _REPOSITORY_CALL.get() or ("", "")
+
+
+def instrument_repository_call(func: Callable) -> Callable:
+    """
+    Декоратор метода репозитория: запросы к БД внутри метода помечаются именем репозитория и метода.
+    Во вложенных вызовах сохраняется внешний метод
+
+    :param func: метод (функция, корутина или асинхронный генератор)
+    :return: обернутый метод
+    """
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def async_generator_wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            generator = func(self, *args, **kwargs)
+
+            try:
+                while True:
+                    token = _set_repository_call(self, func)
+
+                    try:
+                        item: Any = await generator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        _reset_repository_call(token)
+
+                    yield item
+            finally:
+                await generator.aclose()
+
+        return async_generator_wrapper
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def coroutine_wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            token = _set_repository_call(self, func)
+
+            try:
+                return await func(self, *args, **kwargs)
+            finally:
+                _reset_repository_call(token)
+
+        return coroutine_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        token = _set_repository_call(self, func)
+
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            _reset_repository_call(token)
+
+    return wrapper
+
+
+def _set_repository_call(repository: Any, func: Callable) -> Any:
+    """
+    Установка текущего вызова репозитория, если он еще не установлен
+
+    :param repository: репозиторий
+    :param func: метод
+    :return: токен для сброса или None
+    """
+    if _REPOSITORY_CALL.get() is not None:
+        return None
+
+    return _REPOSITORY_CALL.set((type(repository).__name__, func.__name__))
+
+
+def _reset_repository_call(token: Any) -> None:
+    """Сброс текущего вызова репозитория"""
+    if token is not None:
+        _REPOSITORY_CALL.reset(token)
+
+
+def start_request_query_stats() -> Tuple[RequestQueryStats, Any]:
+    """
+    Начало учета запросов к БД для HTTP запроса
+
+    :return: статистика и токен для завершения учета
+    """
+    stats: RequestQueryStats = RequestQueryStats()
+
+    return stats, _REQUEST_QUERY_STATS.set(stats)
+
+
+def finish_request_query_stats(token: Any) -> None:
+    """Завершение учета запросов к БД для HTTP запроса"""
+    _REQUEST_QUERY_STATS.reset(token)
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    """Запоминание времени начала запроса"""
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    """Учет времени, количества строк и медленных запросов"""
+    start_times: List[float] = conn.info.get("query_start_time") or []
+
+    if not start_times:
+        return
+
+    duration: float = time.perf_counter() - start_times.pop()
+    repository, method = current_repository_call()
+    operation: str = statement.lstrip().split(" ", 1)[0].upper()
+    labels: Dict[str, str] = {"repository": repository, "method": method, "operation": operation}
+    row_count: int = getattr(cursor, "rowcount", -1)
+    normalized: str | None = None
+
+    query_duration.observe(duration, **labels)
+
+    cache_hit: Any = getattr(context, "cache_hit", None)
+
+    if cache_hit is not None:
+        compiled_cache.inc(repository=repository, result=cache_hit.name.lower().removeprefix("cache_"))
+
+    if row_count is not None and row_count >= 0:
+        query_rows.observe(row_count, **labels)
+
+    request_stats: RequestQueryStats | None = _REQUEST_QUERY_STATS.get()
+
+    if request_stats is not None:
+        normalized = normalize_sql(statement)
+        request_stats.add(normalized, duration)
+
+    if duration >= base_config.DB_SLOW_QUERY_THRESHOLD:
+        slow_queries.inc(1, **labels)
+        logger.warning(
+            "Медленный запрос к БД",
+            extra={
+                "sql": normalized or normalize_sql(statement),
+                "duration": round(duration, 4),
+                "rows": row_count,
+                "executemany": executemany,
+                **labels,
+            },
+        )
+
+
+def _handle_error(context: Any) -> None:
+    """Сброс времени начала запроса, завершившегося ошибкой: after_cursor_execute для него не вызывается"""
+    if context.connection is None or context.execution_context is None:
+        return
+
+    start_times: List[float] = context.connection.info.get("query_start_time") or []
+
+    if start_times:
+        start_times.pop()
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """
+    Подключение учета запросов к движку БД. Для асинхронного движка передается его sync_engine
+
+    :param engine: движок
+    :return: тот же движок
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    return engine
@@ -1,17 +1,35 @@
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
 from datetime import datetime, UTC
-from typing import Dict, Any
+from typing import Dict, Any, Tuple, Literal
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
 
 from pythonjsonlogger import jsonlogger
 
 from dh_base.config import base_config
+from dh_base.metrics import metrics_registry
+from dh_base.resources import registry
 from hawkcatcher import Hawk
 
-hawk = Hawk(base_config.HAWK_TOKEN)
+registry.register("hawk", lambda: Hawk(base_config.HAWK_TOKEN))
 
 
-logger: logging.Logger = logging.getLogger()
-log_handler: logging.StreamHandler = logging.StreamHandler()
+def get_hawk() -> Hawk:
+    """Клиент HAWK. Создается при первом обращении"""
+    return registry.get("hawk")
+
+
+def __getattr__(name: str) -> Any:
+    """Ленивое получение клиента HAWK по старому имени модуля"""
+    if name == "hawk":
+        return get_hawk()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
@@ -28,7 +46,197 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
             log_record['level'] = record.levelname
 
 
-formatter: CustomJsonFormatter = CustomJsonFormatter('%(timestamp)s %(level)s %(message)s %(module)s %(funcName)s')
+# Стандартные поля LogRecord, не попадающие в JSON как дополнительные
+_RECORD_ATTRIBUTES: frozenset = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__.keys() | {"message", "asctime", "taskName"}
+)
+
+
+class FastJsonFormatter(logging.Formatter):
+    """
+    JSON форматтер с теми же полями, что и CustomJsonFormatter (timestamp, level, message, module, funcName и
+    дополнительные поля), но без разбора шаблона на каждую запись. Строка секунд метки времени кэшируется
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._cached_second: int = -1
+        self._cached_prefix: str = ""
+
+    def format_timestamp(self, created: float) -> str:
+        """
+        Метка времени записи в UTC. Часть до секунд пересчитывается только при смене секунды
+
+        :param created: время создания записи
+        :return: метка времени в формате ISO 8601
+        """
+        second: int = int(created)
+
+        if second != self._cached_second:
+            self._cached_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._cached_second = second
+
+        return f"{self._cached_prefix}.{int((created - second) * 1_000_000):06d}Z"
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record: Dict[str, Any] = {
+            "timestamp": self.format_timestamp(record.created),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "funcName": record.funcName,
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                log_record[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if record.exc_text:
+            log_record["exc_info"] = record.exc_text
+
+        return json.dumps(log_record, default=str)
+
+
+@dataclass
+class LogQueueStats:
+    """Счетчики очереди лога"""
+
+    enqueued: int = 0
+    dropped: int = 0
+    sampled_out: int = 0
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Выборка записей уровня INFO и ниже: для каждого места вызова лога (файл и строка) пропускается каждая N-я запись,
+    где N = 1 / rate. Записи уровня WARNING и выше пропускаются всегда
+    """
+
+    def __init__(self, rate: float, stats: LogQueueStats) -> None:
+        """
+        Инициализация
+
+        :param rate: доля сохраняемых записей от 0 до 1
+        :param stats: счетчики очереди лога
+        """
+        super().__init__()
+        self._every: int = max(1, round(1 / rate)) if rate > 0 else 0
+        self._stats: LogQueueStats = stats
+        self._counters: Dict[Tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self._every == 1:
+            return True
+
+        if self._every:
+            # Счетчик по месту вызова: количество ключей ограничено кодом и не растет от текста сообщений (f-строк)
+            key: Tuple[str, int] = (record.pathname, record.lineno)
+            seen: int = self._counters.get(key, 0)
+            self._counters[key] = seen + 1
+
+            if seen % self._every == 0:
+                return True
+
+        self._stats.sampled_out += 1
+
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Обработчик, кладущий записи в ограниченную очередь без ожидания. Форматирование и запись выполняются
+    в фоновом потоке QueueListener. При заполненной очереди запись отбрасывается по политике
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        full_policy: Literal["drop_new", "drop_oldest"] = "drop_new",
+        stats: LogQueueStats | None = None,
+    ) -> None:
+        """
+        Инициализация
+
+        :param log_queue: ограниченная очередь
+        :param full_policy: политика при заполненной очереди
+        :param stats: счетчики очереди лога
+        """
+        super().__init__(log_queue)
+        self._log_queue: queue.Queue = log_queue
+        self.full_policy: Literal["drop_new", "drop_oldest"] = full_policy
+        self.stats: LogQueueStats = stats or LogQueueStats()
+        self._drop_lock: threading.Lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Подготовка записи к передаче в другой поток без форматирования: аргументы подставляются
+        в сообщение сразу, так как объекты могут измениться до записи
+
+        :param record: запись
+        :return: запись для очереди
+        """
+        record.msg = record.getMessage()
+        record.args = None
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self._log_queue.put_nowait(record)
+        except queue.Full:
+            if self.full_policy == "drop_oldest":
+                with self._drop_lock:
+                    try:
+                        self._log_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+
+                    try:
+                        self._log_queue.put_nowait(record)
+                    except queue.Full:
+                        pass
+
+            self.stats.dropped += 1
+            return
+
+        self.stats.enqueued += 1
+
+
+logger: logging.Logger = logging.getLogger()
+log_handler: logging.StreamHandler = logging.StreamHandler()
+log_queue_stats: LogQueueStats = LogQueueStats()
+log_listener: QueueListener | None = None
+
+formatter: FastJsonFormatter = FastJsonFormatter()
 log_handler.setFormatter(formatter)
-logger.addHandler(log_handler)
+
+if base_config.LOG_QUEUE_SIZE > 0:
+    queue_handler: DroppingQueueHandler = DroppingQueueHandler(
+        queue.Queue(base_config.LOG_QUEUE_SIZE), base_config.LOG_QUEUE_FULL_POLICY, log_queue_stats
+    )
+    log_listener = QueueListener(queue_handler.queue, log_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    root_handler: logging.Handler = queue_handler
+else:
+    root_handler = log_handler
+
+if base_config.LOG_INFO_SAMPLE_RATE < 1:
+    root_handler.addFilter(SamplingFilter(base_config.LOG_INFO_SAMPLE_RATE, log_queue_stats))
+
+metrics_registry.counter(
+    "log_records_dropped_total",
+    "Записи лога, отброшенные при заполненной очереди",
+    callback=lambda: {(): log_queue_stats.dropped},
+)
+metrics_registry.counter(
+    "log_records_sampled_out_total",
+    "Записи лога, отброшенные выборкой",
+    callback=lambda: {(): log_queue_stats.sampled_out},
+)
+
+logger.addHandler(root_handler)
 logger.setLevel(base_config.LOG_LEVEL)
@@ -0,0 +1,351 @@
+"""Метрики приложения: счетчики, показатели и гистограммы с метками и их выгрузка в текстовом формате Prometheus"""
+
+__author__: str = "Старков Е.П."
+
+import bisect
+import threading
+from typing import Any, Dict, List, Tuple, TypeVar, Callable, Iterable, Sequence
+
+# Границы корзин гистограммы времени по умолчанию в секундах
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+T_LABEL_VALUES = Tuple[str, ...]
+T_METRIC = TypeVar("T_METRIC", bound="Metric")
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+    """
+    Метки в формате Prometheus
+
+    :param label_names: имена меток
+    :param label_values: значения меток
+    :param extra: дополнительная метка в готовом виде (le="...")
+    :return: строка меток в фигурных скобках или пустая строка
+    """
+    parts: List[str] = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(label_names, label_values)
+    ]
+
+    if extra:
+        parts.append(extra)
+
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Значение метрики в формате Prometheus"""
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Shards:
+    """
+    Набор шардов значений метрики по потокам. Каждый поток пишет только в свой шард без блокировок,
+    блокировка нужна только при создании шарда и при чтении списка шардов
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        """
+        Инициализация
+
+        :param factory: фабрика пустого шарда
+        """
+        self._factory: Callable[[], Any] = factory
+        self._local: threading.local = threading.local()
+        self._shards: List[Any] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def local(self) -> Any:
+        """Шард текущего потока"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: Any = self._factory()
+
+            with self._lock:
+                self._shards.append(shard)
+
+            self._local.shard = shard
+
+            return shard
+
+    def all(self) -> List[Any]:
+        """Все шарды"""
+        with self._lock:
+            return list(self._shards)
+
+
+class Metric:
+    """Базовая метрика с метками"""
+
+    TYPE: str = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()) -> None:
+        """
+        Инициализация метрики
+
+        :param name: имя метрики
+        :param description: описание
+        :param label_names: имена меток
+        """
+        self.name: str = name
+        self.description: str = description
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+
+    def _label_values(self, labels: Dict[str, str]) -> T_LABEL_VALUES:
+        """
+        Значения меток в порядке имен
+
+        :param labels: метки
+        :return: кортеж значений
+        """
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> Iterable[str]:
+        """Строки метрики в текстовом формате Prometheus"""
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.TYPE}"
+
+
+class Counter(Metric):
+    """
+    Монотонно растущий счетчик. Изменяется через inc или вычисляется функцией при выгрузке
+    (накопительные значения, которые считаются в другом месте, например, время ожидания пула)
+    """
+
+    TYPE: str = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        callback: Callable[[], Dict[T_LABEL_VALUES, float]] | None = None,
+    ) -> None:
+        """
+        Инициализация
+
+        :param name: имя метрики
+        :param description: описание
+        :param label_names: имена меток
+        :param callback: функция значений по меткам, вызывается при выгрузке
+        """
+        super().__init__(name, description, label_names)
+        self._shards: _Shards = _Shards(dict)
+        self._callback: Callable[[], Dict[T_LABEL_VALUES, float]] | None = callback
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Увеличение значения
+
+        :param amount: величина увеличения
+        :param labels: метки
+        """
+        key: T_LABEL_VALUES = self._label_values(labels)
+        shard: Dict[T_LABEL_VALUES, float] = self._shards.local()
+        shard[key] = shard.get(key, 0) + amount
+
+    def values(self) -> Dict[T_LABEL_VALUES, float]:
+        """Значения по меткам (сумма шардов или результат функции значений)"""
+        if self._callback is not None:
+            return self._callback()
+
+        result: Dict[T_LABEL_VALUES, float] = {}
+
+        for shard in self._shards.all():
+            for key, value in dict(shard).items():
+                result[key] = result.get(key, 0) + value
+
+        return result
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+
+        for label_values, value in self.values().items():
+            yield f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """
+    Текущее значение. Изменяется через inc/dec или вычисляется функцией при выгрузке
+    (например, состояние пула соединений)
+    """
+
+    TYPE: str = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """
+        Уменьшение значения
+
+        :param amount: величина уменьшения
+        :param labels: метки
+        """
+        self.inc(-amount, **labels)
+
+
+class HistogramValue:
+    """Состояние гистограммы для одного набора меток"""
+
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.buckets: List[int] = [0] * bucket_count
+        self.count: int = 0
+        self.sum: float = 0.0
+
+
+class Histogram(Metric):
+    """Гистограмма распределения значений по корзинам"""
+
+    TYPE: str = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """
+        Инициализация гистограммы
+
+        :param name: имя метрики
+        :param description: описание
+        :param label_names: имена меток
+        :param buckets: верхние границы корзин
+        """
+        super().__init__(name, description, label_names)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._shards: _Shards = _Shards(dict)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Учет значения
+
+        :param value: значение
+        :param labels: метки
+        """
+        key: T_LABEL_VALUES = self._label_values(labels)
+        shard: Dict[T_LABEL_VALUES, HistogramValue] = self._shards.local()
+        state: HistogramValue | None = shard.get(key)
+
+        if state is None:
+            state = shard[key] = HistogramValue(len(self.buckets) + 1)
+
+        # Последняя корзина - значения больше верхней границы (+Inf)
+        state.buckets[bisect.bisect_left(self.buckets, value)] += 1
+        state.count += 1
+        state.sum += value
+
+    def values(self) -> Dict[T_LABEL_VALUES, Tuple[List[int], int, float]]:
+        """Накопительные значения корзин, количество и сумма по меткам (сумма шардов)"""
+        merged: Dict[T_LABEL_VALUES, HistogramValue] = {}
+
+        for shard in self._shards.all():
+            for key, state in dict(shard).items():
+                total_state: HistogramValue | None = merged.get(key)
+
+                if total_state is None:
+                    total_state = merged[key] = HistogramValue(len(self.buckets) + 1)
+
+                for index, bucket_count in enumerate(state.buckets):
+                    total_state.buckets[index] += bucket_count
+
+                total_state.count += state.count
+                total_state.sum += state.sum
+
+        result: Dict[T_LABEL_VALUES, Tuple[List[int], int, float]] = {}
+
+        for key, state in merged.items():
+            cumulative: List[int] = []
+            running: int = 0
+
+            for bucket_count in state.buckets[:-1]:
+                running += bucket_count
+                cumulative.append(running)
+
+            result[key] = (cumulative, state.count, state.sum)
+
+        return result
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+
+        for label_values, (cumulative, count, total) in self.values().items():
+            for bound, bucket_count in zip(self.buckets, cumulative):
+                labels: str = _format_labels(self.label_names, label_values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {bucket_count}"
+
+            labels = _format_labels(self.label_names, label_values, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_count{_format_labels(self.label_names, label_values)} {count}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, label_values)} {_format_value(total)}"
+
+
+class MetricsRegistry:
+    """Реестр метрик приложения"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def register(self, metric: T_METRIC) -> T_METRIC:
+        """
+        Регистрация метрики. Повторная регистрация с тем же именем возвращает уже созданную метрику
+
+        :param metric: метрика
+        :return: зарегистрированная метрика
+        """
+        with self._lock:
+            registered: Metric = self._metrics.setdefault(metric.name, metric)
+
+        if not isinstance(registered, type(metric)):
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована с типом {type(registered).__name__}")
+
+        return registered
+
+    def counter(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        callback: Callable[[], Dict[T_LABEL_VALUES, float]] | None = None,
+    ) -> Counter:
+        """Регистрация счетчика"""
+        return self.register(Counter(name, description, label_names, callback))
+
+    def gauge(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        callback: Callable[[], Dict[T_LABEL_VALUES, float]] | None = None,
+    ) -> Gauge:
+        """Регистрация показателя текущего значения"""
+        return self.register(Gauge(name, description, label_names, callback))
+
+    def histogram(
+        self, name: str, description: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Регистрация гистограммы"""
+        return self.register(Histogram(name, description, label_names, buckets))
+
+    def get(self, name: str) -> Metric | None:
+        """Метрика по имени"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines: List[str] = []
+
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+# Реестр метрик приложения
+metrics_registry: MetricsRegistry = MetricsRegistry()
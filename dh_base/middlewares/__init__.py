@@ -1,2 +1,4 @@
 from .exceptions_handlers import exceptions_handler
 from .process_time_header import add_process_time_header
+from .query_counter import count_db_queries
+from .metrics import collect_metrics, metrics_router, metrics_endpoint
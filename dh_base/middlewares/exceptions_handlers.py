@@ -1,13 +1,16 @@
 from fastapi import Request
 
-from ..logger import logger, hawk
+from ..logger import logger
+from ..error_reporting import report_error
+from .metrics import exceptions_total, route_template
 
 
 async def exceptions_handler(request: Request, call_next):
-    """Обрабатывает исключения с отправкой данных в HAWK"""
+    """Обрабатывает исключения с фоновой отправкой данных в HAWK"""
     try:
         return await call_next(request)
     except Exception as ex:
-        hawk.send()
+        exceptions_total.inc(route=route_template(request), exception=type(ex).__name__)
+        report_error(ex)
         logger.error("Ошибка исполнения", extra={"exc": ex})
         raise ex
@@ -0,0 +1,64 @@
+import time
+
+from fastapi import Request, Response, APIRouter
+
+from ..metrics import Gauge, Counter, Histogram, metrics_registry
+
+request_duration: Histogram = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP запросов",
+    ("method", "route", "status"),
+)
+requests_in_flight: Gauge = metrics_registry.gauge(
+    "http_requests_in_flight",
+    "Количество HTTP запросов в обработке",
+    ("method",),
+)
+exceptions_total: Counter = metrics_registry.counter(
+    "http_exceptions_total",
+    "Количество необработанных исключений",
+    ("route", "exception"),
+)
+
+# Метка маршрута для запросов, не совпавших ни с одним маршрутом
+UNMATCHED_ROUTE: str = "unmatched"
+
+metrics_router: APIRouter = APIRouter()
+
+
+def route_template(request: Request) -> str:
+    """
+    Шаблон маршрута запроса (/items/{item_id}) вместо фактического пути, чтобы не плодить метки
+
+    :param request: запрос
+    :return: шаблон маршрута
+    """
+    route = request.scope.get("route")
+
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+async def collect_metrics(request: Request, call_next):
+    """Учитывает время обработки по шаблону маршрута и статусу и количество запросов в обработке"""
+    start_time = time.perf_counter()
+    status = 500
+    requests_in_flight.inc(method=request.method)
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        requests_in_flight.dec(method=request.method)
+        request_duration.observe(
+            time.perf_counter() - start_time,
+            method=request.method,
+            route=route_template(request),
+            status=str(status),
+        )
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    """Метрики приложения в текстовом формате Prometheus"""
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
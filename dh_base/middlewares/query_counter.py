@@ -0,0 +1,33 @@
+from fastapi import Request
+
+from ..config import base_config
+from ..logger import logger
+from ..instrumentation import start_request_query_stats, finish_request_query_stats
+
+
+async def count_db_queries(request: Request, call_next):
+    """Считает запросы к БД за HTTP запрос, пишет количество и время в заголовки, предупреждает о признаках N+1"""
+    stats, token = start_request_query_stats()
+
+    try:
+        response = await call_next(request)
+    finally:
+        finish_request_query_stats(token)
+
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Query-Time"] = str(stats.total_time)
+
+    if stats.count >= base_config.DB_QUERY_COUNT_WARNING:
+        statement, repeats = stats.most_repeated()
+        logger.warning(
+            "Много запросов к БД за один запрос",
+            extra={
+                "path": request.url.path,
+                "query_count": stats.count,
+                "query_time": round(stats.total_time, 4),
+                "most_repeated_sql": statement,
+                "most_repeated_count": repeats,
+            },
+        )
+
+    return response
@@ -3,4 +3,5 @@
 __author__: str = "Старков Е.П."
 
 
+from .serializer import ModelSerializer, dumps_json
 from .model_to_dict import ConvertToDictMixin
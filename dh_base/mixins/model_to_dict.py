@@ -3,12 +3,25 @@
 
 __author__: str = "Старков Е.П."
 
-from typing import Any
+from typing import Any, Dict
+
+from .serializer import ModelSerializer
 
 
 class ConvertToDictMixin:
     """Миксин конвертации модели в словарь. Исключает служебные поля"""
 
+    # Сериализаторы по умолчанию по классам моделей
+    _SERIALIZERS: Dict[type, ModelSerializer] = {}
+
+    @classmethod
+    def serializer(cls) -> ModelSerializer:
+        """Сериализатор всех колонок модели. Создается один раз на модель"""
+        if cls not in ConvertToDictMixin._SERIALIZERS:
+            ConvertToDictMixin._SERIALIZERS[cls] = ModelSerializer(cls)
+
+        return ConvertToDictMixin._SERIALIZERS[cls]
+
     def to_dict(self) -> dict[str, Any]:
         """Преобразовать в словарь"""
         result = {}
@@ -0,0 +1,159 @@
+"""Быстрая сериализация записей моделей"""
+
+__author__: str = "Старков Е.П."
+
+import json
+from uuid import UUID
+from decimal import Decimal
+from datetime import date, time
+from typing import Any, Dict, List, Tuple, Iterable, Callable
+
+from sqlalchemy import inspect as sa_inspect
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson является необязательной зависимостью
+    orjson = None
+
+
+class ModelSerializer:
+    """
+    Сериализатор записей модели. Набор полей определяется один раз по мапперу SQLAlchemy,
+    а функция преобразования записи в словарь компилируется под этот набор.
+    Значения читаются из загруженного состояния записи без обращения к БД: не загруженные колонки
+    дают None, не загруженные связи - None или пустой список
+
+    Пример:
+        serializer = ModelSerializer(User, exclude=["password"], nested={"roles": ModelSerializer(Role)})
+        return Response(serializer.dumps(users), media_type="application/json")
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        include: Iterable[str] | None = None,
+        exclude: Iterable[str] | None = None,
+        nested: Dict[str, "ModelSerializer"] | None = None,
+    ) -> None:
+        """
+        Сериализатор записей модели
+
+        :param model: модель
+        :param include: колонки для вывода. По - умолчанию: все колонки модели
+        :param exclude: колонки, исключаемые из вывода
+        :param nested: сериализаторы связей вида {имя связи: сериализатор}
+        """
+        mapper = sa_inspect(model)
+        excluded: set[str] = set(exclude or ())
+        columns: List[str] = [attr.key for attr in mapper.column_attrs]
+
+        if include is not None:
+            included: set[str] = set(include)
+            unknown: set[str] = included - set(columns)
+
+            if unknown:
+                raise ValueError(f"У модели {model.__name__} нет колонок: {', '.join(sorted(unknown))}")
+
+            columns = [key for key in columns if key in included]
+
+        self.model: Any = model
+        self.fields: Tuple[str, ...] = tuple(key for key in columns if key not in excluded)
+        self._nested: List[Tuple[str, bool, ModelSerializer]] = [
+            (name, mapper.relationships[name].uselist, serializer) for name, serializer in (nested or {}).items()
+        ]
+        self._serialize_columns: Callable[[Any], Dict[str, Any]] = self._compile(self.fields)
+
+    def to_dict(self, entity: Any) -> Dict[str, Any]:
+        """
+        Преобразование записи в словарь
+
+        :param entity: запись
+        :return: словарь значений полей
+        """
+        result: Dict[str, Any] = self._serialize_columns(entity)
+
+        for name, uselist, serializer in self._nested:
+            value: Any = entity.__dict__.get(name)
+
+            if uselist:
+                result[name] = serializer.to_list(value) if value is not None else []
+            else:
+                result[name] = serializer.to_dict(value) if value is not None else None
+
+        return result
+
+    def to_list(self, entities: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Преобразование списка записей в список словарей
+
+        :param entities: записи
+        :return: список словарей
+        """
+        if not self._nested:
+            serialize: Callable[[Any], Dict[str, Any]] = self._serialize_columns
+            return [serialize(entity) for entity in entities]
+
+        return [self.to_dict(entity) for entity in entities]
+
+    def dumps(self, entities: Iterable[Any]) -> bytes:
+        """
+        Сериализация списка записей в JSON
+
+        :param entities: записи
+        :return: JSON-массив в байтах
+        """
+        return dumps_json(self.to_list(entities))
+
+    def dumps_one(self, entity: Any) -> bytes:
+        """
+        Сериализация записи в JSON
+
+        :param entity: запись
+        :return: JSON-объект в байтах
+        """
+        return dumps_json(self.to_dict(entity))
+
+    @staticmethod
+    def _compile(fields: Tuple[str, ...]) -> Callable[[Any], Dict[str, Any]]:
+        """
+        Компиляция функции чтения колонок записи в словарь
+
+        :param fields: колонки
+        :return: функция вида entity -> {колонка: значение}
+        """
+        body: str = ", ".join(f"{key!r}: get({key!r})" for key in fields)
+        source: str = f"def serialize(entity):\n    get = entity.__dict__.get\n    return {{{body}}}\n"
+        namespace: Dict[str, Any] = {}
+        exec(compile(source, "<model_serializer>", "exec"), namespace)  # pylint: disable=exec-used
+
+        return namespace["serialize"]
+
+
+def dumps_json(value: Any) -> bytes:
+    """
+    Сериализация в JSON: orjson при наличии, иначе стандартный json
+
+    :param value: значение
+    :return: JSON в байтах
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(value, default=_json_default, ensure_ascii=False).encode()
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Преобразование значений, не поддерживаемых JSON. Одинаково для orjson и стандартного json:
+    даты и время - в ISO 8601, Decimal и UUID - в строку
+
+    :param value: значение
+    :return: значение, поддерживаемое JSON
+    """
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+
+    raise TypeError(f"Объект типа {type(value).__name__} не сериализуется в JSON")
@@ -2,5 +2,13 @@
 
 __author__: str = "Старков Е.П."
 
+from .cache import CacheStats, EntityCache
 from .common import BaseRepository
-from .exceptions import EntityNotFount
+from .counting import ListResult
+from .loading import LoadProfile
+from .filters import FilterSpec, filter_indexes, render_alembic_indexes
+from .reaper import SoftDeleteReaper, soft_delete_models
+from .statements import StatementCacheStats, statement_cache_stats
+from .sync import SyncRepository
+from .unit_of_work import UnitOfWork
+from .exceptions import EntityNotFount, InvalidCursor, InvalidFilter
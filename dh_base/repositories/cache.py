@@ -0,0 +1,404 @@
+"""Кэш записей репозитория"""
+
+__author__: str = "Старков Е.П."
+
+import json
+import time
+import base64
+from uuid import UUID
+from typing import Any, Dict, List, Tuple, Callable, Iterable, TYPE_CHECKING
+from decimal import Decimal
+from datetime import date, time as datetime_time, datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import DeclarativeMeta, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..consts import TimeInSeconds
+from ..config import base_config
+from ..logger import logger
+
+# Для проверки типов зависимость считается установленной: без нее Redis в кэше не используется
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+else:
+    try:
+        from redis.asyncio import Redis
+    except ImportError:  # pragma: no cover - redis является необязательной зависимостью
+        Redis = None
+
+# Метка отсутствующей записи для негативного кэша
+_MISSING: str = "__missing__"
+# Ключ типа значения в JSON кэша Redis
+_TYPE_KEY: str = "__dh_type__"
+
+# Кодирование значений колонок, которых нет в JSON: тип -> (имя, преобразование в строку или число)
+_ENCODERS: Tuple[Tuple[type, str, Callable[[Any], Any]], ...] = (
+    (datetime, "datetime", lambda value: value.isoformat()),
+    (date, "date", lambda value: value.isoformat()),
+    (datetime_time, "time", lambda value: value.isoformat()),
+    (timedelta, "timedelta", lambda value: value.total_seconds()),
+    (UUID, "uuid", str),
+    (Decimal, "decimal", str),
+    (bytes, "bytes", lambda value: base64.b64encode(value).decode()),
+)
+_DECODERS: Dict[str, Callable[[Any], Any]] = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": datetime_time.fromisoformat,
+    "timedelta": lambda value: timedelta(seconds=value),
+    "uuid": UUID,
+    "decimal": Decimal,
+    "bytes": base64.b64decode,
+}
+
+
+def _json_default(value: Any) -> Dict[str, Any]:
+    """
+    Кодирование значения, которого нет в JSON, с указанием типа
+
+    :param value: значение
+    :return: объект с типом и значением
+    """
+    for value_type, name, encode in _ENCODERS:
+        if isinstance(value, value_type):
+            return {_TYPE_KEY: name, "value": encode(value)}
+
+    raise TypeError(f"Значение типа {type(value).__name__} не сохраняется в кэш Redis")
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    """
+    Восстановление значения по объекту с типом
+
+    :param obj: объект JSON
+    :return: значение
+    """
+    if _TYPE_KEY in obj and len(obj) == 2:
+        return _DECODERS[obj[_TYPE_KEY]](obj["value"])
+
+    return obj
+
+
+def dump_cache_value(value: Any) -> bytes:
+    """
+    Сериализация значения кэша для Redis: JSON с типами datetime, date, time, timedelta, UUID, Decimal и bytes.
+    Данные из Redis не исполняются при чтении (в отличие от pickle)
+
+    :param value: значение
+    :return: байты
+    """
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def load_cache_value(raw: bytes) -> Any:
+    """
+    Десериализация значения кэша из Redis
+
+    :param raw: байты
+    :return: значение
+    """
+    return json.loads(raw, object_hook=_json_object_hook)
+
+
+@dataclass
+class CacheStats:
+    """Счетчики кэша"""
+
+    hits: int = 0
+    misses: int = 0
+    negative_hits: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий в кэш (включая негативные)"""
+        total: int = self.hits + self.negative_hits + self.misses
+
+        return (self.hits + self.negative_hits) / total if total else 0.0
+
+
+class LRUCache:
+    """Вытесняющий кэш в памяти процесса с ограничением времени жизни записей"""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """
+        Вытесняющий кэш в памяти процесса
+
+        :param max_size: максимальное количество записей
+        :param ttl: время жизни записи в секундах
+        """
+        self._max_size: int = max_size
+        self._ttl: float = ttl
+        self._data: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self.evictions: int = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Получение значения
+
+        :param key: ключ
+        :return: признак наличия значения и значение
+        """
+        item: Tuple[float, Any] | None = self._data.get(key)
+
+        if item is None:
+            return False, None
+
+        expires_at, value = item
+
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return False, None
+
+        self._data.move_to_end(key)
+
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """
+        Сохранение значения
+
+        :param key: ключ
+        :param value: значение
+        :param ttl: время жизни в секундах. По - умолчанию: время жизни кэша
+        """
+        self._data[key] = (time.monotonic() + (self._ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """
+        Удаление значения
+
+        :param key: ключ
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистка кэша"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class EntityCache:
+    """
+    Кэш записей репозитория по идентификатору. Первый уровень - LRU в памяти процесса, второй (необязательный) -
+    Redis с ключами вида <REDIS_PREFIX>:entity:<таблица>:<id>.
+    Хранятся значения колонок, при чтении собирается новый отсоединенный экземпляр модели, поэтому
+    связи у записей из кэша не загружены. В Redis значения хранятся в JSON с типами (dump_cache_value),
+    записи с колонками других типов хранятся только в памяти процесса
+    """
+
+    def __init__(
+        self,
+        ttl: float = TimeInSeconds.minute,
+        max_size: int = 1024,
+        negative_ttl: float | None = None,
+        use_redis: bool = False,
+    ) -> None:
+        """
+        Кэш записей репозитория
+
+        :param ttl: время жизни записи в секундах
+        :param max_size: максимальное количество записей в памяти процесса
+        :param negative_ttl: время жизни отметки об отсутствии записи. None - негативный кэш выключен
+        :param use_redis: использовать Redis (REDIS_URL) как второй уровень кэша
+        """
+        if use_redis and Redis is None:
+            raise RuntimeError("Для кэша в Redis необходимо установить пакет redis")
+
+        self._ttl: float = ttl
+        self._negative_ttl: float | None = negative_ttl
+        self._local: LRUCache = LRUCache(max_size, ttl)
+        self._use_redis: bool = use_redis
+        self._redis: Any = None
+        self._stats: CacheStats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Счетчики кэша"""
+        self._stats.evictions = self._local.evictions
+
+        return self._stats
+
+    async def get(self, model: Any, entity_id: Any) -> Tuple[bool, DeclarativeMeta | None]:
+        """
+        Получение записи из кэша
+
+        :param model: модель
+        :param entity_id: идентификатор записи
+        :return: признак попадания в кэш и запись (None при попадании в негативный кэш)
+        """
+        found, value = await self._get_value(self._entity_key(model, entity_id))
+
+        if not found:
+            self._stats.misses += 1
+            return False, None
+
+        if value == _MISSING:
+            self._stats.negative_hits += 1
+            return True, None
+
+        self._stats.hits += 1
+
+        return True, self._build_entity(model, value)
+
+    async def set(self, model: Any, entity_id: Any, entity: DeclarativeMeta | None) -> None:
+        """
+        Сохранение записи в кэш. Отсутствующая запись сохраняется только при включенном негативном кэше
+
+        :param model: модель
+        :param entity_id: идентификатор записи
+        :param entity: запись или None
+        """
+        if entity is None:
+            if self._negative_ttl is not None:
+                await self._set_value(self._entity_key(model, entity_id), _MISSING, self._negative_ttl)
+            return
+
+        await self._set_value(self._entity_key(model, entity_id), self._entity_values(model, entity), self._ttl)
+
+    async def get_id(self, model: Any, filter_by: Dict[str, Any]) -> Any:
+        """
+        Получение идентификатора записи, найденной ранее по фильтрам
+
+        :param model: модель
+        :param filter_by: фильтры
+        :return: идентификатор записи или None
+        """
+        found, value = await self._get_value(self._lookup_key(model, filter_by))
+
+        return value if found else None
+
+    async def set_id(self, model: Any, filter_by: Dict[str, Any], entity: Any) -> None:
+        """
+        Сохранение идентификатора записи, найденной по фильтрам, вместе с самой записью
+
+        :param model: модель
+        :param filter_by: фильтры
+        :param entity: запись
+        """
+        await self._set_value(self._lookup_key(model, filter_by), entity.id, self._ttl)
+        await self.set(model, entity.id, entity)
+
+    async def invalidate(self, model: Any, entity_ids: Iterable[Any]) -> None:
+        """
+        Удаление записей из кэша
+
+        :param model: модель
+        :param entity_ids: идентификаторы записей
+        """
+        keys: List[str] = [self._entity_key(model, entity_id) for entity_id in entity_ids]
+
+        for key in keys:
+            self._local.delete(key)
+
+        self._stats.invalidations += len(keys)
+
+        if self._use_redis and keys:
+            try:
+                await self._get_redis().delete(*keys)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                logger.warning("Ошибка сброса кэша в Redis", extra={"exc": str(ex)})
+
+    def clear(self) -> None:
+        """Очистка кэша в памяти процесса"""
+        self._local.clear()
+
+    async def _get_value(self, key: str) -> Tuple[bool, Any]:
+        """
+        Получение значения из уровней кэша по порядку. Значение из Redis сохраняется в память процесса
+
+        :param key: ключ
+        :return: признак наличия значения и значение
+        """
+        found, value = self._local.get(key)
+
+        if found or not self._use_redis:
+            return found, value
+
+        try:
+            raw: bytes | None = await self._get_redis().get(key)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.warning("Ошибка чтения кэша из Redis", extra={"exc": str(ex)})
+            return False, None
+
+        if raw is None:
+            return False, None
+
+        try:
+            value = load_cache_value(raw)
+        except (ValueError, KeyError, TypeError) as ex:
+            logger.warning("Некорректное значение кэша в Redis", extra={"key": key, "exc": str(ex)})
+            return False, None
+
+        self._local.set(key, value, self._negative_ttl if value == _MISSING else None)
+
+        return True, value
+
+    async def _set_value(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Сохранение значения во все уровни кэша
+
+        :param key: ключ
+        :param value: значение
+        :param ttl: время жизни в секундах
+        """
+        self._local.set(key, value, ttl)
+
+        if not self._use_redis:
+            return
+
+        try:
+            await self._get_redis().set(key, dump_cache_value(value), ex=max(int(ttl), 1))
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.warning("Ошибка записи кэша в Redis", extra={"exc": str(ex)})
+
+    def _get_redis(self) -> Any:
+        """Клиент Redis, создается при первом обращении"""
+        if self._redis is None:
+            self._redis = Redis.from_url(base_config.REDIS_URL)
+
+        return self._redis
+
+    @staticmethod
+    def _entity_key(model: Any, entity_id: Any) -> str:
+        """Ключ записи"""
+        return f"{base_config.REDIS_PREFIX}:entity:{model.__tablename__}:{entity_id}"
+
+    @staticmethod
+    def _lookup_key(model: Any, filter_by: Dict[str, Any]) -> str:
+        """Ключ поиска записи по фильтрам"""
+        filters: str = ",".join(f"{key}={value!r}" for key, value in sorted(filter_by.items()))
+
+        return f"{base_config.REDIS_PREFIX}:lookup:{model.__tablename__}:{filters}"
+
+    @staticmethod
+    def _entity_values(model: Any, entity: DeclarativeMeta) -> Dict[str, Any]:
+        """Значения загруженных колонок записи"""
+        return {
+            attr.key: entity.__dict__[attr.key]
+            for attr in sa_inspect(model).column_attrs
+            if attr.key in entity.__dict__
+        }
+
+    @staticmethod
+    def _build_entity(model: Any, entity_values: Dict[str, Any]) -> DeclarativeMeta:
+        """Сборка отсоединенного экземпляра модели по значениям колонок"""
+        entity: DeclarativeMeta = sa_inspect(model).class_manager.new_instance()
+
+        for key, value in entity_values.items():
+            set_committed_value(entity, key, value)
+
+        make_transient_to_detached(entity)
+
+        return entity
@@ -2,15 +2,45 @@
 """Модуль базового репозитория"""
 from abc import ABC, abstractmethod
 from uuid import uuid4
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple, Iterable, Iterator, Sequence, AsyncIterator
 from datetime import datetime
 
-from sqlalchemy import Delete, Insert, Select, Update, delete, select
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy import (
+    ARRAY,
+    Delete,
+    Insert,
+    Select,
+    Update,
+    any_,
+    cast,
+    func,
+    null,
+    column,
+    delete,
+    insert,
+    select,
+    update,
+    tuple_,
+    values,
+    literal,
+    bindparam,
+    literal_column,
+)
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.orm import DeclarativeMeta
-
-from ..database import sync_session_maker, async_session_maker
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..instrumentation import instrument_repository_call
+from .cache import EntityCache
+from .counting import T_COUNT_MODE, ListResult, count_cache, exact_count, count_cache_key, estimated_count
+from .loading import LoadProfile
+from .filters import FilterSpec, has_filters, apply_filters
+from .statements import StatementCache, get_statement_cache
+from .sync import SyncRepository
+from .cursor import T_CURSOR_DIRECTION, decode_cursor, encode_cursor
 from .exceptions import EntityNotFount
+from .unit_of_work import UnitOfWork, session_scope
 from ..schemas import NavigationSchema
 
 
@@ -19,6 +49,16 @@ class BaseRepository(ABC):
 
     _DESC: bool = True
     _SEARCH_FIELD: str | None = None
+    # Декларативные фильтры списка: FilterSpec("name", "prefix"), FilterSpec("date_create", "range") и т.д.
+    _FILTERS: Sequence[FilterSpec] = ()
+    # Размер пачки записей для массовых операций
+    _BULK_CHUNK_SIZE: int = 1000
+    # Кэш записей для get и find_one_or_none. По - умолчанию выключен
+    _CACHE: EntityCache | None = None
+    # Время жизни кэша количества записей списка в секундах
+    _COUNT_CACHE_TTL: float = 5
+    # Профили загрузки колонок и связей: list - для list и stream, detail - для get, остальные выбираются явно
+    _LOAD_PROFILES: Dict[str, LoadProfile] = {}
 
     @property
     @abstractmethod
@@ -30,146 +70,340 @@ class BaseRepository(ABC):
     def ordering_field_name(self) -> str:
         """Поле для сортировки"""
 
-    async def get(self, entity_id: int) -> DeclarativeMeta | None:
+    @instrument_repository_call
+    async def get(self, entity_id: int, profile: str | None = "detail") -> DeclarativeMeta | None:
         """
-        Получение записи по идентификатору
+        Получение записи по идентификатору. Кэш записей используется только без профиля загрузки
 
         :param entity_id: идентификатор записи
+        :param profile: профиль загрузки из _LOAD_PROFILES (по - умолчанию detail, если объявлен), None - без профиля
         :return: запись или None
         """
-        async with async_session_maker() as async_session:
-            query: Select = select(self.model).where(self.model.id == entity_id)
-            result = await async_session.execute(query)
+        load_profile: LoadProfile | None = self._load_profile(profile)
+        cache: EntityCache | None = self._read_cache() if load_profile is None else None
+
+        if cache is not None:
+            found, entity = await cache.get(self.model, entity_id)
+
+            if found:
+                if entity:
+                    self._after_read(entity)
+
+                return entity
+
+        async with session_scope(read_only=True) as async_session:
+            query, param_name = self._statements.by_id(load_profile, self._load_options(load_profile))
+            result = await async_session.execute(query, {param_name: entity_id})
 
-            entity: DeclarativeMeta | None = result.scalar()
+            entity = result.unique().scalar()
 
-            if entity:
-                self._after_read(entity)
+        if cache is not None:
+            await cache.set(self.model, entity_id, entity)
+
+        if entity:
+            self._after_read(entity)
 
         return entity
 
-    async def get_with_check(self, entity_id: int) -> DeclarativeMeta:
+    @instrument_repository_call
+    async def get_with_check(self, entity_id: int, profile: str | None = "detail") -> DeclarativeMeta:
         """
         Получение записи по идентификатору с проверкой существования
 
         :param entity_id: идентификатор записи
+        :param profile: профиль загрузки из _LOAD_PROFILES (по - умолчанию detail, если объявлен), None - без профиля
         :return: запись
         """
-        entity: DeclarativeMeta | None = await self.get(entity_id)
+        entity: DeclarativeMeta | None = await self.get(entity_id, profile)
 
         if not entity:
             raise EntityNotFount()
 
         return entity
 
-    def sync_create(self, payload):
-        with sync_session_maker() as async_session:
-            with async_session.begin():
-                new_entity: DeclarativeMeta = self.model()
+    @property
+    def sync(self) -> SyncRepository:
+        """Синхронный фасад репозитория поверх общего асинхронного движка"""
+        return SyncRepository(self)
+
+    @instrument_repository_call
+    def sync_create(self, payload: Dict[str, Any]) -> DeclarativeMeta:
+        """Синхронное создание записи по данным (через асинхронный движок)"""
+        return self.sync.create(payload)
 
-                for key in payload:
-                    if hasattr(new_entity, key):
-                        setattr(new_entity, key, payload[key])
+    @instrument_repository_call
+    async def create(self, payload: Dict[str, Any]) -> DeclarativeMeta:
+        """Создание записи по данным"""
+        async with session_scope() as async_session:
+            new_entity: DeclarativeMeta = self._make_entity(payload)
+            async_session.add(new_entity)
 
-                self._fill_main_fields(new_entity)
-                self._before_create(new_entity)
-                async_session.add(new_entity)
+        await self._invalidate_cache([new_entity.id])
+        self._after_create(new_entity)
 
-            async_session.commit()
-            self._after_create(new_entity)
+        return new_entity
 
-            return new_entity
+    @instrument_repository_call
+    async def list(
+        self,
+        filters: Dict[str, Any],
+        navigation: NavigationSchema | None = None,
+        count_mode: T_COUNT_MODE | None = None,
+        profile: str | None = "list",
+    ) -> List[DeclarativeMeta] | ListResult[DeclarativeMeta]:
+        """
+        Список сущностей с применением фильтрации и навигации.
+        При навигации запрашивается на одну запись больше размера страницы для вычисления has_more.
+        В режиме навигации cursor выборка идет по ключу (поле сортировки + id), а в навигацию
+        записываются курсоры соседних страниц.
+        При переданном режиме подсчета возвращается ListResult с общим количеством записей: exact - точное
+        (оконной функцией в том же запросе), estimated - оценка по статистике или плану запроса, none - без подсчета.
+        Количество для одинаковых фильтров кэшируется на _COUNT_CACHE_TTL секунд.
+        Профиль загрузки задает колонки и связи, загружаемые для страницы фиксированным числом запросов
 
-    async def create(self, payload: Dict[str, Any]) -> DeclarativeMeta:
-        """Создание записи по данным"""
-        try:
-            async with async_session_maker() as async_session:
-                async with async_session.begin():
-                    new_entity: DeclarativeMeta = self.model()
+        :param filters: фильтра
+        :param navigation: навигация
+        :param count_mode: режим подсчета общего количества записей
+        :param profile: профиль загрузки из _LOAD_PROFILES (по - умолчанию list, если объявлен), None - без профиля
+        :return: список записей или ListResult
+        """
+        direction: T_CURSOR_DIRECTION = "next"
+        params: Dict[str, Any] = {}
+        load_profile: LoadProfile | None = self._load_profile(profile)
+        load_options: List[Any] = self._load_options(load_profile)
+
+        if navigation and navigation.mode != "cursor" and count_mode in (None, "none") and self._is_plain_list(filters):
+            # Страница без фильтров - готовый шаблон запроса с параметрами limit и offset
+            filtered_query: Select = self._statements.list_page(
+                (self.ordering_field_name, self._DESC), self._list_ordering, load_profile, load_options
+            )
+            query: Select = filtered_query
+            params = {"limit": navigation.size + 1, "offset": navigation.page * navigation.size}
+        else:
+            filtered_query = await self._filter_list_query(select(self.model), filters)
+            query = filtered_query.options(*load_options)
+
+            if navigation:
+                query = query.limit(navigation.size + 1)
+
+                if navigation.mode == "cursor":
+                    if navigation.cursor:
+                        value, entity_id, direction = decode_cursor(navigation.cursor)
+                        query = query.where(self._keyset_condition(value, entity_id, direction))
+                else:
+                    query = query.offset(navigation.page * navigation.size)
 
-                    for key in payload:
-                        if hasattr(new_entity, key):
-                            setattr(new_entity, key, payload[key])
+            query = query.order_by(*self._list_ordering(reverse=direction == "prev"))
 
-                    self._fill_main_fields(new_entity)
-                    self._before_create(new_entity)
-                    async_session.add(new_entity)
+        total: int | None = None
+        cache_key: str | None = None
 
-                await async_session.commit()
-                self._after_create(new_entity)
+        if count_mode in ("exact", "estimated"):
+            cache_key = count_cache_key(filtered_query, count_mode)
+            _, total = count_cache.get(cache_key)
 
-                return new_entity
-        except InvalidRequestError:
-            await async_session.rollback()
-            raise
+        # Оконная функция считает строки до LIMIT/OFFSET, но после условия курсора, поэтому только для offset
+        count_in_query: bool = (
+            count_mode == "exact" and total is None and (navigation is None or navigation.mode != "cursor")
+        )
 
-    async def list(
-        self, filters: Dict[str, Any], navigation: NavigationSchema | None = None
-    ) -> List[DeclarativeMeta]:
+        if count_in_query:
+            query = query.add_columns(func.count().over().label("total_count"))
+
+        async with session_scope(read_only=True) as async_session:
+            temp_result = await async_session.execute(query, params)
+
+            if count_in_query:
+                rows = temp_result.unique().all()
+                result = [row[0] for row in rows]
+
+                if rows or not navigation or navigation.page == 0:
+                    total = rows[0][1] if rows else 0
+            else:
+                result = list(temp_result.unique().scalars().all())
+
+            if cache_key is not None and total is None:
+                if count_mode == "exact":
+                    total = await exact_count(async_session, filtered_query)
+                else:
+                    total = await estimated_count(async_session, self.model, filtered_query)
+
+            if navigation:
+                result = self._fill_navigation(result, navigation, direction)
+
+            self._after_list(result, filters, navigation)
+
+        if count_mode is None:
+            return result
+
+        if cache_key is not None:
+            count_cache.set(cache_key, total, self._COUNT_CACHE_TTL)
+
+        return ListResult(items=result, total=total)
+
+    @instrument_repository_call
+    async def stream(
+        self, filters: Dict[str, Any], chunk_size: int = 1000, profile: str | None = "list"
+    ) -> AsyncIterator[DeclarativeMeta]:
         """
-        Список сущностей с применением фильтрации и навигации
+        Потоковое получение списка записей с фильтрацией. Записи читаются серверным курсором пачками по chunk_size,
+        поэтому память не зависит от размера выборки. Для пачки вызывается обработчик _after_list.
+        Загрузка joinedload с потоковым чтением несовместима, поэтому связи joined профиля загружаются
+        так же, как selectin: отдельным запросом на каждую пачку
 
         :param filters: фильтра
-        :param navigation: навигация
-        :return: список записей
+        :param chunk_size: размер пачки
+        :param profile: профиль загрузки из _LOAD_PROFILES (по - умолчанию list, если объявлен), None - без профиля
+        :return: асинхронный итератор записей
         """
-        query: Select = select(self.model)
+        load_profile: LoadProfile | None = self._load_profile(profile)
+        query: Select = await self._filter_list_query(select(self.model), filters)
+        query = (
+            query.options(*self._load_options(load_profile.without_joined() if load_profile else None))
+            .order_by(*self._list_ordering())
+            .execution_options(yield_per=chunk_size)
+        )
+
+        async with session_scope(read_only=True) as async_session:
+            result = await async_session.stream(query)
 
-        if navigation:
-            page_size: int = navigation.size
-            offset: int = navigation.page * page_size
-            query = query.limit(page_size).offset(offset)
+            async for partition in result.scalars().partitions():
+                entities: List[DeclarativeMeta] = list(partition)
+                self._after_list(entities, filters, None)
 
+                for entity in entities:
+                    yield entity
+
+    async def _filter_list_query(self, query: Select, filters: Dict[str, Any]) -> Select:
+        """
+        Применение фильтров списка: поиск по _SEARCH_FIELD, декларативные фильтры _FILTERS и фильтры _before_list
+
+        :param query: запрос
+        :param filters: фильтра
+        :return: запрос с фильтрами
+        """
         if filters and filters.get("search_str") and self._SEARCH_FIELD:
             query = query.where(getattr(self.model, self._SEARCH_FIELD).ilike(f'%{filters.get("search_str")}%'))
 
-        query = await self._before_list(query, filters)
+        query = apply_filters(query, self.model, self._FILTERS, filters)
+
+        return await self._before_list(query, filters)
+
+    def _is_plain_list(self, filters: Dict[str, Any]) -> bool:
+        """
+        Признак списка без фильтров: нет поиска, декларативных фильтров и _before_list не переопределен
+
+        :param filters: фильтра
+        :return: можно использовать шаблон запроса страницы
+        """
+        if filters and filters.get("search_str") and self._SEARCH_FIELD or has_filters(self._FILTERS, filters):
+            return False
 
+        return getattr(type(self), "_before_list") is BaseRepository._before_list
+
+    def _list_ordering(self, reverse: bool = False) -> List[Any]:
+        """
+        Сортировка списка: поле сортировки и id для однозначного порядка
+
+        :param reverse: обратный порядок (для навигации на предыдущую страницу)
+        :return: выражения сортировки
+        """
+        descending: bool = self._DESC != reverse
         sort_field = getattr(self.model, self.ordering_field_name)
-        query = query.order_by(sort_field.desc() if self._DESC else sort_field.asc())
-        async with async_session_maker() as async_session:
-            temp_result = await async_session.execute(query)
 
-            if not temp_result:
-                return []
+        if self.ordering_field_name == "id":
+            return [sort_field.desc() if descending else sort_field.asc()]
 
-            result = list(temp_result.unique().scalars().all())
-            self._after_list(result, filters, navigation)
+        return [
+            sort_field.desc() if descending else sort_field.asc(),
+            self.model.id.desc() if descending else self.model.id.asc(),
+        ]
+
+    def _keyset_condition(self, value: Any, entity_id: int, direction: T_CURSOR_DIRECTION) -> Any:
+        """
+        Условие выборки записей после позиции курсора
+
+        :param value: значение поля сортировки в курсоре
+        :param entity_id: идентификатор записи в курсоре
+        :param direction: направление навигации
+        :return: условие для where
+        """
+        descending: bool = self._DESC != (direction == "prev")
+
+        if self.ordering_field_name == "id":
+            return self.model.id < entity_id if descending else self.model.id > entity_id
+
+        key = tuple_(getattr(self.model, self.ordering_field_name), self.model.id)
+
+        cursor_key = tuple_(literal(value), literal(entity_id))
+
+        return key < cursor_key if descending else key > cursor_key
+
+    def _fill_navigation(
+        self, result: List[DeclarativeMeta], navigation: NavigationSchema, direction: T_CURSOR_DIRECTION
+    ) -> List[DeclarativeMeta]:
+        """
+        Обрезка лишней записи и заполнение признака наличия записей и курсоров в навигации
+
+        :param result: записи страницы с одной лишней записью
+        :param navigation: навигация
+        :param direction: направление навигации
+        :return: записи страницы
+        """
+        has_extra: bool = len(result) > navigation.size
+        result = result[:navigation.size]
+
+        if navigation.mode != "cursor":
+            navigation.has_more = has_extra
+            return result
+
+        if direction == "prev":
+            result.reverse()
+            navigation.has_more = bool(result)
+            has_prev: bool = has_extra
+        else:
+            navigation.has_more = has_extra
+            has_prev = bool(navigation.cursor) and bool(result)
+
+        navigation.next_cursor = self._entity_cursor(result[-1], "next") if navigation.has_more else None
+        navigation.prev_cursor = self._entity_cursor(result[0], "prev") if has_prev else None
 
         return result
 
+    def _entity_cursor(self, entity: DeclarativeMeta, direction: T_CURSOR_DIRECTION) -> str:
+        """
+        Курсор на позицию записи
+
+        :param entity: запись
+        :param direction: направление навигации от записи
+        :return: курсор
+        """
+        return encode_cursor(getattr(entity, self.ordering_field_name), entity.id, direction)
+
+    @instrument_repository_call
     async def update(self, entity_id: int, new_entity_data: Dict[str, Any]) -> DeclarativeMeta:
         """
-        Обновление записи
+        Обновление записи. Чтение и сохранение выполняются в одной единице работы
 
         :param entity_id: идентификатор записи
         :param new_entity_data: новые данные для записи
         :return: обновленная запись
         """
-        entity: DeclarativeMeta = await self.get_with_check(entity_id)
+        async with UnitOfWork() as unit_of_work:
+            entity: DeclarativeMeta = await self.get_with_check(entity_id, None)
 
-        await self._before_update(entity, new_entity_data)
+            await self._before_update(entity, new_entity_data)
 
-        for key in new_entity_data:
-            if hasattr(entity, key):
-                setattr(entity, key, new_entity_data[key])
+            self._apply_update_data(entity, new_entity_data)
+            unit_of_work.session.add(entity)
+            await unit_of_work.flush()
 
-        if hasattr(entity, "date_update"):
-            entity.date_update = datetime.now()
-
-        try:
-            async with async_session_maker() as async_session:
-                async with async_session.begin():
-                    async_session.add(entity)
-
-                await async_session.commit()
-                self._after_update(entity)
+        await self._invalidate_cache([entity_id])
+        self._after_update(entity)
 
-                return entity
-        except InvalidRequestError:
-            await async_session.rollback()
-            raise
+        return entity
 
+    @instrument_repository_call
     async def delete(self, entity_id: int) -> None:
         """
         Удаление записи. Сначала запись помечается на удаление, а после удаляется.
@@ -177,22 +411,263 @@ class BaseRepository(ABC):
 
         :param entity_id: идентификатор записи
         """
-        entity: DeclarativeMeta = await self.get_with_check(entity_id)
-        self._before_delete(entity)
+        async with UnitOfWork() as unit_of_work:
+            entity: DeclarativeMeta = await self.get_with_check(entity_id, None)
+            self._before_delete(entity)
 
-        async with async_session_maker() as async_session:
-            if hasattr(entity, "date_delete"):
-                if entity.date_delete:
-                    query: Delete = delete(self.model).where(self.model.id == entity_id)
-                    await async_session.execute(query)
-                else:
-                    await self.update(entity_id, {"date_delete": datetime.now(), "is_active": False})
+            if hasattr(entity, "date_delete") and not entity.date_delete:
+                await self.update(entity_id, {"date_delete": datetime.now(), "is_active": False})
             else:
                 query: Delete = delete(self.model).where(self.model.id == entity_id)
-                await async_session.execute(query)
+                await unit_of_work.session.execute(query)
 
+        await self._invalidate_cache([entity_id])
         self._after_delete(entity)
 
+    @instrument_repository_call
+    async def bulk_create(
+        self, payloads: Sequence[Dict[str, Any]], chunk_size: int | None = None
+    ) -> List[DeclarativeMeta]:
+        """
+        Массовое создание записей. Записи вставляются пачками одним запросом INSERT ... RETURNING на пачку
+        в рамках одной транзакции
+
+        :param payloads: данные для новых записей
+        :param chunk_size: размер пачки. По - умолчанию: _BULK_CHUNK_SIZE
+        :return: созданные записи
+        """
+        result: List[DeclarativeMeta] = []
+
+        if not payloads:
+            return result
+
+        async with session_scope() as async_session:
+            for chunk in self._chunks(payloads, chunk_size):
+                new_entities: List[DeclarativeMeta] = [self._make_entity(payload) for payload in chunk]
+                query: Insert = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+                created = await async_session.scalars(query, [self._entity_values(entity) for entity in new_entities])
+                result.extend(created.all())
+
+        await self._invalidate_cache(entity.id for entity in result)
+
+        for entity in result:
+            self._after_create(entity)
+
+        return result
+
+    @instrument_repository_call
+    async def upsert(
+        self, payload: Dict[str, Any], conflict_on: Sequence[str], update_fields: Sequence[str] | None = None
+    ) -> DeclarativeMeta | None:
+        """
+        Идемпотентное создание записи одним запросом INSERT ... ON CONFLICT ... RETURNING.
+        При конфликте по conflict_on (нужен уникальный индекс) обновляются update_fields и date_update,
+        без update_fields запись не изменяется (DO NOTHING).
+        Значения conflict_on берутся из данных (в том числе uuid, который create заполняет новым значением).
+        Перед запросом вызывается _before_create (в том числе для данных, которые окажутся обновлением существующей
+        записи: до запроса это неизвестно), после - _after_create для новой записи и _after_update для обновленной
+
+        :param payload: данные записи
+        :param conflict_on: поля уникального ключа
+        :param update_fields: поля, обновляемые при конфликте
+        :return: созданная или обновленная запись, None - запись уже есть и не изменялась
+        """
+        result: List[DeclarativeMeta] = await self.bulk_upsert([payload], conflict_on, update_fields)
+
+        return result[0] if result else None
+
+    @instrument_repository_call
+    async def bulk_upsert(
+        self,
+        payloads: Sequence[Dict[str, Any]],
+        conflict_on: Sequence[str],
+        update_fields: Sequence[str] | None = None,
+        chunk_size: int | None = None,
+    ) -> List[DeclarativeMeta]:
+        """
+        Массовое идемпотентное создание записей: один запрос INSERT ... ON CONFLICT ... RETURNING на пачку
+        в рамках одной транзакции. Для одинаковых значений conflict_on используются последние данные.
+        Postgres не сохраняет порядок строк RETURNING при ON CONFLICT DO UPDATE, поэтому записи сопоставляются
+        с данными по значениям conflict_on (по строковому представлению) и возвращаются в порядке данных.
+        Правила конфликта и обработчики - как в upsert
+
+        :param payloads: данные записей
+        :param conflict_on: поля уникального ключа
+        :param update_fields: поля, обновляемые при конфликте
+        :param chunk_size: размер пачки. По - умолчанию: _BULK_CHUNK_SIZE
+        :return: созданные и обновленные записи в порядке данных (без неизмененных при DO NOTHING)
+        """
+        result: List[DeclarativeMeta] = []
+        columns = sa_inspect(self.model).columns
+
+        for field in [*conflict_on, *(update_fields or ())]:
+            if field not in columns:
+                raise ValueError(f"Поле {field} отсутствует в модели {self.model.__name__}")
+
+        unique_payloads: Dict[tuple, Dict[str, Any]] = {}
+
+        for payload in payloads:
+            if any(field not in payload for field in conflict_on):
+                raise ValueError(f"В данных нет значений полей конфликта {', '.join(conflict_on)}")
+
+            key: tuple = self._conflict_key(payload, conflict_on)
+            unique_payloads.pop(key, None)
+            unique_payloads[key] = payload
+
+        if not unique_payloads:
+            return result
+
+        query = pg_insert(self.model)
+        set_fields: List[str] = list(update_fields or ())
+
+        if set_fields and "date_update" in columns and "date_update" not in set_fields:
+            set_fields.append("date_update")
+
+        if set_fields:
+            query = query.on_conflict_do_update(
+                index_elements=list(conflict_on), set_={field: query.excluded[field] for field in set_fields}
+            )
+        else:
+            query = query.on_conflict_do_nothing(index_elements=list(conflict_on))
+
+        # xmax = 0 только у вставленной строки
+        query = query.returning(self.model, literal_column("xmax = 0").label("inserted"))
+        returned: Dict[tuple, Tuple[DeclarativeMeta, bool]] = {}
+
+        async with session_scope() as async_session:
+            for chunk in self._chunks(list(unique_payloads.values()), chunk_size):
+                values_list: List[Dict[str, Any]] = []
+
+                for payload in chunk:
+                    new_entity: DeclarativeMeta = self._make_entity(payload)
+
+                    for field in conflict_on:
+                        setattr(new_entity, field, payload[field])
+
+                    values_list.append(self._entity_values(new_entity))
+
+                rows = await async_session.execute(query, values_list, execution_options={"populate_existing": True})
+
+                for entity, is_inserted in rows:
+                    returned[self._conflict_key(entity.__dict__, conflict_on)] = (entity, is_inserted)
+
+        ordered: List[Tuple[DeclarativeMeta, bool]] = [returned[key] for key in unique_payloads if key in returned]
+        result = [entity for entity, _ in ordered]
+        await self._invalidate_cache(entity.id for entity in result)
+
+        for entity, is_inserted in ordered:
+            if is_inserted:
+                self._after_create(entity)
+            else:
+                self._after_update(entity)
+
+        return result
+
+    @instrument_repository_call
+    async def bulk_update(
+        self, ids_to_data: Dict[int, Dict[str, Any]], chunk_size: int | None = None
+    ) -> List[DeclarativeMeta]:
+        """
+        Массовое обновление записей. Изменения пачки применяются одним запросом UPDATE ... FROM VALUES
+        в рамках одной транзакции
+
+        :param ids_to_data: словарь вида {идентификатор записи: новые данные записи}
+        :param chunk_size: размер пачки. По - умолчанию: _BULK_CHUNK_SIZE
+        :return: обновленные записи
+        """
+        result: List[DeclarativeMeta] = []
+
+        if not ids_to_data:
+            return result
+
+        async with session_scope() as async_session:
+            for chunk in self._chunks(list(ids_to_data), chunk_size):
+                entities: Dict[int, DeclarativeMeta] = await self._get_many_with_check(async_session, chunk)
+                changes: List[Dict[str, Any]] = []
+
+                # Измененные записи не отправляются автосбросом построчно: значения из RETURNING запроса
+                # UPDATE ... FROM VALUES (populate_existing) заменяют их состояние
+                with async_session.no_autoflush:
+                    for entity_id in chunk:
+                        entity: DeclarativeMeta = entities[entity_id]
+                        new_entity_data: Dict[str, Any] = ids_to_data[entity_id]
+                        await self._before_update(entity, new_entity_data)
+                        self._apply_update_data(entity, new_entity_data)
+                        changes.append(self._changed_values(entity))
+
+                    await self._execute_update_from_values(async_session, changes)
+
+                result.extend(entities[entity_id] for entity_id in chunk)
+
+        await self._invalidate_cache(ids_to_data)
+
+        for entity in result:
+            self._after_update(entity)
+
+        return result
+
+    @instrument_repository_call
+    async def bulk_delete(self, ids: Sequence[int], chunk_size: int | None = None) -> None:
+        """
+        Массовое удаление записей. Правила удаления аналогичны delete: запись без отметки удаления помечается
+        на удаление, уже помеченная - удаляется. Каждая пачка обрабатывается запросами вида WHERE id = ANY(...)
+
+        :param ids: идентификаторы записей
+        :param chunk_size: размер пачки. По - умолчанию: _BULK_CHUNK_SIZE
+        """
+        deleted: List[DeclarativeMeta] = []
+
+        if not ids:
+            return
+
+        async with session_scope() as async_session:
+            for chunk in self._chunks(list(dict.fromkeys(ids)), chunk_size):
+                entities: Dict[int, DeclarativeMeta] = await self._get_many_with_check(async_session, chunk)
+                hard_ids: List[int] = []
+                soft_ids: List[int] = []
+
+                for entity_id in chunk:
+                    entity: DeclarativeMeta = entities[entity_id]
+                    self._before_delete(entity)
+
+                    if hasattr(entity, "date_delete") and not entity.date_delete:
+                        soft_ids.append(entity_id)
+                    else:
+                        hard_ids.append(entity_id)
+
+                    deleted.append(entity)
+
+                if soft_ids:
+                    soft_data: Dict[str, Any] = {"date_delete": datetime.now()}
+
+                    if hasattr(self.model, "is_active"):
+                        soft_data["is_active"] = False
+
+                    if hasattr(self.model, "date_update"):
+                        soft_data["date_update"] = datetime.now()
+
+                    soft_query: Update = (
+                        update(self.model)
+                        .where(self.model.id == any_(self._ids_param(soft_ids)))
+                        .values(**soft_data)
+                        .execution_options(synchronize_session="fetch")
+                    )
+                    await async_session.execute(soft_query)
+
+                if hard_ids:
+                    hard_query: Delete = (
+                        delete(self.model)
+                        .where(self.model.id == any_(self._ids_param(hard_ids)))
+                        .execution_options(synchronize_session="fetch")
+                    )
+                    await async_session.execute(hard_query)
+
+        await self._invalidate_cache(entity.id for entity in deleted)
+
+        for entity in deleted:
+            self._after_delete(entity)
+
+    @instrument_repository_call
     async def manual_execute(self, query: Update | Select | Delete | Insert) -> Any:
         """
         Ручное выполнение запроса
@@ -200,9 +675,10 @@ class BaseRepository(ABC):
         @param query: запрос
         @return: результат
         """
-        async with async_session_maker() as async_session:
+        async with session_scope() as async_session:
             await async_session.execute(query)
 
+    @instrument_repository_call
     async def find_one_or_none(self, **filter_by):
         """
         Найти одну запись или None
@@ -210,11 +686,28 @@ class BaseRepository(ABC):
         @param filter_by: фильтры
         @return: модель или None
         """
-        async with async_session_maker() as async_session:
-            query = select(self.model).filter_by(**filter_by)
-            result = await async_session.execute(query)
+        cache: EntityCache | None = self._read_cache()
 
-            return result.unique().scalar_one_or_none()
+        if cache is not None:
+            entity_id: Any = await cache.get_id(self.model, filter_by)
+
+            if entity_id is not None:
+                _, entity = await cache.get(self.model, entity_id)
+
+                # Запись могла измениться после сохранения поиска, поэтому фильтры перепроверяются
+                if entity is not None and all(getattr(entity, key) == value for key, value in filter_by.items()):
+                    return entity
+
+        async with session_scope(read_only=True) as async_session:
+            query, params = self._statements.filter_by(filter_by)
+            result = await async_session.execute(query, params)
+
+            entity = result.unique().scalar_one_or_none()
+
+        if cache is not None and entity is not None:
+            await cache.set_id(self.model, filter_by, entity)
+
+        return entity
 
     @staticmethod
     def _before_create(new_entity: DeclarativeMeta) -> None:
@@ -316,3 +809,221 @@ class BaseRepository(ABC):
             new_entity.uuid = uuid4()
         if hasattr(new_entity, "is_active"):
             new_entity.is_active = True
+
+    def _load_profile(self, name: str | None) -> LoadProfile | None:
+        """
+        Профиль загрузки по имени. Профили list и detail по - умолчанию могут быть не объявлены
+
+        :param name: имя профиля или None
+        :return: профиль или None
+        """
+        if name is None:
+            return None
+
+        load_profile: LoadProfile | None = self._LOAD_PROFILES.get(name)
+
+        if load_profile is None and name not in ("list", "detail"):
+            raise ValueError(f"Не объявлен профиль загрузки {name} в {type(self).__name__}._LOAD_PROFILES")
+
+        return load_profile
+
+    def _load_options(self, load_profile: LoadProfile | None) -> List[Any]:
+        """
+        Параметры загрузки профиля. Поле сортировки загружается всегда (нужно для курсоров навигации)
+
+        :param load_profile: профиль
+        :return: параметры для Select.options
+        """
+        if load_profile is None:
+            return []
+
+        return load_profile.options(self.model, (self.ordering_field_name,))
+
+    @property
+    def _statements(self) -> StatementCache:
+        """Кэш шаблонов запросов модели"""
+        return get_statement_cache(self.model)
+
+    def _read_cache(self) -> EntityCache | None:
+        """Кэш для чтения. Внутри единицы работы чтение идет только через ее сессию"""
+        if self._CACHE is None or UnitOfWork.current() is not None:
+            return None
+
+        return self._CACHE
+
+    async def _invalidate_cache(self, entity_ids: Iterable[Any]) -> None:
+        """
+        Сброс записей в кэше. Внутри единицы работы сброс повторяется после фиксации транзакции
+
+        :param entity_ids: идентификаторы записей
+        """
+        if self._CACHE is None:
+            return
+
+        cache: EntityCache = self._CACHE
+        ids: List[Any] = list(entity_ids)
+        await cache.invalidate(self.model, ids)
+        unit_of_work: UnitOfWork | None = UnitOfWork.current()
+
+        if unit_of_work is not None:
+            unit_of_work.after_commit(lambda: cache.invalidate(self.model, ids))
+
+    def _make_entity(self, payload: Dict[str, Any]) -> DeclarativeMeta:
+        """
+        Создание экземпляра новой записи по данным с заполнением стандартных полей
+
+        :param payload: данные для записи
+        :return: новая запись
+        """
+        new_entity: DeclarativeMeta = self.model()
+
+        for key in payload:
+            if hasattr(new_entity, key):
+                setattr(new_entity, key, payload[key])
+
+        self._fill_main_fields(new_entity)
+        self._before_create(new_entity)
+
+        return new_entity
+
+    @staticmethod
+    def _apply_update_data(entity: DeclarativeMeta, new_entity_data: Dict[str, Any]) -> None:
+        """
+        Применение новых данных к записи
+
+        :param entity: запись
+        :param new_entity_data: новые данные для записи
+        """
+        for key in new_entity_data:
+            if hasattr(entity, key):
+                setattr(entity, key, new_entity_data[key])
+
+        if hasattr(entity, "date_update"):
+            entity.date_update = datetime.now()
+
+    def _entity_values(self, entity: DeclarativeMeta) -> Dict[str, Any]:
+        """
+        Значения колонок записи для вставки. Пустой первичный ключ не передается, чтобы его выдала БД
+
+        :param entity: запись
+        :return: словарь значений колонок
+        """
+        entity_values: Dict[str, Any] = {}
+
+        for attr in sa_inspect(self.model).column_attrs:
+            if attr.key not in entity.__dict__:
+                continue
+
+            value: Any = entity.__dict__[attr.key]
+
+            if value is None and attr.key == "id":
+                continue
+
+            entity_values[attr.key] = value
+
+        return entity_values
+
+    def _changed_values(self, entity: DeclarativeMeta) -> Dict[str, Any]:
+        """
+        Измененные значения колонок записи вместе с идентификатором
+
+        :param entity: запись
+        :return: словарь измененных значений колонок
+        """
+        state = sa_inspect(entity)
+        changes: Dict[str, Any] = {"id": entity.id}
+
+        for attr in sa_inspect(self.model).column_attrs:
+            if state.attrs[attr.key].history.has_changes():
+                changes[attr.key] = entity.__dict__[attr.key]
+
+        return changes
+
+    async def _execute_update_from_values(self, async_session: AsyncSession, changes: List[Dict[str, Any]]) -> None:
+        """
+        Выполнение изменений записей запросом UPDATE ... FROM VALUES. Записи с одинаковым набором измененных колонок
+        обновляются одним запросом
+
+        :param async_session: сессия
+        :param changes: список измененных значений колонок с идентификаторами записей
+        """
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+
+        for change in changes:
+            groups.setdefault(tuple(sorted(change)), []).append(change)
+
+        table = self.model.__table__
+
+        for keys, rows in groups.items():
+            if keys == ("id",):
+                continue
+
+            # NULL в VALUES не несет типа, поэтому приводится явно к типу колонки
+            data = values(*[column(key, table.c[key].type) for key in keys], name="bulk_data").data(
+                [
+                    tuple(cast(null(), table.c[key].type) if row[key] is None else row[key] for key in keys)
+                    for row in rows
+                ]
+            )
+            query: Update = (
+                update(self.model)
+                .where(self.model.id == data.c.id)
+                .values({key: data.c[key] for key in keys if key != "id"})
+                .returning(self.model)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            await async_session.execute(query)
+
+    async def _get_many_with_check(self, async_session: AsyncSession, ids: Sequence[int]) -> Dict[int, DeclarativeMeta]:
+        """
+        Получение записей по идентификаторам в рамках сессии с проверкой существования
+
+        :param async_session: сессия
+        :param ids: идентификаторы записей
+        :return: словарь вида {идентификатор: запись}
+        """
+        query: Select = select(self.model).where(self.model.id == any_(self._ids_param(ids)))
+        result = await async_session.execute(query)
+        entities: Dict[int, DeclarativeMeta] = {entity.id: entity for entity in result.unique().scalars().all()}
+
+        if len(entities) != len(set(ids)):
+            raise EntityNotFount()
+
+        return entities
+
+    def _ids_param(self, ids: Iterable[int]):
+        """
+        Параметр-массив идентификаторов для условий вида id = ANY(...)
+
+        :param ids: идентификаторы записей
+        :return: параметр запроса
+        """
+        return bindparam("ids", list(ids), type_=ARRAY(self.model.id.type))
+
+    @staticmethod
+    def _conflict_key(values: Dict[str, Any], conflict_on: Sequence[str]) -> tuple:
+        """
+        Ключ сопоставления данных и записей upsert. Строковое представление не зависит от типа значения
+        в данных (например, UUID строкой)
+
+        :param values: данные или значения колонок записи
+        :param conflict_on: поля уникального ключа
+        :return: ключ
+        """
+        return tuple(str(values[field]) for field in conflict_on)
+
+    def _chunks(self, items: Sequence[Any], chunk_size: int | None = None) -> Iterator[Sequence[Any]]:
+        """
+        Разбиение элементов на пачки
+
+        :param items: элементы
+        :param chunk_size: размер пачки. По - умолчанию: _BULK_CHUNK_SIZE
+        :return: генератор пачек
+        """
+        size: int = chunk_size or self._BULK_CHUNK_SIZE
+
+        if size <= 0:
+            raise ValueError("Размер пачки должен быть больше нуля")
+
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
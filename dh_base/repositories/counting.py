@@ -0,0 +1,102 @@
+"""Подсчет количества записей списка"""
+
+__author__: str = "Старков Е.П."
+
+import json
+from typing import Any, List, Literal, Generic, TypeVar
+from dataclasses import dataclass
+
+from sqlalchemy import Select, func, text, select
+from sqlalchemy.sql import ClauseElement, Executable
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import LRUCache
+
+# Режим подсчета: exact - точный, estimated - оценка планировщика, none - без подсчета
+T_COUNT_MODE = Literal["exact", "estimated", "none"]
+
+T_ENTITY = TypeVar("T_ENTITY")
+
+# Кэш количества записей для одинаковых наборов фильтров
+count_cache: LRUCache = LRUCache(max_size=1024, ttl=5)
+
+
+@dataclass
+class ListResult(Generic[T_ENTITY]):
+    """Результат списка с общим количеством записей"""
+
+    items: List[T_ENTITY]
+    total: int | None
+
+
+class Explain(Executable, ClauseElement):
+    """Запрос EXPLAIN (FORMAT JSON) для оценки количества строк"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select) -> None:
+        self.statement: Select = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kwargs: Any) -> str:
+    """Компиляция EXPLAIN для PostgreSQL"""
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kwargs)}"
+
+
+def count_cache_key(query: Select, count_mode: T_COUNT_MODE) -> str:
+    """
+    Ключ кэша количества: текст запроса с фильтрами и значения параметров
+
+    :param query: запрос с фильтрами без навигации
+    :param count_mode: режим подсчета
+    :return: ключ
+    """
+    compiled = query.compile()
+    params: str = repr(sorted(compiled.params.items(), key=lambda item: item[0]))
+
+    return f"{count_mode}:{compiled}:{params}"
+
+
+async def exact_count(async_session: AsyncSession, query: Select) -> int:
+    """
+    Точное количество записей запроса
+
+    :param async_session: сессия
+    :param query: запрос с фильтрами без навигации
+    :return: количество записей
+    """
+    count_query: Select = select(func.count()).select_from(query.order_by(None).subquery())
+
+    return (await async_session.execute(count_query)).scalar_one()
+
+
+async def estimated_count(async_session: AsyncSession, model: Any, query: Select) -> int:
+    """
+    Оценка количества записей. Для запроса без фильтров - статистика таблицы (pg_class.reltuples),
+    иначе - оценка планировщика из EXPLAIN
+
+    :param async_session: сессия
+    :param model: модель
+    :param query: запрос с фильтрами без навигации
+    :return: оценка количества записей
+    """
+    if str(query) == str(select(model)):
+        reltuples: float | None = (
+            await async_session.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table_name AS regclass)"),
+                {"table_name": model.__table__.fullname},
+            )
+        ).scalar()
+
+        # reltuples = -1, пока по таблице не собрана статистика
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    plan: Any = (await async_session.execute(Explain(query.order_by(None)))).scalar()
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
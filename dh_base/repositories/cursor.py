@@ -0,0 +1,72 @@
+"""Курсоры для постраничной навигации по ключу"""
+
+__author__: str = "Старков Е.П."
+
+import json
+from uuid import UUID
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from decimal import Decimal
+from datetime import date, datetime
+from typing import Any, Literal, Tuple
+from binascii import Error as BinasciiError
+
+from .exceptions import InvalidCursor
+
+T_CURSOR_DIRECTION = Literal["next", "prev"]
+
+# Сериализаторы значений поля сортировки, которые не поддерживает json
+_ENCODERS: dict[type, Tuple[str, Any]] = {
+    datetime: ("dt", datetime.isoformat),
+    date: ("d", date.isoformat),
+    UUID: ("u", str),
+    Decimal: ("n", str),
+}
+_DECODERS: dict[str, Any] = {
+    "dt": datetime.fromisoformat,
+    "d": date.fromisoformat,
+    "u": UUID,
+    "n": Decimal,
+}
+
+
+def encode_cursor(value: Any, entity_id: int, direction: T_CURSOR_DIRECTION) -> str:
+    """
+    Упаковка позиции записи в непрозрачный курсор
+
+    :param value: значение поля сортировки записи
+    :param entity_id: идентификатор записи
+    :param direction: направление навигации от записи
+    :return: курсор
+    """
+    tag: str | None = None
+
+    for value_type, (value_tag, encoder) in _ENCODERS.items():
+        if isinstance(value, value_type):
+            tag, value = value_tag, encoder(value)
+            break
+
+    raw: bytes = json.dumps([direction, tag, value, entity_id], separators=(",", ":")).encode()
+
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int, T_CURSOR_DIRECTION]:
+    """
+    Распаковка курсора
+
+    :param cursor: курсор
+    :return: значение поля сортировки, идентификатор записи и направление навигации
+    """
+    try:
+        raw: bytes = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, tag, value, entity_id = json.loads(raw)
+
+        if tag is not None:
+            value = _DECODERS[tag](value)
+    except (BinasciiError, ValueError, TypeError, KeyError) as ex:
+        raise InvalidCursor() from ex
+
+    if direction not in ("next", "prev") or not isinstance(entity_id, int):
+        raise InvalidCursor()
+
+    return value, entity_id, direction
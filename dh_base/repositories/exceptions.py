@@ -13,3 +13,26 @@ class EntityNotFount(BaseAppException):
 
     STATUS_CODE: int = status.HTTP_409_CONFLICT
     DETAIL: str | None = "Не найдена запись по переданным параметрам"
+    REPORT: bool = False
+
+
+class InvalidCursor(BaseAppException):
+    """Некорректный курсор навигации"""
+
+    STATUS_CODE: int = status.HTTP_400_BAD_REQUEST
+    DETAIL: str | None = "Некорректный курсор навигации"
+    REPORT: bool = False
+
+
+class InvalidFilter(BaseAppException):
+    """Некорректное значение фильтра списка"""
+
+    STATUS_CODE: int = status.HTTP_400_BAD_REQUEST
+    DETAIL: str | None = "Некорректное значение фильтра"
+    REPORT: bool = False
+
+    def __init__(self, name: str | None = None):
+        if name:
+            self.DETAIL = f"Некорректное значение фильтра {name}"
+
+        super().__init__()
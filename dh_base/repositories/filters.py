@@ -0,0 +1,358 @@
+"""Декларативные фильтры списка с учетом индексов"""
+
+__author__: str = "Старков Е.П."
+
+import re
+import uuid
+from typing import Any, Dict, List, Tuple, Literal, Iterable, Sequence
+from datetime import date, datetime
+from dataclasses import dataclass
+
+from sqlalchemy import Index, Select, func, text, and_
+
+from .exceptions import InvalidFilter
+
+# Операторы фильтров: eq - равенство, in - вхождение в список, range - диапазон (<имя>_from, <имя>_to),
+# prefix - начало строки, contains - подстрока (pg_trgm), full_text - полнотекстовый поиск (tsvector)
+T_FILTER_OPERATOR = Literal["eq", "in", "range", "prefix", "contains", "full_text"]
+
+# Максимальный символ Unicode: префикс, оканчивающийся на него, нельзя увеличить для верхней границы
+_MAX_CHAR: str = chr(0x10FFFF)
+_LANGUAGE_RE: re.Pattern = re.compile(r"[a-z_]+")
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Описание фильтра списка"""
+
+    # Поле модели
+    field: str
+    # Оператор
+    operator: T_FILTER_OPERATOR = "eq"
+    # Ключ в словаре фильтров. По - умолчанию: имя поля
+    name: str | None = None
+    # Без учета регистра (prefix)
+    case_insensitive: bool = False
+    # Конфигурация полнотекстового поиска (full_text)
+    language: str = "simple"
+
+    @property
+    def key(self) -> str:
+        """Ключ в словаре фильтров"""
+        return self.name or self.field
+
+    @property
+    def keys(self) -> Tuple[str, ...]:
+        """Все ключи фильтра в словаре фильтров"""
+        if self.operator == "range":
+            return f"{self.key}_from", f"{self.key}_to"
+
+        return (self.key,)
+
+
+def _coerce(column: Any, value: Any, spec: FilterSpec) -> Any:
+    """
+    Приведение значения из запроса к типу колонки
+
+    :param column: колонка
+    :param value: значение
+    :param spec: описание фильтра
+    :return: значение типа колонки
+    """
+    if value is None or not isinstance(value, str):
+        return value
+
+    try:
+        python_type: type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    try:
+        if python_type is bool:
+            if value.lower() not in ("true", "false", "1", "0"):
+                raise ValueError(value)
+
+            return value.lower() in ("true", "1")
+
+        if python_type in (int, float, uuid.UUID):
+            return python_type(value)
+
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+
+        if python_type is date:
+            return date.fromisoformat(value)
+    except ValueError as ex:
+        raise InvalidFilter(spec.key) from ex
+
+    return value
+
+
+def _text_value(value: Any, spec: FilterSpec) -> str:
+    """
+    Проверка строкового значения
+
+    :param value: значение
+    :param spec: описание фильтра
+    :return: значение
+    """
+    if not isinstance(value, str):
+        raise InvalidFilter(spec.key)
+
+    return value
+
+
+def _prefix_condition(column: Any, prefix: str) -> Any:
+    """
+    Условие начала строки через операторы ~>=~ и ~<~: в отличие от LIKE с параметром,
+    использует индекс text_pattern_ops и в общем плане подготовленного запроса
+
+    :param column: колонка или выражение
+    :param prefix: начало строки
+    :return: условие
+    """
+    stripped: str = prefix.rstrip(_MAX_CHAR)
+
+    if not stripped:
+        return column.like(prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+    upper: str = stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+    return and_(column.op("~>=~")(prefix), column.op("~<~")(upper))
+
+
+def filter_condition(model: Any, spec: FilterSpec, filters: Dict[str, Any]) -> Any | None:
+    """
+    Условие одного фильтра по значениям из словаря фильтров
+
+    :param model: модель
+    :param spec: описание фильтра
+    :param filters: фильтра
+    :return: условие или None, если фильтр не передан
+    """
+    column: Any = getattr(model, spec.field)
+
+    if spec.operator == "range":
+        value_from: Any = _coerce(column, filters.get(f"{spec.key}_from"), spec)
+        value_to: Any = _coerce(column, filters.get(f"{spec.key}_to"), spec)
+        conditions: List[Any] = []
+
+        if value_from is not None:
+            conditions.append(column >= value_from)
+
+        if value_to is not None:
+            conditions.append(column <= value_to)
+
+        return and_(*conditions) if conditions else None
+
+    if spec.key not in filters:
+        return None
+
+    value: Any = filters[spec.key]
+
+    if spec.operator == "eq":
+        value = _coerce(column, value, spec)
+
+        return column.is_(None) if value is None else column == value
+
+    if value is None:
+        return None
+
+    if spec.operator == "in":
+        if isinstance(value, str) or not isinstance(value, Iterable):
+            raise InvalidFilter(spec.key)
+
+        return column.in_([_coerce(column, item, spec) for item in value])
+
+    value = _text_value(value, spec)
+
+    if spec.operator == "prefix":
+        if spec.case_insensitive:
+            return _prefix_condition(func.lower(column), value.lower())
+
+        return _prefix_condition(column, value)
+
+    if spec.operator == "contains":
+        return column.ilike("%" + value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+    language: Any = _regconfig(spec.language)
+
+    return _tsvector(column, spec.language).op("@@")(func.plainto_tsquery(language, value))
+
+
+def _regconfig(language: str) -> Any:
+    """
+    Конфигурация полнотекстового поиска литералом, а не параметром: иначе выражение запроса
+    не совпадет с выражением индекса
+
+    :param language: имя конфигурации
+    :return: выражение
+    """
+    if not _LANGUAGE_RE.fullmatch(language):
+        raise ValueError(f"Некорректная конфигурация полнотекстового поиска: {language}")
+
+    return text(f"'{language}'::regconfig")
+
+
+def _tsvector(column: Any, language: str) -> Any:
+    """Выражение tsvector колонки"""
+    return func.to_tsvector(_regconfig(language), column)
+
+
+def apply_filters(query: Select, model: Any, specs: Sequence[FilterSpec], filters: Dict[str, Any]) -> Select:
+    """
+    Применение декларативных фильтров к запросу. Ключи, не описанные в фильтрах, пропускаются
+
+    :param query: запрос
+    :param model: модель
+    :param specs: описания фильтров
+    :param filters: фильтра
+    :return: запрос с условиями
+    """
+    if not filters:
+        return query
+
+    for spec in specs:
+        condition: Any | None = filter_condition(model, spec, filters)
+
+        if condition is not None:
+            query = query.where(condition)
+
+    return query
+
+
+def has_filters(specs: Sequence[FilterSpec], filters: Dict[str, Any]) -> bool:
+    """
+    Признак переданных декларативных фильтров
+
+    :param specs: описания фильтров
+    :param filters: фильтра
+    :return: передан хотя бы один фильтр
+    """
+    return bool(filters) and any(key in filters for spec in specs for key in spec.keys)
+
+
+def _index_name(model: Any, spec: FilterSpec, suffix: str) -> str:
+    """Имя индекса фильтра"""
+    return f"ix_{model.__tablename__}_{spec.field}_{suffix}"
+
+
+def _index_definition(model: Any, spec: FilterSpec) -> Tuple[str, List[str], Dict[str, Any]]:
+    """
+    Описание индекса для фильтра в виде SQL выражений (для миграций Alembic)
+
+    :param model: модель
+    :param spec: описание фильтра
+    :return: имя индекса, выражения и параметры PostgreSQL
+    """
+    if spec.operator == "prefix":
+        if spec.case_insensitive:
+            return _index_name(model, spec, "lower_prefix"), [f"lower({spec.field}) text_pattern_ops"], {}
+
+        return _index_name(model, spec, "prefix"), [f"{spec.field} text_pattern_ops"], {}
+
+    if spec.operator == "contains":
+        return _index_name(model, spec, "trgm"), [f"{spec.field} gin_trgm_ops"], {"postgresql_using": "gin"}
+
+    if spec.operator == "full_text":
+        return (
+            _index_name(model, spec, "fts"),
+            [f"to_tsvector('{spec.language}'::regconfig, {spec.field})"],
+            {"postgresql_using": "gin"},
+        )
+
+    return _index_name(model, spec, "btree"), [spec.field], {}
+
+
+def _index(model: Any, spec: FilterSpec) -> Index:
+    """
+    Индекс фильтра с выражениями, совпадающими с условиями запроса
+
+    :param model: модель
+    :param spec: описание фильтра
+    :return: индекс
+    """
+    name, _, params = _index_definition(model, spec)
+    column: Any = model.__table__.c[spec.field]
+
+    if spec.operator == "prefix":
+        if spec.case_insensitive:
+            label: str = f"{spec.field}_lower"
+            return Index(name, func.lower(column).label(label), postgresql_ops={label: "text_pattern_ops"})
+
+        return Index(name, column, postgresql_ops={spec.field: "text_pattern_ops"})
+
+    if spec.operator == "contains":
+        return Index(name, column, postgresql_ops={spec.field: "gin_trgm_ops"}, **params)
+
+    if spec.operator == "full_text":
+        return Index(name, _tsvector(column, spec.language), **params)
+
+    return Index(name, column)
+
+
+def _unique_specs(specs: Sequence[FilterSpec]) -> List[FilterSpec]:
+    """Описания фильтров без повторов по полю и виду индекса (eq, in и range используют один B-tree индекс)"""
+    result: Dict[Tuple[str, str], FilterSpec] = {}
+
+    for spec in specs:
+        kind: str = spec.operator if spec.operator in ("prefix", "contains", "full_text") else "btree"
+
+        if spec.operator == "prefix" and spec.case_insensitive:
+            kind = "lower_prefix"
+
+        result.setdefault((spec.field, kind), spec)
+
+    return list(result.values())
+
+
+def filter_indexes(model: Any, specs: Sequence[FilterSpec]) -> List[Index]:
+    """
+    Индексы, нужные описанным фильтрам. Индексы привязываются к таблице модели, поэтому вызов после объявления
+    модели добавляет их в metadata для create_all и autogenerate Alembic. Повторный вызов возвращает уже
+    созданные индексы. Для contains нужно расширение pg_trgm
+
+    :param model: модель
+    :param specs: описания фильтров
+    :return: индексы
+    """
+    indexes: List[Index] = []
+    existing: Dict[str, Index] = {index.name: index for index in model.__table__.indexes}
+
+    for spec in _unique_specs(specs):
+        name: str = _index_definition(model, spec)[0]
+        indexes.append(existing[name] if name in existing else _index(model, spec))
+
+    return indexes
+
+
+def render_alembic_indexes(model: Any, specs: Sequence[FilterSpec], downgrade: bool = False) -> str:
+    """
+    Операции миграции Alembic для индексов фильтров
+
+    :param model: модель
+    :param specs: описания фильтров
+    :param downgrade: операции удаления индексов
+    :return: код для upgrade (или downgrade) миграции
+    """
+    table: str = model.__tablename__
+    lines: List[str] = []
+    unique_specs: List[FilterSpec] = _unique_specs(specs)
+
+    if not downgrade and any(spec.operator == "contains" for spec in unique_specs):
+        lines.append('op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")')
+
+    for spec in unique_specs:
+        name, expressions, params = _index_definition(model, spec)
+
+        if downgrade:
+            lines.append(f'op.drop_index("{name}", table_name="{table}")')
+            continue
+
+        columns: str = ", ".join(
+            f'"{expression}"' if expression == spec.field else f'sa.text("{expression}")' for expression in expressions
+        )
+        extra: str = "".join(f', {key}="{value}"' for key, value in params.items())
+        lines.append(f'op.create_index("{name}", "{table}", [{columns}]{extra})')
+
+    return "\n".join(lines)
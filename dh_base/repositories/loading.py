@@ -0,0 +1,85 @@
+"""Профили загрузки связей и колонок для запросов репозитория"""
+
+__author__: str = "Старков Е.П."
+
+from typing import Any, List, Tuple
+from dataclasses import replace, dataclass
+
+from sqlalchemy.orm import Load, raiseload, load_only, joinedload, selectinload
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """
+    Профиль загрузки: какие колонки и связи загружаются запросом.
+    Связи задаются путями через точку ("author", "author.company")
+
+    Пример:
+        _LOAD_PROFILES = {
+            "list": LoadProfile(columns=("name", "date_create"), selectin=("tags",), raise_other=True),
+            "detail": LoadProfile(joined=("author",), selectin=("tags", "comments.author")),
+        }
+    """
+
+    # Загружаемые колонки (load_only). None - все колонки. Идентификатор добавляется всегда
+    columns: Tuple[str, ...] | None = None
+    # Связи, загружаемые отдельным запросом SELECT ... WHERE id IN (...) на всю страницу
+    selectin: Tuple[str, ...] = ()
+    # Связи, загружаемые JOIN в том же запросе (для связей многие к одному)
+    joined: Tuple[str, ...] = ()
+    # Запретить ленивую загрузку остальных связей: обращение к ним вызывает ошибку вместо запроса на каждую запись
+    raise_other: bool = False
+
+    def options(self, model: Any, required_columns: Tuple[str, ...] = ()) -> List[Any]:
+        """
+        Параметры загрузки для запроса
+
+        :param model: модель
+        :param required_columns: колонки, нужные репозиторию независимо от профиля (поле сортировки)
+        :return: параметры для Select.options
+        """
+        options: List[Any] = []
+
+        if self.columns is not None:
+            names: Tuple[str, ...] = tuple(dict.fromkeys(("id", *required_columns, *self.columns)))
+            options.append(load_only(*(getattr(model, name) for name in names)))
+
+        options.extend(self._relationship_option(model, path, selectinload) for path in self.selectin)
+        options.extend(self._relationship_option(model, path, joinedload) for path in self.joined)
+
+        if self.raise_other:
+            options.append(raiseload("*"))
+
+        return options
+
+    def without_joined(self) -> "LoadProfile":
+        """
+        Профиль, в котором связи joined загружаются через selectin (для потокового чтения yield_per,
+        несовместимого с joinedload)
+
+        :return: профиль
+        """
+        if not self.joined:
+            return self
+
+        return replace(self, selectin=tuple(dict.fromkeys((*self.selectin, *self.joined))), joined=())
+
+    @staticmethod
+    def _relationship_option(model: Any, path: str, loader: Any) -> Load:
+        """
+        Параметр загрузки связи по пути через точку. Промежуточные связи загружаются тем же способом
+
+        :param model: модель
+        :param path: путь связи
+        :param loader: selectinload или joinedload
+        :return: параметр загрузки
+        """
+        current_model: Any = model
+        option: Any = None
+
+        for name in path.split("."):
+            attribute: Any = getattr(current_model, name)
+            option = loader(attribute) if option is None else getattr(option, loader.__name__)(attribute)
+            current_model = attribute.property.mapper.class_
+
+        return option
@@ -0,0 +1,225 @@
+"""
+Окончательное удаление записей, помеченных на удаление (date_delete) раньше DELETE_ITEM_AFTER_DAYS дней назад
+
+Запуск из командной строки (модули моделей нужно импортировать, чтобы модели были найдены):
+    python -m dh_base.repositories.reaper --import app.models --once
+"""
+
+__author__: str = "Старков Е.П."
+
+import asyncio
+import argparse
+import importlib
+from typing import Any, Dict, List, Sequence
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.sql.dml import ReturningDelete
+
+from ..config import base_config
+from ..logger import logger
+from ..columns import DateEditColumns
+from ..metrics import Counter, metrics_registry
+from ..database import Base, get_async_session_maker
+from .cache import EntityCache
+from .common import BaseRepository
+
+purged_rows: Counter = metrics_registry.counter(
+    "soft_delete_purged_rows_total",
+    "Количество окончательно удаленных записей, помеченных на удаление",
+    ("table",),
+)
+
+
+def soft_delete_models(base: Any = Base) -> List[Any]:
+    """
+    Модели с колонками DateEditColumns
+
+    :param base: базовая модель
+    :return: модели
+    """
+    return [
+        mapper.class_
+        for mapper in base.registry.mappers
+        if issubclass(mapper.class_, DateEditColumns) and mapper.local_table is not None
+    ]
+
+
+def model_caches(model: Any) -> List[EntityCache]:
+    """
+    Кэши записей (_CACHE) репозиториев модели
+
+    :param model: модель
+    :return: кэши
+    """
+    caches: List[EntityCache] = []
+    repositories: List[type] = [BaseRepository]
+
+    while repositories:
+        repository: type = repositories.pop()
+        repositories.extend(repository.__subclasses__())
+        cache: EntityCache | None = repository.__dict__.get("_CACHE")
+
+        if cache is not None and getattr(repository, "model", None) is model and cache not in caches:
+            caches.append(cache)
+
+    return caches
+
+
+class SoftDeleteReaper:
+    """
+    Удаление записей, помеченных на удаление. Записи удаляются пачками по batch_size в отдельных транзакциях
+    с паузой batch_pause между пачками. Строки, заблокированные другими транзакциями, пропускаются (SKIP LOCKED)
+    и удаляются при следующем запуске. Удаленные записи сбрасываются из кэшей репозиториев модели
+    """
+
+    def __init__(
+        self,
+        models: Sequence[Any] | None = None,
+        after_days: int | None = None,
+        batch_size: int | None = None,
+        batch_pause: float | None = None,
+    ) -> None:
+        """
+        Инициализация
+
+        :param models: модели. По - умолчанию: все модели с DateEditColumns на момент запуска
+        :param after_days: через сколько дней после пометки запись удаляется (DELETE_ITEM_AFTER_DAYS)
+        :param batch_size: размер пачки (REAPER_BATCH_SIZE)
+        :param batch_pause: пауза между пачками в секундах (REAPER_BATCH_PAUSE)
+        """
+        self._models: Sequence[Any] | None = models
+        self.after_days: int = base_config.DELETE_ITEM_AFTER_DAYS if after_days is None else after_days
+        self.batch_size: int = batch_size or base_config.REAPER_BATCH_SIZE
+        self.batch_pause: float = base_config.REAPER_BATCH_PAUSE if batch_pause is None else batch_pause
+        self._task: asyncio.Task | None = None
+
+    @property
+    def models(self) -> List[Any]:
+        """Модели для удаления"""
+        return list(self._models) if self._models is not None else soft_delete_models()
+
+    async def purge_model(self, model: Any) -> int:
+        """
+        Удаление помеченных записей модели
+
+        :param model: модель
+        :return: количество удаленных записей
+        """
+        cutoff: datetime = datetime.now(timezone.utc) - timedelta(days=self.after_days)
+        batch_ids = (
+            select(model.id)
+            .where(model.date_delete.is_not(None), model.date_delete < cutoff)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        query: ReturningDelete = (
+            delete(model)
+            .where(model.id.in_(batch_ids))
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+        caches: List[EntityCache] = model_caches(model)
+        total: int = 0
+
+        while True:
+            async with get_async_session_maker()() as async_session:
+                async with async_session.begin():
+                    deleted_ids: List[Any] = list((await async_session.execute(query)).scalars())
+
+            for cache in caches:
+                await cache.invalidate(model, deleted_ids)
+
+            deleted: int = len(deleted_ids)
+            total += deleted
+            purged_rows.inc(deleted, table=model.__tablename__)
+
+            if deleted < self.batch_size:
+                return total
+
+            await asyncio.sleep(self.batch_pause)
+
+    async def run(self) -> Dict[str, int]:
+        """
+        Удаление помеченных записей всех моделей. Ошибка одной модели (например, внешний ключ) записывается в лог
+        и не прерывает удаление остальных
+
+        :return: количество удаленных записей по таблицам
+        """
+        result: Dict[str, int] = {}
+
+        for model in self.models:
+            try:
+                result[model.__tablename__] = await self.purge_model(model)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                logger.error("Ошибка удаления помеченных записей", extra={"table": model.__tablename__, "exc": str(ex)})
+
+        logger.info("Удалены помеченные на удаление записи", extra={"purged": result})
+
+        return result
+
+    async def run_forever(self, interval: float | None = None) -> None:
+        """
+        Периодическое удаление
+
+        :param interval: интервал запуска в секундах (REAPER_INTERVAL)
+        """
+        while True:
+            await self.run()
+            await asyncio.sleep(interval or base_config.REAPER_INTERVAL)
+
+    def start(self, interval: float | None = None) -> asyncio.Task:
+        """
+        Запуск периодического удаления фоновой задачей
+
+        :param interval: интервал запуска в секундах
+        :return: задача
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run_forever(interval))
+
+        return self._task
+
+    async def stop(self) -> None:
+        """Остановка фоновой задачи"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+
+def main() -> None:
+    """Точка входа командной строки"""
+    parser = argparse.ArgumentParser(description="Окончательное удаление записей, помеченных на удаление")
+    parser.add_argument("--import", dest="modules", action="append", default=[], help="модуль с моделями")
+    parser.add_argument("--once", action="store_true", help="однократный запуск")
+    parser.add_argument("--after-days", type=int, help="через сколько дней после пометки удалять")
+    parser.add_argument("--batch-size", type=int, help="размер пачки")
+    parser.add_argument("--batch-pause", type=float, help="пауза между пачками в секундах")
+    parser.add_argument("--interval", type=float, help="интервал запуска в секундах")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        importlib.import_module(module)
+
+    reaper: SoftDeleteReaper = SoftDeleteReaper(
+        after_days=args.after_days, batch_size=args.batch_size, batch_pause=args.batch_pause
+    )
+
+    # Количество удаленных записей по таблицам записывается в лог
+    if args.once:
+        asyncio.run(reaper.run())
+    else:
+        asyncio.run(reaper.run_forever(args.interval))
+
+
+if __name__ == "__main__":
+    main()
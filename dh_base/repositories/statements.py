@@ -0,0 +1,190 @@
+"""Кэш шаблонов запросов репозиториев"""
+
+__author__: str = "Старков Е.П."
+
+import threading
+from typing import Any, Dict, List, Tuple, Hashable, Callable, Sequence
+from dataclasses import dataclass
+
+from sqlalchemy import Select, Integer, select, bindparam
+
+from ..instrumentation import compiled_cache
+
+
+@dataclass
+class StatementCacheStats:
+    """Статистика кэша шаблонов запросов"""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий"""
+        total: int = self.hits + self.misses
+
+        return self.hits / total if total else 0.0
+
+
+class StatementCache:
+    """
+    Шаблоны частых запросов модели с параметрами bindparam. Шаблон строится один раз, поэтому при повторных
+    вызовах не строится дерево запроса и не вычисляется ключ кэша компиляции SQLAlchemy. Одинаковый текст SQL
+    позволяет asyncpg переиспользовать подготовленные запросы соединения
+    """
+
+    # Максимум шаблонов на модель (для find_one_or_none с разными наборами полей)
+    _MAX_TEMPLATES: int = 256
+
+    def __init__(self, model: Any) -> None:
+        """
+        Инициализация
+
+        :param model: модель
+        """
+        self.model: Any = model
+        self.stats: StatementCacheStats = StatementCacheStats()
+        self._templates: Dict[Hashable, Select] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], Select]) -> Select:
+        """
+        Шаблон запроса по ключу. При отсутствии строится и сохраняется
+
+        :param key: ключ шаблона
+        :param builder: функция построения запроса
+        :return: запрос
+        """
+        statement: Select | None = self._templates.get(key)
+
+        if statement is not None:
+            self.stats.hits += 1
+            return statement
+
+        self.stats.misses += 1
+        statement = builder()
+
+        with self._lock:
+            if len(self._templates) < self._MAX_TEMPLATES:
+                self._templates.setdefault(key, statement)
+
+        return statement
+
+    def by_id(self, options_key: Hashable = None, options: Sequence[Any] = ()) -> Tuple[Select, str]:
+        """
+        Запрос записи по идентификатору
+
+        :param options_key: ключ параметров загрузки (профиль)
+        :param options: параметры загрузки
+        :return: запрос и имя параметра идентификатора
+        """
+        return self.get_or_build(
+            ("by_id", options_key),
+            lambda: select(self.model).where(self.model.id == bindparam("entity_id")).options(*options),
+        ), "entity_id"
+
+    def filter_by(self, filter_by: Dict[str, Any]) -> Tuple[Select, Dict[str, Any]]:
+        """
+        Запрос по равенству полей. Поля со значением None сравниваются через IS NULL,
+        поэтому входят в ключ шаблона отдельно
+
+        :param filter_by: значения полей
+        :return: запрос и параметры
+        """
+        names: List[str] = sorted(filter_by)
+        key: Tuple[Any, ...] = ("filter_by", tuple((name, filter_by[name] is None) for name in names))
+
+        def build() -> Select:
+            return select(self.model).where(
+                *(
+                    getattr(self.model, name).is_(None)
+                    if filter_by[name] is None
+                    else getattr(self.model, name) == bindparam(f"filter_{name}")
+                    for name in names
+                )
+            )
+
+        params: Dict[str, Any] = {
+            f"filter_{name}": value for name, value in filter_by.items() if value is not None
+        }
+
+        return self.get_or_build(key, build), params
+
+    def list_page(
+        self,
+        key: Hashable,
+        ordering: Callable[[], List[Any]],
+        options_key: Hashable = None,
+        options: Sequence[Any] = (),
+    ) -> Select:
+        """
+        Страница списка без фильтров с параметрами limit и offset
+
+        :param key: ключ сортировки
+        :param ordering: функция выражений сортировки
+        :param options_key: ключ параметров загрузки (профиль)
+        :param options: параметры загрузки
+        :return: запрос
+        """
+        return self.get_or_build(
+            ("list_page", key, options_key),
+            lambda: select(self.model)
+            .options(*options)
+            .order_by(*ordering())
+            .limit(bindparam("limit", type_=Integer))
+            .offset(bindparam("offset", type_=Integer)),
+        )
+
+
+# Кэши шаблонов по моделям
+_CACHES: Dict[Any, StatementCache] = {}
+_CACHES_LOCK: threading.Lock = threading.Lock()
+
+
+def get_statement_cache(model: Any) -> StatementCache:
+    """
+    Кэш шаблонов запросов модели
+
+    :param model: модель
+    :return: кэш шаблонов
+    """
+    cache: StatementCache | None = _CACHES.get(model)
+
+    if cache is None:
+        with _CACHES_LOCK:
+            cache = _CACHES.setdefault(model, StatementCache(model))
+
+    return cache
+
+
+def statement_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Статистика кэшей запросов: шаблоны по таблицам моделей и кэш компиляции SQLAlchemy по репозиториям
+
+    :return: статистика {"templates": {таблица: ...}, "compiled": {репозиторий: ...}}
+    """
+    compiled: Dict[str, Dict[str, Any]] = {}
+
+    for (repository, result), count in compiled_cache.values().items():
+        repository_stats: Dict[str, Any] = compiled.setdefault(repository or "-", {})
+        repository_stats[result] = repository_stats.get(result, 0) + count
+
+    for repository_stats in compiled.values():
+        total: int = repository_stats.get("hit", 0) + repository_stats.get("miss", 0)
+        repository_stats["hit_rate"] = repository_stats.get("hit", 0) / total if total else 0.0
+
+    return {
+        "templates": {
+            model.__tablename__: {
+                "templates": len(cache),
+                "hits": cache.stats.hits,
+                "misses": cache.stats.misses,
+                "hit_rate": cache.stats.hit_rate,
+            }
+            for model, cache in list(_CACHES.items())
+        },
+        "compiled": compiled,
+    }
@@ -0,0 +1,91 @@
+"""Синхронный фасад репозитория поверх асинхронного движка"""
+
+__author__: str = "Старков Е.П."
+
+import sys
+import inspect
+import functools
+from typing import Any, Callable, Iterator, AsyncGenerator
+
+from ..sync import run_sync
+
+
+def _sync_iterator(generator: AsyncGenerator[Any, None], timeout: float | None) -> Iterator[Any]:
+    """
+    Синхронный итератор по асинхронному генератору. Каждый элемент получается отдельным вызовом в цикле событий
+
+    :param generator: асинхронный генератор
+    :param timeout: время ожидания элемента в секундах
+    :return: итератор
+    """
+    try:
+        while True:
+            try:
+                yield run_sync(generator.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+    finally:
+        # При завершении интерпретатора поток цикла событий уже остановлен
+        if not sys.is_finalizing():
+            run_sync(generator.aclose(), timeout)
+
+
+class SyncRepository:
+    """
+    Синхронный фасад репозитория: асинхронные методы выполняются через общий цикл синхронных вызовов
+    (dh_base.sync.sync_runner) и используют тот же пул соединений, что и асинхронный код. Асинхронные
+    генераторы (stream) возвращаются синхронными итераторами
+
+    Пример:
+        repository = ItemRepository().sync
+        item = repository.get(1)
+    """
+
+    def __init__(self, repository: Any, timeout: float | None = None) -> None:
+        """
+        Инициализация
+
+        :param repository: асинхронный репозиторий
+        :param timeout: время ожидания результата в секундах
+        """
+        self._repository: Any = repository
+        self._timeout: float | None = timeout
+
+    def __getattr__(self, name: str) -> Any:
+        attribute: Any = getattr(self._repository, name)
+
+        if inspect.isasyncgenfunction(attribute):
+            return self._wrap_generator(attribute)
+
+        if inspect.iscoroutinefunction(attribute):
+            return self._wrap_coroutine(attribute)
+
+        return attribute
+
+    def _wrap_coroutine(self, method: Callable) -> Callable:
+        """
+        Синхронная обертка асинхронного метода
+
+        :param method: метод
+        :return: обертка
+        """
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return run_sync(method(*args, **kwargs), self._timeout)
+
+        return wrapper
+
+    def _wrap_generator(self, method: Callable) -> Callable:
+        """
+        Синхронная обертка асинхронного генератора
+
+        :param method: метод
+        :return: обертка
+        """
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            return _sync_iterator(method(*args, **kwargs), self._timeout)
+
+        return wrapper
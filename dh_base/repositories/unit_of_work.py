@@ -0,0 +1,191 @@
+"""Единица работы: общая сессия и транзакция для нескольких вызовов репозиториев"""
+
+__author__: str = "Старков Е.П."
+
+import time
+import asyncio
+from types import TracebackType
+from typing import Any, List, Callable, Awaitable, AsyncIterator, Type
+from contextlib import asynccontextmanager
+from contextvars import Token, ContextVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import base_config
+from ..database import Replica, ReplicaRouter, get_replica_router, get_async_session_maker
+
+_CURRENT_UNIT_OF_WORK: ContextVar["UnitOfWork | None"] = ContextVar("current_unit_of_work", default=None)
+# Время последней записи в текущем контексте (для чтения своих записей)
+_LAST_WRITE_AT: ContextVar[float | None] = ContextVar("last_write_at", default=None)
+
+
+class UnitOfWork:
+    """
+    Единица работы. Все вызовы репозиториев внутри контекста используют одну сессию (одно подключение)
+    и фиксируются одним коммитом при выходе. При исключении транзакция откатывается.
+    Вложенная единица работы присоединяется к внешней. После фиксации начинается окно чтения своих записей
+    (DB_READ_YOUR_WRITES_WINDOW)
+
+    Пример:
+        async with UnitOfWork():
+            user = await user_repository.create(payload)
+            await profile_repository.create({"user_id": user.id})
+    """
+
+    def __init__(self) -> None:
+        self._session: AsyncSession | None = None
+        self._token: Token["UnitOfWork | None"] | None = None
+        self._is_owner: bool = False
+        self._after_commit: List[Callable[[], Awaitable[Any]]] = []
+
+    @staticmethod
+    def current() -> "UnitOfWork | None":
+        """Текущая единица работы или None"""
+        return _CURRENT_UNIT_OF_WORK.get()
+
+    @property
+    def session(self) -> AsyncSession:
+        """Сессия единицы работы"""
+        if self._session is None:
+            raise RuntimeError("Единица работы не открыта")
+
+        return self._session
+
+    async def __aenter__(self) -> "UnitOfWork":
+        outer: UnitOfWork | None = self.current()
+
+        if outer is not None:
+            self._session = outer.session
+            self._after_commit = outer._after_commit
+            return self
+
+        self._session = get_async_session_maker()()
+        await self._session.begin()
+        self._is_owner = True
+        self._token = _CURRENT_UNIT_OF_WORK.set(self)
+
+        return self
+
+    async def __aexit__(
+        self, exc_type: Type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        if not self._is_owner or self._token is None:
+            return
+
+        try:
+            if exc_type is None:
+                await self.session.commit()
+                # Чтения после фиксации (в том числе вне единицы работы) идут в основную БД
+                mark_write()
+            else:
+                await self.session.rollback()
+        finally:
+            _CURRENT_UNIT_OF_WORK.reset(self._token)
+            await self.session.close()
+            self._token = None
+            self._is_owner = False
+
+        if exc_type is None:
+            for callback in self._after_commit:
+                await callback()
+
+        self._after_commit = []
+
+    async def flush(self) -> None:
+        """Отправка накопленных изменений в БД без фиксации транзакции"""
+        await self.session.flush()
+
+    def after_commit(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Регистрация обработчика, вызываемого после успешной фиксации транзакции
+
+        :param callback: асинхронный обработчик без параметров
+        """
+        self._after_commit.append(callback)
+
+
+def mark_write() -> None:
+    """Отметка записи в текущем контексте: следующие чтения в окне DB_READ_YOUR_WRITES_WINDOW идут в основную БД"""
+    _LAST_WRITE_AT.set(time.monotonic())
+
+
+def in_read_your_writes_window() -> bool:
+    """Признак недавней записи в текущем контексте"""
+    last_write_at: float | None = _LAST_WRITE_AT.get()
+
+    return last_write_at is not None and time.monotonic() - last_write_at < base_config.DB_READ_YOUR_WRITES_WINDOW
+
+
+@asynccontextmanager
+async def session_scope(read_only: bool = False) -> AsyncIterator[AsyncSession]:
+    """
+    Сессия для вызова репозитория. Внутри единицы работы возвращается ее сессия, изменения только
+    отправляются в БД. Вне единицы работы открывается отдельная сессия с транзакцией, которая фиксируется
+    при выходе из контекста. Чтения (read_only) вне единицы работы и вне окна чтения своих записей
+    направляются на реплику, если они настроены
+
+    :param read_only: сессия только для чтения
+    """
+    if not read_only:
+        mark_write()
+
+    unit_of_work: UnitOfWork | None = UnitOfWork.current()
+
+    if unit_of_work is not None:
+        yield unit_of_work.session
+        await unit_of_work.session.flush()
+        return
+
+    router: ReplicaRouter | None = get_replica_router() if read_only and not in_read_your_writes_window() else None
+    replica: Replica | None = router.choose() if router is not None else None
+    replica_session: AsyncSession | None = None
+
+    if router is not None and replica is not None:
+        replica_session = await _open_replica_session(router, replica)
+
+    if router is not None and replica is not None and replica_session is not None:
+        try:
+            yield replica_session
+        except (OSError, DBAPIError) as error:
+            # Потеря соединения во время чтения: повторить чтение уже нельзя, реплика исключается для следующих
+            if isinstance(error, OSError) or error.connection_invalidated:
+                router.mark_unhealthy(replica)
+
+            raise
+        finally:
+            replica.in_use -= 1
+            await replica_session.close()
+
+        return
+
+    async with get_async_session_maker()() as async_session:
+        async with async_session.begin():
+            yield async_session
+
+    if not read_only:
+        # Окно чтения своих записей отсчитывается от фиксации
+        mark_write()
+
+
+async def _open_replica_session(router: ReplicaRouter, replica: Replica) -> AsyncSession | None:
+    """
+    Открытие сессии реплики. Соединение берется из пула сразу, чтобы при недоступности реплики
+    исключить ее и выполнить чтение в основной БД
+
+    :param router: маршрутизатор реплик
+    :param replica: реплика
+    :return: сессия с учтенным соединением или None
+    """
+    replica_session: AsyncSession = replica.session_maker()
+
+    try:
+        await replica_session.connection()
+    except (OSError, DBAPIError, asyncio.TimeoutError):
+        await replica_session.close()
+        router.mark_unhealthy(replica)
+        return None
+
+    replica.in_use += 1
+
+    return replica_session
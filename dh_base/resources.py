@@ -0,0 +1,133 @@
+"""Реестр ленивых ресурсов приложения (подключения к БД, брокеру, клиенты внешних сервисов)"""
+
+__author__: str = "Старков Е.П."
+
+import inspect
+import threading
+from typing import Any, Dict, List, Callable, AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+
+@dataclass
+class _Resource:
+    """Описание ресурса"""
+
+    factory: Callable[[], Any]
+    close: Callable[[Any], Any] | None
+    eager: bool = False
+
+
+class ResourceRegistry:
+    """
+    Реестр ресурсов. Ресурс создается при первом обращении (get) или явно при старте приложения (startup)
+    и освобождается при остановке (shutdown). Импорт модулей не открывает сетевых подключений.
+    При старте без имен создаются только ресурсы, зарегистрированные с eager=True (асинхронный движок БД)
+
+    Пример подключения к FastAPI:
+        app = FastAPI(lifespan=registry.lifespan)
+    """
+
+    def __init__(self) -> None:
+        self._resources: Dict[str, _Resource] = {}
+        self._instances: Dict[str, Any] = {}
+        self._order: List[str] = []
+        self._lock: threading.RLock = threading.RLock()
+
+    def register(
+        self, name: str, factory: Callable[[], Any], close: Callable[[Any], Any] | None = None, eager: bool = False
+    ) -> None:
+        """
+        Регистрация ресурса
+
+        :param name: имя ресурса
+        :param factory: функция создания ресурса
+        :param close: функция освобождения ресурса (может быть асинхронной)
+        :param eager: создавать ресурс при старте приложения (startup без имен)
+        """
+        with self._lock:
+            self._resources[name] = _Resource(factory, close, eager)
+
+    def get(self, name: str) -> Any:
+        """
+        Получение ресурса. При первом обращении ресурс создается
+
+        :param name: имя ресурса
+        :return: ресурс
+        """
+        instance: Any = self._instances.get(name)
+
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._resources:
+                    raise KeyError(f"Ресурс {name} не зарегистрирован")
+
+                self._instances[name] = self._resources[name].factory()
+                self._order.append(name)
+
+            return self._instances[name]
+
+    def is_initialized(self, name: str) -> bool:
+        """
+        Признак созданного ресурса
+
+        :param name: имя ресурса
+        """
+        return name in self._instances
+
+    def override(self, name: str, instance: Any) -> None:
+        """
+        Подмена ресурса готовым экземпляром (тесты, бенчмарки, нестандартная инициализация)
+
+        :param name: имя ресурса
+        :param instance: экземпляр ресурса
+        """
+        with self._lock:
+            if name not in self._instances:
+                self._order.append(name)
+
+            self._instances[name] = instance
+
+    async def startup(self, *names: str) -> None:
+        """
+        Создание ресурсов при старте приложения
+
+        :param names: имена ресурсов. По - умолчанию: зарегистрированные с eager=True
+        """
+        for name in names or [name for name, resource in list(self._resources.items()) if resource.eager]:
+            self.get(name)
+
+    async def shutdown(self) -> None:
+        """Освобождение созданных ресурсов в обратном порядке создания"""
+        with self._lock:
+            order: List[str] = self._order[::-1]
+            instances: Dict[str, Any] = self._instances
+            self._order = []
+            self._instances = {}
+
+        for name in order:
+            resource: _Resource | None = self._resources.get(name)
+
+            if resource is None or resource.close is None:
+                continue
+
+            result: Any = resource.close(instances[name])
+
+            if inspect.isawaitable(result):
+                await result
+
+    @asynccontextmanager
+    async def lifespan(self, _: Any = None) -> AsyncIterator[None]:
+        """Контекст жизненного цикла приложения для FastAPI"""
+        await self.startup()
+
+        try:
+            yield
+        finally:
+            await self.shutdown()
+
+
+registry: ResourceRegistry = ResourceRegistry()
@@ -2,14 +2,24 @@
 
 __author__: str = "Старков Е.П."
 
+from typing import Literal
 
 from pydantic import BaseModel
 
+# Режим навигации: по номеру страницы или по курсору
+T_NAVIGATION_MODE = Literal["offset", "cursor"]
+
 
 class NavigationSchema(BaseModel):
-    page: int
+    page: int = 0
     size: int
-    has_more: bool
+    has_more: bool = False
+    mode: T_NAVIGATION_MODE = "offset"
+    # Курсор запрашиваемой страницы. Пустой курсор - первая страница
+    cursor: str | None = None
+    # Курсоры соседних страниц, заполняются после получения списка
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 
 class ListParamsSchema(BaseModel):
@@ -0,0 +1,122 @@
+"""Выполнение асинхронного кода из синхронного (задачи Celery, скрипты) на общем асинхронном движке БД"""
+
+__author__: str = "Старков Е.П."
+
+import asyncio
+import inspect
+import threading
+import contextvars
+from typing import Any, Awaitable
+
+from .resources import registry
+
+
+class SyncRunner:
+    """
+    Выполнение корутин из синхронного кода в отдельном цикле событий. Цикл работает в фоновом потоке,
+    который запускается при первом обращении, либо может быть подключен уже работающий цикл приложения (attach).
+    Все обращения к БД идут через один цикл, поэтому используется один пул асинхронного движка.
+    Корутина выполняется с копией контекстных переменных вызывающего потока
+    """
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def is_started(self) -> bool:
+        """Признак запущенного или подключенного цикла"""
+        return self._loop is not None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Цикл событий. При первом обращении запускается фоновый поток"""
+        if self._loop is not None:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None:
+                loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="dh-sync-runner", daemon=True)
+                self._thread.start()
+                self._loop = loop
+
+            return self._loop
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Подключение работающего цикла приложения. Синхронные вызовы из других потоков приложения
+        (например, run_in_threadpool) будут выполняться в нем
+
+        :param loop: цикл событий
+        """
+        with self._lock:
+            if self._loop is not None and self._loop is not loop:
+                raise RuntimeError("Цикл событий для синхронных вызовов уже запущен")
+
+            self._loop = loop
+
+    def run(self, awaitable: Awaitable[Any], timeout: float | None = None) -> Any:
+        """
+        Выполнение корутины (или другого ожидаемого объекта) с ожиданием результата
+
+        :param awaitable: корутина
+        :param timeout: время ожидания в секундах
+        :return: результат корутины
+        """
+        loop: asyncio.AbstractEventLoop = self.loop
+
+        try:
+            running_loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+
+            raise RuntimeError("Синхронный вызов из цикла событий приводит к взаимоблокировке, используйте await")
+
+        context: contextvars.Context = contextvars.copy_context()
+
+        async def in_context() -> Any:
+            # Задача создается в контексте вызывающего потока
+            return await context.run(asyncio.ensure_future, awaitable)
+
+        return asyncio.run_coroutine_threadsafe(in_context(), loop).result(timeout)
+
+    def close(self) -> None:
+        """Остановка фонового потока. Подключенный цикл приложения не останавливается"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if thread is None or loop is None:
+            return
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+sync_runner: SyncRunner = SyncRunner()
+
+
+def run_sync(awaitable: Awaitable[Any], timeout: float | None = None) -> Any:
+    """
+    Выполнение корутины из синхронного кода
+
+    :param awaitable: корутина
+    :param timeout: время ожидания в секундах
+    :return: результат корутины
+    """
+    return sync_runner.run(awaitable, timeout)
+
+
+def shutdown_sync() -> None:
+    """Освобождение ресурсов (подключений к БД и т.д.) в цикле синхронных вызовов и остановка его потока"""
+    if sync_runner.is_started:
+        run_sync(registry.shutdown())
+
+    sync_runner.close()
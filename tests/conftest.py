@@ -0,0 +1,24 @@
+"""Общие настройки тестов"""
+
+__author__: str = "Старков Е.П."
+
+import os
+
+# Настройки, обязательные для импорта dh_base. Подключения к внешним сервисам в тестах не создаются
+os.environ.setdefault("MODE", "TEST")
+
+for _name, _value in {
+    "REDIS_URL": "redis://localhost",
+    "REDIS_PREFIX": "test",
+    "APP_NAME": "test",
+    "HAWK_TOKEN": "test",
+    "LOG_LEVEL": "INFO",
+    "RABBIT_MQ_HOST": "localhost",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+_DB_SETTINGS: dict = {"HOST": "localhost", "PORT": "5432", "NAME": "test", "LOGIN": "test", "PASSWORD": "test"}
+
+for _mode in ("DEV", "TEST", "PROD"):
+    for _name, _value in _DB_SETTINGS.items():
+        os.environ.setdefault(f"{_mode}_DB_{_name}", _value)
@@ -0,0 +1,42 @@
+"""Тесты отправки базового исключения в HAWK"""
+
+__author__: str = "Старков Е.П."
+
+from fastapi import status
+
+from dh_base.resources import registry
+from dh_base.error_reporting import ErrorReporter, FakeHawkSink
+from dh_base.exceptions.common import BaseAppException
+
+
+class ItemConflict(BaseAppException):
+    """Исключение для теста"""
+
+    STATUS_CODE: int = status.HTTP_409_CONFLICT
+    DETAIL: str = "Конфликт"
+
+
+def create_exception() -> ItemConflict:
+    """Место создания исключения"""
+    return ItemConflict()
+
+
+def test_report_keeps_creation_location() -> None:
+    sink: FakeHawkSink = FakeHawkSink()
+    registry.override("error_reporter", ErrorReporter(lambda: sink))
+
+    create_exception()
+    registry.get("error_reporter").flush(timeout=5)
+
+    assert len(sink.events) == 1
+    event = sink.events[0]
+    assert event.tb is not None
+    assert event.context == {"code": status.HTTP_409_CONFLICT, "detail": "Конфликт"}
+
+    tb = event.tb
+
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+
+    assert tb.tb_frame.f_code.co_name == "create_exception"
+    assert tb.tb_frame.f_code.co_filename == __file__
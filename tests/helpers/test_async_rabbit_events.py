@@ -0,0 +1,115 @@
+"""Тесты асинхронной публикации событий на брокере в памяти процесса"""
+
+__author__: str = "Старков Е.П."
+
+import json
+import asyncio
+from typing import Any, List, Sequence
+
+import pytest
+
+from dh_base.helpers import BrokerMessage, InMemoryBroker, AsyncRabbitEventHelper
+
+
+class FailingBroker(InMemoryBroker):
+    """Брокер, не подтверждающий публикации"""
+
+    async def publish(self, queue_name: str, messages: Sequence[BrokerMessage], confirm: bool = False) -> None:
+        self.publish_calls += 1
+        raise ConnectionError("брокер недоступен")
+
+
+def _numbers(broker: InMemoryBroker, queue_name: str = "events") -> List[int]:
+    """Номера опубликованных событий в порядке очереди"""
+    return [json.loads(message.body)["number"] for message in broker.queues[queue_name]]
+
+
+def test_publish_many_delivers_all_events_in_order() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        helper: AsyncRabbitEventHelper = AsyncRabbitEventHelper("events", broker)
+
+        await helper.publish_many({"number": i} for i in range(10))
+        await helper.publish({"number": 10})
+        await helper.close()
+
+        assert _numbers(broker) == list(range(11))
+
+    asyncio.run(scenario())
+
+
+def test_messages_are_sent_in_batches_of_batch_size() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        helper: AsyncRabbitEventHelper = AsyncRabbitEventHelper("events", broker, batch_size=100, linger=0.01)
+
+        await helper.publish_many({"number": i} for i in range(250))
+        await helper.close()
+
+        assert broker.publish_calls == 3
+        assert _numbers(broker) == list(range(250))
+
+    asyncio.run(scenario())
+
+
+def test_linger_collects_separate_publications_into_one_batch() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        helper: AsyncRabbitEventHelper = AsyncRabbitEventHelper("events", broker, batch_size=100, linger=0.05)
+
+        for number in range(5):
+            await helper.publish({"number": number})
+
+        assert broker.publish_calls == 0
+
+        await helper.flush()
+        await helper.close()
+
+        assert broker.publish_calls == 1
+        assert _numbers(broker) == list(range(5))
+
+    asyncio.run(scenario())
+
+
+def test_confirm_failure_is_raised_to_publisher() -> None:
+    async def scenario() -> None:
+        helper: AsyncRabbitEventHelper = AsyncRabbitEventHelper("events", FailingBroker(), publisher_confirms=True)
+
+        with pytest.raises(ConnectionError):
+            await helper.publish_many([{"number": 1}, {"number": 2}])
+
+        await helper.close()
+
+    asyncio.run(scenario())
+
+
+def test_publish_failure_without_confirms_does_not_raise() -> None:
+    async def scenario() -> None:
+        broker: FailingBroker = FailingBroker()
+        helper: AsyncRabbitEventHelper = AsyncRabbitEventHelper("events", broker)
+
+        await helper.publish({"number": 1})
+        await helper.close()
+
+        assert broker.publish_calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_applies_backpressure() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker(publish_delay=0.05)
+        helper: AsyncRabbitEventHelper = AsyncRabbitEventHelper("events", broker, batch_size=5, linger=0, max_pending=5)
+        publishing: asyncio.Task[Any] = asyncio.create_task(helper.publish_many({"number": i} for i in range(30)))
+        await asyncio.sleep(0.02)
+
+        # Первая пачка отправляется, очередь заполнена, publish_many ждет места
+        assert not publishing.done()
+        assert helper._pending.qsize() <= 5  # pylint: disable=protected-access
+
+        await asyncio.wait_for(publishing, 2)
+        await helper.close()
+
+        assert _numbers(broker) == list(range(30))
+
+    asyncio.run(scenario())
@@ -0,0 +1,155 @@
+"""Тесты обработчика очереди RabbitMQ на брокере в памяти процесса"""
+
+__author__: str = "Старков Е.П."
+
+import json
+import time
+import asyncio
+from typing import Any, Dict, List
+
+from dh_base.helpers import BrokerMessage, InMemoryBroker, RabbitConsumerRunner
+from dh_base.helpers.rabbit_consumer import RETRY_COUNT_HEADER
+
+
+async def _publish(broker: InMemoryBroker, queue_name: str, count: int) -> None:
+    """Публикация count событий {"number": i} в очередь"""
+    await broker.declare_queue(queue_name)
+    await broker.publish(queue_name, [BrokerMessage(json.dumps({"number": i}).encode()) for i in range(count)])
+
+
+async def _wait_for(condition: Any, timeout: float = 2.0) -> None:
+    """Ожидание выполнения условия"""
+    deadline: float = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Условие не выполнено за отведенное время"
+        await asyncio.sleep(0.005)
+
+
+def test_handled_messages_are_acked() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        handled: List[int] = []
+
+        async def handler(params: Dict[str, Any] | None) -> None:
+            handled.append(params["number"])
+
+        await _publish(broker, "events", 20)
+        runner: RabbitConsumerRunner = RabbitConsumerRunner("events", handler, broker, prefetch_count=5, concurrency=3)
+        await runner.start()
+        await _wait_for(lambda: len(handled) == 20)
+        await runner.stop(timeout=1)
+
+        assert sorted(handled) == list(range(20))
+        assert broker.queues["events"] == []
+
+    asyncio.run(scenario())
+
+
+def test_sync_handler_runs_in_threads() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        handled: List[int] = []
+
+        await _publish(broker, "events", 5)
+        runner: RabbitConsumerRunner = RabbitConsumerRunner(
+            "events", lambda params: handled.append(params["number"]), broker, concurrency=2
+        )
+        await runner.start()
+        await _wait_for(lambda: len(handled) == 5)
+        await runner.stop(timeout=1)
+
+        assert sorted(handled) == list(range(5))
+
+    asyncio.run(scenario())
+
+
+def test_failed_message_is_retried() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        attempts: List[int] = []
+
+        async def handler(_: Dict[str, Any] | None) -> None:
+            attempts.append(1)
+
+            if len(attempts) == 1:
+                raise ValueError("временная ошибка")
+
+        await _publish(broker, "events", 1)
+        runner: RabbitConsumerRunner = RabbitConsumerRunner("events", handler, broker, retry_delay=0.01)
+        await runner.start()
+        await _wait_for(lambda: len(attempts) == 2)
+        await runner.stop(timeout=1)
+
+        assert broker.queues["events"] == []
+        assert broker.queues["events.dead"] == []
+
+    asyncio.run(scenario())
+
+
+def test_message_goes_to_dead_letter_after_max_retries() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        attempts: List[int] = []
+
+        async def handler(_: Dict[str, Any] | None) -> None:
+            attempts.append(1)
+            raise ValueError("постоянная ошибка")
+
+        await _publish(broker, "events", 1)
+        runner: RabbitConsumerRunner = RabbitConsumerRunner("events", handler, broker, max_retries=2, retry_delay=0.01)
+        await runner.start()
+        await _wait_for(lambda: len(broker.queues["events.dead"]) == 1)
+        await runner.stop(timeout=1)
+
+        dead_message: BrokerMessage = broker.queues["events.dead"][0]
+        assert len(attempts) == 3
+        assert dead_message.headers[RETRY_COUNT_HEADER] == 3
+        assert json.loads(dead_message.body) == {"number": 0}
+
+    asyncio.run(scenario())
+
+
+def test_stop_drains_in_flight_messages() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+        started: List[int] = []
+        handled: List[int] = []
+
+        async def handler(params: Dict[str, Any] | None) -> None:
+            started.append(params["number"])
+            await asyncio.sleep(0.05)
+            handled.append(params["number"])
+
+        await _publish(broker, "events", 3)
+        runner: RabbitConsumerRunner = RabbitConsumerRunner("events", handler, broker, prefetch_count=3, concurrency=3)
+        await runner.start()
+        await _wait_for(lambda: len(started) == 3)
+        await runner.stop(timeout=1)
+
+        assert sorted(handled) == [0, 1, 2]
+        assert broker.queues["events"] == []
+
+    asyncio.run(scenario())
+
+
+def test_stop_honours_timeout_with_hanging_handler() -> None:
+    async def scenario() -> None:
+        broker: InMemoryBroker = InMemoryBroker()
+
+        async def handler(_: Dict[str, Any] | None) -> None:
+            await asyncio.Event().wait()
+
+        await _publish(broker, "events", 10)
+        runner: RabbitConsumerRunner = RabbitConsumerRunner("events", handler, broker, prefetch_count=10, concurrency=2)
+        await runner.start()
+        await _wait_for(lambda: broker.queues["events"] == [])
+
+        started_at: float = time.monotonic()
+        await asyncio.wait_for(runner.stop(timeout=0.1), 2)
+
+        assert time.monotonic() - started_at < 1
+        # Необработанные сообщения возвращены в очередь
+        assert sorted(json.loads(message.body)["number"] for message in broker.queues["events"]) == list(range(10))
+
+    asyncio.run(scenario())
@@ -0,0 +1,97 @@
+"""Тесты рассылки событий сокетов"""
+
+__author__: str = "Старков Е.П."
+
+import json
+import time
+import asyncio
+from uuid import UUID, uuid4
+from typing import Any
+
+import pytest
+
+from dh_base.helpers.web_socket_backplane import WebSocketBackplane, decode_event, encode_event
+from dh_base.helpers.web_socket_event import WebSocketConnection, WebSocketConnectionManager
+
+
+class HangingSocket:
+    """Сокет, который не успевает ни принять событие, ни закрыться"""
+
+    def __init__(self) -> None:
+        self.close_codes: list[int] = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, _message: str) -> None:
+        await asyncio.sleep(60)
+
+    async def close(self, code: int) -> None:
+        self.close_codes.append(code)
+        await asyncio.sleep(60)
+
+
+def test_slow_consumer_disconnect_does_not_block_publish() -> None:
+    async def scenario() -> None:
+        manager: WebSocketConnectionManager = WebSocketConnectionManager(
+            max_queue_size=1, slow_consumer_policy="disconnect", send_timeout=0.1
+        )
+        socket: HangingSocket = HangingSocket()
+        await manager.connect(socket)
+
+        started: float = time.monotonic()
+
+        for _ in range(5):
+            await manager.publish("scope.event", {})
+
+        assert time.monotonic() - started < 0.05
+        assert manager.connections_count == 0
+
+        await asyncio.sleep(0.3)
+        assert socket.close_codes
+
+    asyncio.run(scenario())
+
+
+class FlakyBackplane(WebSocketBackplane):
+    """Шина в памяти процесса, первое подключение к которой завершается ошибкой"""
+
+    def __init__(self) -> None:
+        self.attempts: int = 0
+        self.handler: Any = None
+
+    async def start(self, handler: Any) -> None:
+        self.attempts += 1
+
+        if self.attempts == 1:
+            raise ConnectionError("Шина недоступна")
+
+        self.handler = handler
+
+    async def stop(self) -> None:
+        self.handler = None
+
+    async def publish(self, event_name: str, message: str, user_id: Any = None) -> None:
+        await self.handler(*decode_event(encode_event(event_name, message, user_id)))
+
+
+def test_backplane_delivers_to_uuid_user_after_failed_start() -> None:
+    async def scenario() -> None:
+        backplane: FlakyBackplane = FlakyBackplane()
+        manager: WebSocketConnectionManager = WebSocketConnectionManager(backplane=backplane)
+        user_id: UUID = uuid4()
+
+        with pytest.raises(ConnectionError):
+            await manager.start()
+
+        connection: WebSocketConnection = await manager.connect(HangingSocket(), user_id=user_id)
+        await manager.publish("scope.event", {"value": 1}, user_id=user_id)
+        await manager.publish("scope.event", {"value": 2}, user_id=uuid4())
+
+        assert backplane.attempts == 2
+        assert connection.queue.qsize() == 1
+        assert json.loads(connection.queue.get_nowait())["data"] == {"value": 1}
+
+        await manager.stop()
+
+    asyncio.run(scenario())
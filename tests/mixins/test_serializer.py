@@ -0,0 +1,54 @@
+"""Тесты сериализации в JSON"""
+
+__author__: str = "Старков Е.П."
+
+import json
+from uuid import UUID
+from decimal import Decimal
+from datetime import date, datetime, time, timezone
+from typing import Any, Dict
+
+import pytest
+
+from dh_base.mixins import serializer
+
+VALUE: Dict[str, Any] = {
+    "price": Decimal("10.50"),
+    "created": datetime(2024, 1, 1, 12, 0, 0),
+    "updated": datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc),
+    "day": date(2024, 1, 1),
+    "at": time(12, 30),
+    "uuid": UUID("12345678-1234-5678-1234-567812345678"),
+    "name": "Имя",
+}
+
+EXPECTED: Dict[str, Any] = {
+    "price": "10.50",
+    "created": "2024-01-01T12:00:00",
+    "updated": "2024-01-01T12:00:00.123456+00:00",
+    "day": "2024-01-01",
+    "at": "12:30:00",
+    "uuid": "12345678-1234-5678-1234-567812345678",
+    "name": "Имя",
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_json_same_output_for_both_backends(monkeypatch: pytest.MonkeyPatch, use_orjson: bool) -> None:
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serializer, "orjson", None)
+
+    assert json.loads(serializer.dumps_json(VALUE)) == EXPECTED
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_json_unsupported_type(monkeypatch: pytest.MonkeyPatch, use_orjson: bool) -> None:
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serializer, "orjson", None)
+
+    with pytest.raises(TypeError):
+        serializer.dumps_json({"value": object()})
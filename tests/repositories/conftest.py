@@ -0,0 +1,32 @@
+"""Общие фикстуры тестов репозиториев"""
+
+__author__: str = "Старков Е.П."
+
+import os
+import asyncio
+from typing import Iterator
+
+import pytest
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from dh_base.resources import registry
+
+# Тесты с БД выполняются только при указанной строке подключения к Postgres (postgresql+asyncpg://...)
+DATABASE_URL: str | None = os.environ.get("DH_TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def database() -> Iterator[AsyncEngine]:
+    """Движок тестовой БД, подставленный в реестр ресурсов вместо движка приложения"""
+    if not DATABASE_URL:
+        pytest.skip("Не задана строка подключения к тестовой БД DH_TEST_DATABASE_URL")
+
+    # Без пула: каждый тест выполняется в своем цикле событий
+    engine: AsyncEngine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    registry.override("db.engine", engine)
+    registry.override("db.async_session_maker", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+
+    yield engine
+
+    asyncio.run(registry.shutdown())
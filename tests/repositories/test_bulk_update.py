@@ -0,0 +1,63 @@
+"""Тесты массового обновления записей"""
+
+__author__: str = "Старков Е.П."
+
+import asyncio
+from typing import Any, List
+
+from sqlalchemy import String, event
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from dh_base.columns import IdColumns, DateEditColumns
+from dh_base.database import Base
+from dh_base.repositories import BaseRepository
+
+
+class BulkItem(Base, IdColumns, DateEditColumns):
+    """Запись для тестов массового обновления"""
+
+    __tablename__ = "test_bulk_item"
+
+    name: Mapped[str] = mapped_column(String)
+
+
+class BulkItemRepository(BaseRepository):
+    """Репозиторий записей для тестов массового обновления"""
+
+    model = BulkItem
+    ordering_field_name = "date_create"
+
+
+def test_bulk_update_writes_each_group_once(database: AsyncEngine) -> None:
+    async def scenario() -> None:
+        async with database.begin() as connection:
+            await connection.run_sync(BulkItem.__table__.drop, checkfirst=True)
+            await connection.run_sync(BulkItem.__table__.create)
+
+        repository: BulkItemRepository = BulkItemRepository()
+        items: List[Any] = await repository.bulk_create([{"name": f"item{i}"} for i in range(5)])
+        statements: List[str] = []
+
+        def collect(_connection: Any, _cursor: Any, statement: str, *_: Any) -> None:
+            statements.append(statement)
+
+        event.listen(database.sync_engine, "before_cursor_execute", collect)
+
+        try:
+            updated: List[Any] = await repository.bulk_update({item.id: {"name": f"new{item.id}"} for item in items})
+        finally:
+            event.remove(database.sync_engine, "before_cursor_execute", collect)
+
+        # Одна пачка с одинаковым набором колонок - один запрос UPDATE ... FROM VALUES без построчного автосброса
+        assert [statement for statement in statements if statement.lstrip().upper().startswith("UPDATE")] == [
+            statement for statement in statements if "FROM (VALUES" in statement
+        ]
+        assert sum(statement.lstrip().upper().startswith("UPDATE") for statement in statements) == 1
+        assert [item.name for item in updated] == [f"new{item.id}" for item in items]
+        assert [(await repository.get(item.id, None)).name for item in items] == [f"new{item.id}" for item in items]
+
+        async with database.begin() as connection:
+            await connection.run_sync(BulkItem.__table__.drop)
+
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+"""Тесты сериализации значений кэша записей"""
+
+__author__: str = "Старков Е.П."
+
+import pickle
+from uuid import uuid4
+from decimal import Decimal
+from datetime import date, time, datetime, timezone, timedelta
+
+import pytest
+
+from dh_base.repositories.cache import dump_cache_value, load_cache_value
+
+
+def test_column_values_round_trip_with_types() -> None:
+    values = {
+        "id": 1,
+        "uuid": uuid4(),
+        "name": "запись",
+        "is_active": True,
+        "date_create": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        "birthday": date(2000, 1, 31),
+        "start": time(9, 15),
+        "duration": timedelta(minutes=90),
+        "price": Decimal("10.50"),
+        "payload": b"\x00\x01",
+        "tags": ["a", "b"],
+        "settings": {"theme": "dark"},
+        "date_delete": None,
+    }
+
+    assert load_cache_value(dump_cache_value(values)) == values
+
+
+def test_unsupported_type_is_not_serialized() -> None:
+    with pytest.raises(TypeError):
+        dump_cache_value({"value": object()})
+
+
+def test_pickle_payload_is_not_executed() -> None:
+    with pytest.raises(ValueError):
+        load_cache_value(pickle.dumps({"id": 1}))
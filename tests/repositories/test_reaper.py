@@ -0,0 +1,87 @@
+"""Тесты окончательного удаления помеченных записей"""
+
+__author__: str = "Старков Е.П."
+
+import asyncio
+from uuid import uuid4
+from typing import Any, List
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from sqlalchemy import String, select
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from dh_base.columns import IdColumns, DateEditColumns
+from dh_base.database import Base
+from dh_base.resources import registry
+from dh_base.repositories import BaseRepository
+from dh_base.repositories.cache import EntityCache
+from dh_base.repositories.reaper import SoftDeleteReaper, purged_rows
+
+pytest.importorskip("aiosqlite")
+
+
+class ReapedItem(Base, IdColumns, DateEditColumns):
+    """Запись для тестов удаления помеченных записей"""
+
+    __tablename__ = "test_reaped_item"
+
+    name: Mapped[str] = mapped_column(String)
+
+
+class ReapedItemRepository(BaseRepository):
+    """Репозиторий записей для тестов удаления помеченных записей"""
+
+    model = ReapedItem
+    _CACHE = EntityCache()
+
+
+def test_purge_model_deletes_only_expired_and_evicts_cache() -> None:
+    async def scenario() -> None:
+        # SQLite не поддерживает SKIP LOCKED: блокировка строк в запросе не выводится
+        engine: AsyncEngine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        registry.override(
+            "db.async_session_maker", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        )
+        now: datetime = datetime.now(timezone.utc)
+        deleted_at: List[datetime | None] = [
+            now - timedelta(days=40),
+            now - timedelta(days=31),
+            now - timedelta(days=5),
+            None,
+        ]
+        cache: EntityCache = ReapedItemRepository._CACHE
+
+        async with engine.begin() as connection:
+            await connection.run_sync(ReapedItem.__table__.create)
+
+        async with registry.get("db.async_session_maker")() as session:
+            async with session.begin():
+                items: List[Any] = [
+                    ReapedItem(id=index, uuid=uuid4(), name=f"item{index}", date_create=now, date_delete=date_delete)
+                    for index, date_delete in enumerate(deleted_at, 1)
+                ]
+                session.add_all(items)
+
+        for item in items:
+            await cache.set(ReapedItem, item.id, item)
+
+        before: float = purged_rows.values().get(("test_reaped_item",), 0)
+        reaper: SoftDeleteReaper = SoftDeleteReaper([ReapedItem], after_days=30, batch_size=1, batch_pause=0)
+
+        assert await reaper.purge_model(ReapedItem) == 2
+        assert purged_rows.values().get(("test_reaped_item",), 0) - before == 2
+
+        async with registry.get("db.async_session_maker")() as session:
+            remaining: List[int] = list(
+                (await session.execute(select(ReapedItem.id).order_by(ReapedItem.id))).scalars()
+            )
+
+        assert remaining == [3, 4]
+        assert [(await cache.get(ReapedItem, entity_id))[0] for entity_id in (1, 2, 3, 4)] == [False, False, True, True]
+
+        await engine.dispose()
+
+    asyncio.run(scenario())
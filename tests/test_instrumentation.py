@@ -0,0 +1,23 @@
+"""Тесты учета запросов к БД"""
+
+__author__: str = "Старков Е.П."
+
+import pytest
+from sqlalchemy import text, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+from dh_base.instrumentation import instrument_engine
+
+
+def test_failed_queries_do_not_leak_start_times() -> None:
+    engine = instrument_engine(create_engine("sqlite://", poolclass=StaticPool))
+
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+
+        connection.execute(text("SELECT 1"))
+
+        assert connection.connection.info.get("query_start_time") == []